@@ -45,8 +45,19 @@ interface UserData {
   profile: User
   repositories: Repository[]
   transfer_repository: Repository[]
+  next_cursor: string | null
 }
 
+// /get_user_info returns a page at a time: append the next page to the loaded ones
+const appendPage = (loaded: UserData | null, page: UserData): UserData =>
+  loaded
+    ? {
+        ...page,
+        repositories: [...loaded.repositories, ...page.repositories],
+        transfer_repository: [...loaded.transfer_repository, ...page.transfer_repository],
+      }
+    : page
+
 export default function DashboardPage() {
   const [userData, setUserData] = useState<UserData | null>(null)
   const [githubRepos, setGithubRepos] = useState<any[]>([])
@@ -60,15 +71,16 @@ export default function DashboardPage() {
     fetchUserData()
   }, [])
 
-  const fetchUserData = async () => {
+  const fetchUserData = async (cursor?: string) => {
     try {
-      const response = await fetch(`${BACKEND_URL}/get_user_info`, {
+      const page = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""
+      const response = await fetch(`${BACKEND_URL}/get_user_info${page}`, {
         credentials: "include",
       })
 
       if (response.ok) {
         const data = await response.json()
-        setUserData(data.user)
+        setUserData((loaded) => (cursor ? appendPage(loaded, data.user) : data.user))
       } else {
         toast({
           title: "Error",
@@ -168,23 +180,21 @@ export default function DashboardPage() {
     }
   }
 
-  const searchUser = async () => {
+  const searchUser = async (cursor?: string) => {
     if (!searchQuery.trim()) return
 
     try {
       const isEmail = searchQuery.includes("@")
       const query = isEmail ? `email=${searchQuery}` : `username=${searchQuery}`
+      const page = cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""
 
-      const response = await fetch(`${BACKEND_URL}/get_user_info?${query}`, {
+      const response = await fetch(`${BACKEND_URL}/get_user_info?${query}${page}`, {
         credentials: "include",
       })
 
       if (response.ok) {
         const data = await response.json()
-        console.log("datos encontarods:")
-        console.log(data)
-
-        setSearchResults(data.user)
+        setSearchResults((loaded: UserData | null) => (cursor ? appendPage(loaded, data.user) : data.user))
       }
     } catch (error) {
       toast({
@@ -380,6 +390,15 @@ export default function DashboardPage() {
                     ))}
                   </div>
                 )}
+                {userData.next_cursor && (
+                  <Button
+                    variant="outline"
+                    className="w-full mt-4"
+                    onClick={() => fetchUserData(userData.next_cursor!)}
+                  >
+                    Cargar más
+                  </Button>
+                )}
               </CardContent>
             </Card>
           </TabsContent>
@@ -420,6 +439,15 @@ export default function DashboardPage() {
                     ))}
                   </div>
                 )}
+                {userData.next_cursor && (
+                  <Button
+                    variant="outline"
+                    className="w-full mt-4"
+                    onClick={() => fetchUserData(userData.next_cursor!)}
+                  >
+                    Cargar más
+                  </Button>
+                )}
               </CardContent>
             </Card>
           </TabsContent>
@@ -480,7 +508,7 @@ export default function DashboardPage() {
                     onChange={(e) => setSearchQuery(e.target.value)}
                     className="bg-white/5 border-white/10 text-white placeholder:text-gray-400"
                   />
-                  <Button onClick={searchUser}>
+                  <Button onClick={() => searchUser()}>
                     <Search className="w-4 h-4" />
                   </Button>
                 </div>
@@ -538,6 +566,15 @@ export default function DashboardPage() {
                           ))}
                         </div>
                       )}
+                      {searchResults.next_cursor && (
+                        <Button
+                          variant="outline"
+                          className="w-full mt-4"
+                          onClick={() => searchUser(searchResults.next_cursor)}
+                        >
+                          Cargar más
+                        </Button>
+                      )}
                     </div>
                   </div>
                 )}
@@ -50,6 +50,7 @@ interface Repository {
   branch: string
   uploader_id: number
   price?: number
+  commit_sha?: string | null
 }
 
 interface UserProfile {
@@ -231,6 +232,8 @@ export default function RepositoryPreviewPage() {
 
   // Cache para archivos - se mantiene solo durante la sesión
   const fileCache = useRef<Map<string, string>>(new Map())
+  // Commit the listing is pinned to, so the preview shows what the buyer gets
+  const commitSha = useRef<string | null>(null)
 
   useEffect(() => {
     fetchRepositoryData()
@@ -239,7 +242,8 @@ export default function RepositoryPreviewPage() {
 
   const fetchCurrentUser = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/get_user_info`, {
+      // Only the profile is needed, not the user's repositories
+      const response = await fetch(`${BACKEND_URL}/get_user_info?limit=1`, {
         credentials: "include",
       })
       if (response.ok) {
@@ -256,7 +260,7 @@ export default function RepositoryPreviewPage() {
       setLoading(true)
 
       // Fetch user info to get repository details
-      const userResponse = await fetch(`${BACKEND_URL}/get_user_info?username=${username}`, {
+      const userResponse = await fetch(`${BACKEND_URL}/get_user_info?username=${username}&repo_name=${encodeURIComponent(reponame)}`, {
         credentials: "include",
       })
 
@@ -268,6 +272,7 @@ export default function RepositoryPreviewPage() {
         const repo = userData.user.repositories.find((r: Repository) => r.name === reponame)
         if (repo) {
           setRepository(repo)
+          commitSha.current = repo.commit_sha || null
 
           // Fetch repository tree
           await fetchRepoTree(repo.branch || "main")
@@ -286,7 +291,8 @@ export default function RepositoryPreviewPage() {
 
   const fetchRepoTree = async (branch = "main") => {
     try {
-      const response = await fetch(`${BACKEND_URL}/tree?repository=${reponame}&username=${username}&branch=${branch}`, {
+      const sha = commitSha.current ? `&sha=${commitSha.current}` : ""
+      const response = await fetch(`${BACKEND_URL}/tree?repository=${reponame}&username=${username}&branch=${branch}${sha}`, {
         credentials: "include",
       })
 
@@ -337,8 +343,9 @@ export default function RepositoryPreviewPage() {
     setFileLoading(true)
 
     try {
+      const sha = commitSha.current ? `&sha=${commitSha.current}` : ""
       const response = await fetch(
-        `${BACKEND_URL}/file?path=${encodeURIComponent(path)}&owner=${username}&repo=${reponame}`,
+        `${BACKEND_URL}/file?path=${encodeURIComponent(path)}&owner=${username}&repo=${reponame}${sha}`,
         {
           credentials: "include",
         },
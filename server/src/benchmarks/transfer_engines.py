@@ -0,0 +1,85 @@
+"""
+Compares the two ways of importing a zipball as a new repository:
+
+    archive   extract to a working tree, then git init/add/commit/push
+    packfile  build the objects in memory and push a packfile (no subprocess)
+
+Both push to local bare repositories, so no GitHub access is needed.
+
+    cd server/src && python -m benchmarks.transfer_engines --files 5000 --size 4096
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from server.utils.archive import extract_zip
+from server.utils.git import import_working_tree
+from server.utils.packfile import push_zip_as_commit
+
+MESSAGE = "Imported from AgoraPay platform"
+AUTHOR = "AgoraPay <noreply@agorapay.app>"
+
+
+def make_zipball(path: Path, files: int, size: int, per_dir: int = 50) -> None:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        for index in range(files):
+            content = (f"# file {index}\n".encode() + os.urandom(size // 2).hex().encode())[:size]
+            zip_ref.writestr(f"owner-repo-0000000/dir{index // per_dir}/file{index}.py", content)
+
+
+def bare_repository(path: Path) -> str:
+    subprocess.run(["git", "init", "--quiet", "--bare", str(path)], check=True)
+    return str(path)
+
+
+def run_archive(zip_path: Path, work_dir: Path) -> None:
+    extract_zip(zip_path, work_dir / "extract")
+    work_tree = next((work_dir / "extract").iterdir())
+    remote = bare_repository(work_dir / "archive.git")
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "AgoraPay", "GIT_AUTHOR_EMAIL": "noreply@agorapay.app",
+        "GIT_COMMITTER_NAME": "AgoraPay", "GIT_COMMITTER_EMAIL": "noreply@agorapay.app"
+    }
+    asyncio.run(import_working_tree(work_tree, remote, MESSAGE, env=env))
+
+
+def run_packfile(zip_path: Path, work_dir: Path) -> None:
+    remote = bare_repository(work_dir / "packfile.git")
+    push_zip_as_commit(zip_path, remote, MESSAGE, AUTHOR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=4096, help="bytes per file")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        zip_path = root / "repo.zip"
+        make_zipball(zip_path, args.files, args.size)
+        print(f"{args.files} files, {zip_path.stat().st_size / 1024 / 1024:.1f} MB zipball")
+
+        for name, run in (("archive", run_archive), ("packfile", run_packfile)):
+            timings = []
+            for round_index in range(args.rounds):
+                work_dir = root / f"{name}-{round_index}"
+                work_dir.mkdir()
+                started = time.perf_counter()
+                run(zip_path, work_dir)
+                timings.append(time.perf_counter() - started)
+                shutil.rmtree(work_dir)
+            print(f"{name:>8}: best {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from dotenv import load_dotenv
+from typing import Optional
 import os
 import sys
 
@@ -61,6 +62,97 @@ class Settings(BaseSettings):
     PAYPAL_SECRET: str
     PAYPAL_API_URL: str
 
+    # GITHUB CLIENT SETTINGS
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_HTTP2: bool = True
+    GITHUB_MAX_CONNECTIONS: int = 100
+    GITHUB_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GITHUB_KEEPALIVE_EXPIRY: float = 30.0   # SECONDS
+    GITHUB_CONNECT_TIMEOUT: float = 5.0     # SECONDS
+    GITHUB_READ_TIMEOUT: float = 30.0       # SECONDS
+    GITHUB_WRITE_TIMEOUT: float = 30.0      # SECONDS
+    GITHUB_POOL_TIMEOUT: float = 10.0       # SECONDS
+    GITHUB_ETAG_CACHE_SIZE: int = 2048      # CACHED GET RESPONSES
+    GITHUB_PAGE_CONCURRENCY: int = 5        # PAGES OF A LIST FETCHED IN PARALLEL
+    GITHUB_TREE_CONCURRENCY: int = 8        # SUBTREES FETCHED IN PARALLEL FOR TRUNCATED TREES
+
+    # GITHUB RATE LIMIT SETTINGS (SHARE OF A TOKEN'S HOURLY QUOTA KEPT FOR HIGHER PRIORITIES)
+    GITHUB_RATE_RESERVE_INTERACTIVE: float = 0.02  # FRACTION OF THE TOKEN'S LIMIT KEPT FROM INTERACTIVE CALLS
+    GITHUB_RATE_RESERVE_PREVIEW: float = 0.2       # FRACTION OF THE TOKEN'S LIMIT KEPT FROM PREVIEWS
+    GITHUB_RATE_MAX_WAIT_TRANSFER: float = 15 * 60   # SECONDS
+    GITHUB_RATE_MAX_WAIT_INTERACTIVE: float = 5.0    # SECONDS
+    GITHUB_RATE_MAX_WAIT_PREVIEW: float = 0.0        # SECONDS
+
+    # REPOSITORY ARCHIVE SETTINGS
+    ZIPBALL_MAX_BYTES: int = 2 * 1024 * 1024 * 1024          # 2 GB
+    ZIPBALL_CHUNK_SIZE: int = 1024 * 1024                    # 1 MB
+    ZIP_EXTRACT_WORKERS: int = 4
+    ZIP_PARALLEL_THRESHOLD: int = 64 * 1024 * 1024           # 64 MB UNCOMPRESSED
+    ARCHIVE_STORE_DIR: str = os.path.join(BASE_DIR, "cache", "archives")
+    ARCHIVE_STORE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024   # 10 GB ON DISK
+
+    # PREVIEW CACHE SETTINGS
+    TREE_STORE_PATH: str = os.path.join(BASE_DIR, "cache", "trees.sqlite3")
+    TREE_STORE_MAX_BYTES: int = 512 * 1024 * 1024            # 512 MB COMPRESSED
+    BLOB_CACHE_MAX_BYTES: int = 64 * 1024 * 1024             # 64 MB IN MEMORY
+    BLOB_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024            # LARGER BLOBS ARE NOT CACHED
+    BLOB_CACHE_SPILL_DIR: Optional[str] = None               # E.G. os.path.join(BASE_DIR, "cache", "blobs")
+    BLOB_CACHE_SPILL_MAX_BYTES: int = 1024 * 1024 * 1024     # 1 GB ON DISK
+    PREVIEW_RANGE_BYTES: int = 16 * 1024                     # FIRST RANGE WINDOW, DOUBLED AS NEEDED
+    PREVIEW_MAX_LINES: int = 500
+    PREVIEW_BATCH_MAX_PATHS: int = 50
+    PREVIEW_BATCH_CONCURRENCY: int = 8
+    LISTING_PAGE_SIZE: int = 50
+    LISTING_MAX_PAGE_SIZE: int = 200
+    SEARCH_PAGE_SIZE: int = 20
+    SEARCH_MAX_PAGE_SIZE: int = 100
+    SEARCH_DESCRIPTION_MAX_CHARS: int = 2000                 # README EXCERPT INDEXED PER LISTING
+    HIGHLIGHT_WORKERS: int = 2                               # PROCESSES RENDERING HIGHLIGHTED PREVIEWS
+    HIGHLIGHT_DEFAULT_STYLE: str = "default"                 # ANY PYGMENTS STYLE NAME
+    HIGHLIGHT_MAX_BYTES: int = 512 * 1024                    # LARGER SOURCES ONLY HIGHLIGHT THE PREVIEW WINDOW
+    HIGHLIGHT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024        # 64 MB IN MEMORY
+    HIGHLIGHT_CACHE_MAX_ENTRY_BYTES: int = 2 * 1024 * 1024   # LARGER RENDERS ARE NOT CACHED
+
+    # GITHUB WEBHOOK SETTINGS
+    GITHUB_WEBHOOK_URL: Optional[str] = None  # PUBLIC URL OF /webhooks/github, NO HOOKS ARE REGISTERED WHILE UNSET
+
+    # LISTING MANIFEST SETTINGS
+    MANIFEST_README_LINES: int = 40
+    MANIFEST_README_MAX_CHARS: int = 4000
+
+    # TRANSFER SETTINGS
+    TRANSFER_ENGINE: str = "mirror"  # "mirror" (history preserving), "archive" or "packfile" (zipball snapshot)
+    TRANSFER_TEMPLATE_GENERATE: bool = True  # LET GITHUB GENERATE COPIES OF TEMPLATE REPOSITORIES
+    TRANSFER_COMMIT_MESSAGE: str = "Imported from AgoraPay platform"
+    TRANSFER_COMMIT_AUTHOR: str = "AgoraPay <noreply@agorapay.app>"  # PACKFILE ENGINE ONLY
+    MIRROR_ROOT: str = os.path.join(BASE_DIR, "mirrors")
+    MIRROR_MAX_BYTES: int = 20 * 1024 * 1024 * 1024   # 20 GB OF MIRRORS, LEAST RECENTLY USED ARE EVICTED
+    MIRROR_LOCK_POLL_INTERVAL: float = 0.5            # SECONDS BETWEEN ATTEMPTS TO LOCK A BUSY MIRROR
+
+    # TRANSFER WORKSPACE SETTINGS
+    WORKSPACE_ROOT: str = os.path.join(BASE_DIR, "workspaces")  # E.G. A TMPFS SUCH AS /dev/shm/agorapay
+    WORKSPACE_QUOTA_BYTES: int = 8 * 1024 * 1024 * 1024          # 8 GB ACROSS ALL PROCESSES SHARING WORKSPACE_ROOT
+    WORKSPACE_DEFAULT_RESERVATION: int = 1024 * 1024 * 1024      # 1 GB WHEN THE SIZE IS UNKNOWN
+    WORKSPACE_ADMISSION_TIMEOUT: float = 10 * 60                 # SECONDS TO WAIT FOR QUOTA
+    WORKSPACE_ADMISSION_POLL_INTERVAL: float = 1.0               # SECONDS BETWEEN CHECKS FOR QUOTA FREED BY OTHER PROCESSES
+    WORKSPACE_REAPER_INTERVAL: float = 5 * 60                    # SECONDS
+
+    # TRANSFER QUEUE SETTINGS
+    TRANSFER_WORKERS_PAID: int = 3          # WORKERS SERVING PAID TRANSFERS FIRST, THEN FREE ONES
+    TRANSFER_WORKERS_FREE: int = 1          # WORKERS SERVING FREE TRANSFERS ONLY
+    TRANSFER_MAX_ATTEMPTS: int = 3
+    TRANSFER_RETRY_DELAY: int = 30          # SECONDS, DOUBLED ON EACH RETRY
+    TRANSFER_POLL_INTERVAL: float = 2.0     # SECONDS
+    TRANSFER_JOB_LEASE: int = 5 * 60        # SECONDS WITHOUT A HEARTBEAT BEFORE A RUNNING JOB IS REQUEUED
+    TRANSFER_HEARTBEAT_INTERVAL: float = 30.0  # SECONDS BETWEEN LEASE RENEWALS OF A RUNNING JOB
+    TRANSFER_MAX_RUNNING_PER_BUYER: int = 2 # JOBS OF ONE BUYER RUNNING AT THE SAME TIME
+    TRANSFER_PROGRESS_INTERVAL: float = 1.0 # SECONDS BETWEEN STORED BYTE-PROGRESS UPDATES
+    TRANSFER_EVENTS_POLL_INTERVAL: float = 1.0  # SECONDS BETWEEN SSE CHECKS OF A JOB
+    TRANSFER_EVENTS_KEEPALIVE: float = 15.0     # SECONDS BETWEEN SSE KEEPALIVE COMMENTS
+
+    # CART SETTINGS
+    CART_MAX_ITEMS: int = 10                # PAYPAL ACCEPTS UP TO 10 PURCHASE UNITS PER ORDER
+
     model_config = ConfigDict(env_file=env_file)
 
 settings = Settings()
\ No newline at end of file
@@ -3,14 +3,21 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from server.config import settings
 
-DATABASE_URL = f"{settings.SUPABASE_URL}?sslmode=require"
-
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"sslmode": "require"},
-    pool_pre_ping=True
-)
+if settings.SUPABASE_URL.startswith("sqlite"):
+    # Local mode, e.g. SUPABASE_URL=sqlite:///./agorapay.db
+    DATABASE_URL = settings.SUPABASE_URL
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False}
+    )
+else:
+    DATABASE_URL = f"{settings.SUPABASE_URL}?sslmode=require"
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"sslmode": "require"},
+        pool_pre_ping=True
+    )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
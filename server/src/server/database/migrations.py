@@ -0,0 +1,149 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DatabaseError
+from server.database.config import Base, engine
+from icecream import ic
+
+# Columns added to tables that already exist in deployed databases, as
+# (table, column). create_all only creates missing tables, so these are
+# added here; the column definitions are read from the models.
+ADDED_COLUMNS = [
+    ("repositories", "commit_sha"),
+    ("repositories", "head_sha"),
+    ("repositories", "webhook_id"),
+    ("repositories", "webhook_secret_encrypted"),
+    ("transfer_jobs", "batch_id"),
+    ("transfer_jobs", "stage"),
+    ("transfer_jobs", "progress_bytes"),
+    ("transfer_jobs", "total_bytes"),
+    ("transfer_jobs", "strategy"),
+    ("transfer_jobs", "duration_seconds"),
+    ("transfer_jobs", "target_repo_url"),
+]
+
+# Expression covered by the trigram index, repeated verbatim in queries so the planner uses it
+TRIGRAM_EXPRESSION = "(coalesce(name, '') || ' ' || coalesce(owner, ''))"
+
+# Backend specific DDL of a table, run after the table is created or
+# upgraded, statement by statement. repository_search gets its full-text
+# index here: a weighted tsvector and a trigram index on Postgres, an FTS5
+# table whose rowid is the repository ID on SQLite.
+TABLE_DDL = {
+    "repository_search": {
+        "postgresql": [
+            """
+            ALTER TABLE repository_search ADD COLUMN IF NOT EXISTS document tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(owner, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+            ) STORED
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_repository_search_document ON repository_search USING GIN (document)",
+            f"CREATE INDEX IF NOT EXISTS ix_repository_search_trigram ON repository_search USING GIN ({TRIGRAM_EXPRESSION} gin_trgm_ops)"
+        ],
+        "sqlite": [
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS repository_search_fts
+            USING fts5(name, owner, description, tokenize = 'unicode61 remove_diacritics 2')
+            """
+        ]
+    }
+}
+
+# Postgres extensions the DDL of a table needs. Creating one takes a
+# privileged role: when the application's role cannot, the upgrade goes on
+# without it and reports it (run upgrade_db as the database owner once).
+TABLE_EXTENSIONS = {"repository_search": ["pg_trgm"]}
+
+# Tables already brought up to date by this process
+_upgraded_tables: set[str] = set()
+
+
+def upgrade_schema(force: bool = False) -> list[str]:
+    """
+    Bring an existing database up to the models: create the missing
+    tables, add the columns in ADDED_COLUMNS, create missing indexes and
+    run the backend specific DDL of TABLE_DDL.
+    Only the tables of the models imported so far are handled, so every
+    queries module calls it after importing its models. Safe to run any
+    number of times, and from several processes at once.
+    With force, tables already handled by this process are checked again.
+    Returns the added columns as "table.column".
+    """
+    pending = [
+        table for name, table in Base.metadata.tables.items()
+        if force or name not in _upgraded_tables
+    ]
+    if not pending:
+        return []
+    pending_names = {table.name for table in pending}
+
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    added = []
+    with engine.begin() as connection:
+        for table_name, column_name in ADDED_COLUMNS:
+            if table_name not in pending_names or table_name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+            if column_name in existing_columns:
+                continue
+            column_type = Base.metadata.tables[table_name].c[column_name].type.compile(dialect=engine.dialect)
+            connection.execute(text(
+                f"ALTER TABLE {table_name} ADD COLUMN {if_not_exists}{column_name} {column_type}"
+            ))
+            added.append(f"{table_name}.{column_name}")
+
+    # create_all skips the indexes of tables that already existed
+    for table in pending:
+        if table.name not in existing_tables:
+            continue
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except DatabaseError as e:
+                # Another process created it between the check and the create
+                ic("Index not created:", index.name, str(e))
+
+    for table in pending:
+        _run_table_ddl(table.name)
+
+    if added:
+        ic("Database schema upgraded, added columns:", added)
+    _upgraded_tables.update(pending_names)
+    return added
+
+
+def has_extension(name: str) -> bool:
+    """
+    Whether a Postgres extension is installed in the database.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = :name"), {"name": name}
+        ).first() is not None
+
+
+def _run_table_ddl(table_name: str) -> None:
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        for extension in TABLE_EXTENSIONS.get(table_name, []):
+            if has_extension(extension):
+                continue
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+            except DatabaseError as e:
+                ic(f"Extension {extension} is missing and this role cannot create it:", str(e))
+    # One transaction per statement: on Postgres a failed statement would abort the rest
+    for statement in TABLE_DDL.get(table_name, {}).get(dialect, []):
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(statement))
+        except DatabaseError as e:
+            ic("Schema statement not applied:", table_name, str(e))
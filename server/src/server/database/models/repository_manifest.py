@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, JSON, Text, func
+from server.database.config import Base
+
+# Capture states
+MANIFEST_PENDING = "pending"
+MANIFEST_READY = "ready"
+MANIFEST_FAILED = "failed"
+
+
+# Snapshot of a listed repository, captured once so listings need no GitHub calls
+class RepositoryManifest(Base):
+    __tablename__ = "repository_manifests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id", ondelete="CASCADE"), unique=True, index=True)
+    status = Column(String, default=MANIFEST_PENDING)
+
+    head_sha = Column(String, nullable=True)
+    file_count = Column(Integer, nullable=True)
+    total_size = Column(BigInteger, nullable=True)
+    tree_summary = Column(JSON, nullable=True)
+    languages = Column(JSON, nullable=True)
+    readme_excerpt = Column(Text, nullable=True)
+
+    error = Column(Text, nullable=True)
+    captured_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
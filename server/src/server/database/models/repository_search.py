@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, func
+from server.database.config import Base
+
+
+# Searchable copy of a listing: name, owner and README excerpt. The full-text
+# index over it is backend specific (tsvector and trigram indexes on
+# Postgres, an FTS5 table on SQLite) and is created by upgrade_schema
+# (migrations.TABLE_DDL).
+class RepositorySearch(Base):
+    __tablename__ = "repository_search"
+
+    repository_id = Column(Integer, ForeignKey("repositories.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, nullable=False, default="")
+    owner = Column(String, nullable=False, default="")
+    description = Column(Text, nullable=False, default="")
+    price = Column(Float, nullable=True)
+    branch = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
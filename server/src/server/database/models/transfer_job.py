@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, ForeignKey, DateTime, JSON, Text, Index, func
+from server.database.config import Base
+
+# Priority lanes, lower values are claimed first
+PRIORITY_PAID = 0
+PRIORITY_FREE = 10
+
+# Job states
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+
+# Represents a repository transfer waiting for, or processed by, a worker
+class TransferJob(Base):
+    __tablename__ = "transfer_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    buyer_id = Column(Integer, ForeignKey("users.id"), index=True)
+    seller_id = Column(Integer)
+    repo_name = Column(String)
+    repo_url = Column(String)
+    # Jobs queued together by one cart checkout
+    batch_id = Column(String, nullable=True, index=True)
+
+    priority = Column(Integer, default=PRIORITY_FREE)
+    status = Column(String, default=STATUS_QUEUED)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Lease held by the worker processing the job
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Progress reported by the worker while the job runs
+    stage = Column(String, nullable=True)
+    progress_bytes = Column(BigInteger, nullable=True)
+    total_bytes = Column(BigInteger, nullable=True)
+
+    # Buyer's repository, created by the first attempt and reused by retries
+    target_repo_url = Column(String, nullable=True)
+
+    # How the repository was copied and how long the copy took
+    strategy = Column(String, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_transfer_jobs_claim", "status", "priority", "run_after", "id"),
+    )
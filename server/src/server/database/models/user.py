@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, Boolean, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from server.database.config import Base
 from icecream import ic
@@ -11,17 +11,27 @@ user_purchased_repositories = Table(
     "user_purchased_repositories",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id")),
-    Column("repository_id", Integer, ForeignKey("repositories.id"))
+    Column("repository_id", Integer, ForeignKey("repositories.id")),
+    # Keyset pages of a user's purchases
+    Index("ix_user_purchased_repositories_user_id", "user_id", "repository_id")
 )
 
 # Represents a repository in the database
 ic("Defining Repository model to represent a repository in the database")
 class Repository(Base):
     __tablename__ = "repositories"    
+    # Keyset pages of a user's repositories
+    __table_args__ = (Index("ix_repositories_uploader_id_id", "uploader_id", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     url = Column(String)
     branch = Column(String, default="main")  # New field for branch
+    commit_sha = Column(String, nullable=True)  # Commit the listing is pinned to
+    head_sha = Column(String, nullable=True)  # Latest head pushed to the branch, re-pinned only on refresh
+
+    # Push webhook registered on the seller's repository, with its own secret
+    webhook_id = Column(Integer, nullable=True)
+    webhook_secret_encrypted = Column(String, nullable=True)
     price = Column(Float)
     uploader_id = Column(Integer, ForeignKey("users.id"))
 
@@ -1,9 +1,15 @@
-from server.database.config import Base, engine, SessionLocal
-from server.database.models.user import User, Repository
+from server.database.config import SessionLocal
+from server.database.migrations import upgrade_schema
+from server.database.models.user import User, Repository, user_purchased_repositories
+from server.database.models.repository_manifest import RepositoryManifest
+from server.database.queries.repository_manifest import get_repository_manifests
+from server.database.queries.repository_search import index_repository, remove_repository_index
+from server.utils.security.crypt_token import encrypt_token, decrypt_token
+from server.utils.functions import github_parse_url
 from typing import Optional
 from icecream import ic
 ic("-- Starting repository queries module --")
-Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 # Dependency to get the database session
 ic("Defining get_db function to obtain the database session")
@@ -17,7 +23,14 @@ def get_db():
 
 # Associate a repository as uploaded by the user
 ic("Defining set_repository function to associate a repository uploaded by the user")
-def set_repository(user_id: int, name_repository: str, url_repository: str, price: float = 0.0, branch: str = "main"):
+def set_repository(
+    user_id: int,
+    name_repository: str,
+    url_repository: str,
+    price: float = 0.0,
+    branch: str = "main",
+    commit_sha: Optional[str] = None
+):
     db = get_db()
     try:
         ic("Starting transaction to upload repository")
@@ -29,6 +42,8 @@ def set_repository(user_id: int, name_repository: str, url_repository: str, pric
             name=name_repository, 
             url=url_repository, 
             branch=branch,
+            commit_sha=commit_sha,
+            head_sha=commit_sha,
             price=price, 
             uploader_id=user_id
         )
@@ -38,36 +53,65 @@ def set_repository(user_id: int, name_repository: str, url_repository: str, pric
         db.commit()
         db.refresh(repo)
         ic("Repository uploaded successfully with ID:", repo.id)
-        return {"message": "Repository uploaded successfully", "repo_id": repo.id}
     except Exception as e:
         ic("Error uploading repository:", str(e))
         db.rollback()
         raise Exception(f"Error uploading repository: {str(e)}")
+    try:
+        index_repository(repo.id)
+    except Exception as e:
+        ic("Listing saved but not indexed for search:", repo.id, str(e))
+    return {"message": "Repository uploaded successfully", "repo_id": repo.id, "commit_sha": repo.commit_sha}
+
+
+# Find the ID of a user by ID, name or email
+def _resolve_user_id(
+        db,
+        user_id: Optional[int] = None,
+        user_name: Optional[str] = None,
+        user_email: Optional[str] = None
+        ) -> Optional[int]:
+    if user_id:
+        return user_id
+    if user_name:
+        row = db.query(User.id).filter(User.username == user_name).first()
+    elif user_email:
+        row = db.query(User.id).filter(User.email == user_email).first()
+    else:
+        ic("Error: No user identifier, name, or email provided.")
+        raise Exception("You must provide a user identifier, name, or email.")
+    return row[0] if row else None
 
 
-# Get all repositories uploaded by a user
+# Get the repositories uploaded by a user (or only those with a name), a page at a time when a limit is given
 ic("Defining get_set_repositories function to get repositories uploaded by a user")
 def get_set_repositories(
         user_id: Optional[int] = None, 
         user_name: Optional[str] = None, 
-        user_email: Optional[str] = None
+        user_email: Optional[str] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        repo_name: Optional[str] = None
         ):
     db = get_db()
     ic("Starting query to get repositories uploaded by user")
-    if user_id:
-        user = db.query(User).get(user_id)
-    elif user_name:
-        user = db.query(User).filter(User.username == user_name).first()
-    elif user_email:
-        user = db.query(User).filter(User.email == user_email).first()
-    else:
-        ic("Error: No user identifier, name, or email provided.")
-        raise Exception("You must provide a user identifier, name, or email.")
-    ic("User found:", user.username if user else "Not found")
-    repos = user.uploaded_repositories
+    user_id = _resolve_user_id(db, user_id, user_name, user_email)
+    ic("User found:", user_id if user_id else "Not found")
+    if not user_id:
+        return None
+    # Keyset page over the (uploader_id, id) index, ordered by ID
+    query = db.query(Repository).filter(Repository.uploader_id == user_id)
+    if repo_name is not None:
+        query = query.filter(Repository.name == repo_name)
+    if after_id is not None:
+        query = query.filter(Repository.id > after_id)
+    query = query.order_by(Repository.id)
+    repos = (query.limit(limit) if limit else query).all()
     ic("Uploaded repositories found:", len(repos) if repos else 0)
     if not repos:
         return None
+    ic("Loading manifests captured for the repositories")
+    manifests = get_repository_manifests([repo.id for repo in repos])
     ic("Converting repositories to serializable format")
     return [
         {
@@ -77,12 +121,28 @@ def get_set_repositories(
             "url": repo.url,
             "price": repo.price,
             "branch": repo.branch,
-            "is_transfer": repo.is_transfer
+            "commit_sha": repo.commit_sha,
+            "head_sha": repo.head_sha,
+            "is_transfer": repo.is_transfer,
+            "manifest": manifests.get(repo.id)
         } for repo in repos
     ]
 
 
-# Save a transferred repository for a user
+def _serialize_transfer(repo: Repository) -> dict:
+    return {
+        "message": "Repository purchased and saved successfully",
+        "repo_id": repo.id,
+        "repo_name": repo.name,
+        "repo_url": repo.url,
+        "branch": repo.branch,
+        "commit_sha": repo.commit_sha,
+        "seller_id": repo.seller_id,
+        "seller_repo_id": repo.seller_repo_id
+    }
+
+
+# Save a transferred repository for a user, once per repository URL
 ic("Defining save_transfer_repo function to save a transferred repository for a user")
 def save_transfer_repo(
     user_id: int,
@@ -90,7 +150,8 @@ def save_transfer_repo(
     repo_url: str,
     seller_id: int,
     seller_repo_id: int,
-    branch: str = "main"
+    branch: str = "main",
+    commit_sha: Optional[str] = None
 ):
     db = get_db()
     ic("Validating buyer user with ID:", user_id)
@@ -98,11 +159,17 @@ def save_transfer_repo(
     if not buyer:
         ic("Error: Buyer not found with ID:", user_id)
         raise Exception("Buyer not found")
+    # A retried transfer may already have saved the repository
+    new_repo = db.query(Repository).filter_by(uploader_id=user_id, url=repo_url, is_transfer=True).first()
+    if new_repo:
+        ic("Transferred repository already saved with ID:", new_repo.id)
+        return _serialize_transfer(new_repo)
     ic("Creating a new repository for the buyer")    
     new_repo = Repository(
         name=repo_name,
         url=repo_url,
         branch=branch,
+        commit_sha=commit_sha,
         uploader_id=user_id,
         seller_id=seller_id,
         seller_repo_id=seller_repo_id,
@@ -110,46 +177,46 @@ def save_transfer_repo(
     )
     ic("Associating new repository with buyer ID:", user_id)
     db.add(new_repo)
-    db.commit()
-    db.refresh(new_repo)
     ic("Associating new repository to buyer's purchased repositories list")
     buyer.purchased_repositories.append(new_repo)
-    db.commit()
-    db.refresh(buyer)
+    # One transaction, so a retry never finds the repository without the purchase
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(new_repo)
     ic("Repository purchased and saved successfully with ID:", new_repo.id)    
-    return {
-        "message": "Repository purchased and saved successfully",
-        "repo_id": new_repo.id,
-        "repo_name": new_repo.name,
-        "repo_url": new_repo.url,
-        "branch": new_repo.branch,
-        "seller_id": new_repo.seller_id,
-        "seller_repo_id": new_repo.seller_repo_id
-    }
+    return _serialize_transfer(new_repo)
 
 
-# Get all purchased repositories for a user
+# Get the purchased repositories of a user, a page at a time when a limit is given
 ic("Defining get_transfer_repo function to get purchased repositories for a user")
 def get_transfer_repo(
         user_id: Optional[int] = None,
         user_name: Optional[str] = None,
-        user_email: Optional[str] = None
+        user_email: Optional[str] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None
         ):
     db = get_db()
     ic("Starting query to get purchased repositories for user")
-    if user_id:
-        user = db.query(User).get(user_id)
-    elif user_name:
-        user = db.query(User).filter(User.username == user_name).first()
-    elif user_email:
-        user = db.query(User).filter(User.email == user_email).first()
-    else:
-        ic("Error: No user identifier, name, or email provided.")
-        raise Exception("You must provide a user identifier, name, or email.")
-    ic("User found:", user.username if user else "Not found")
-    repos = user.purchased_repositories
+    user_id = _resolve_user_id(db, user_id, user_name, user_email)
+    ic("User found:", user_id if user_id else "Not found")
+    if not user_id:
+        return None
+    # Keyset page over the (user_id, repository_id) index, ordered by ID
+    query = (
+        db.query(Repository)
+        .join(user_purchased_repositories, user_purchased_repositories.c.repository_id == Repository.id)
+        .filter(user_purchased_repositories.c.user_id == user_id)
+    )
+    if after_id is not None:
+        query = query.filter(Repository.id > after_id)
+    query = query.order_by(Repository.id)
+    repos = (query.limit(limit) if limit else query).all()
     if not repos:
-        ic("No purchased repositories found for user:", user.username if user else "Not found")
+        ic("No purchased repositories found for user:", user_id)
         return None
     ic("Converting purchased repositories to serializable format")    
     repo_data = [
@@ -158,6 +225,7 @@ def get_transfer_repo(
             "name": repo.name,
             "url": repo.url,
             "branch": repo.branch,
+            "commit_sha": repo.commit_sha,
             "uploader_id": repo.uploader_id,
             "seller_id": repo.seller_id,
             "seller_repo_id": repo.seller_repo_id
@@ -167,6 +235,164 @@ def get_transfer_repo(
     return repo_data
 
 
+# Get a listing of a user by its repository URL
+ic("Defining get_listing_by_url function to find a listing by URL")
+def get_listing_by_url(uploader_id: int, repo_url: str) -> Optional[dict]:
+    db = get_db()
+    repo = (
+        db.query(Repository)
+        .filter(Repository.uploader_id == uploader_id, Repository.url == repo_url)
+        .order_by(Repository.id)
+        .first()
+    )
+    if repo is None:
+        return None
+    return {
+        "repository_id": repo.id,
+        "uploader_id": repo.uploader_id,
+        "name": repo.name,
+        "url": repo.url,
+        "price": repo.price,
+        "branch": repo.branch,
+        "commit_sha": repo.commit_sha,
+        "head_sha": repo.head_sha,
+        "is_transfer": repo.is_transfer
+    }
+
+
+# Get the commit a listing of a seller's GitHub repository is pinned to
+ic("Defining get_listing_commit function to find the pinned commit of a listing")
+def get_listing_commit(owner: str, repo: str, branch: str = "main") -> Optional[str]:
+    """
+    Returns the commit_sha of the seller's listing of github.com/{owner}/{repo}
+    on `branch`, the most recent one if listed more than once, or None when
+    the repository is not listed or not pinned.
+    """
+    db = get_db()
+    rows = (
+        db.query(Repository.url, Repository.commit_sha)
+        .join(User, Repository.uploader_id == User.id)
+        .filter(
+            User.username == owner,
+            Repository.branch == branch,
+            Repository.commit_sha.isnot(None),
+            Repository.is_transfer.isnot(True)
+        )
+        .order_by(Repository.id.desc())
+        .all()
+    )
+    for url, commit_sha in rows:
+        try:
+            url_owner, url_repo = github_parse_url(url)
+        except ValueError:
+            continue
+        # GitHub owner and repository names are case insensitive
+        if url_owner.lower() == owner.lower() and url_repo.removesuffix(".git").lower() == repo.lower():
+            return commit_sha
+    return None
+
+
+# Get listed repositories by ID
+ic("Defining get_repositories_by_ids function to get listings by ID")
+def get_repositories_by_ids(repo_ids: list[int]) -> list[dict]:
+    db = get_db()
+    repos = db.query(Repository).filter(Repository.id.in_(repo_ids)).all()
+    return [
+        {
+            "repository_id": repo.id,
+            "uploader_id": repo.uploader_id,
+            "name": repo.name,
+            "url": repo.url,
+            "price": repo.price,
+            "branch": repo.branch,
+            "commit_sha": repo.commit_sha,
+            "head_sha": repo.head_sha,
+            "is_transfer": repo.is_transfer
+        } for repo in repos
+    ]
+
+
+# Pin a repository uploaded by the user to a new commit
+ic("Defining set_repository_commit function to pin a repository to a new commit")
+def set_repository_commit(repo_id: int, user_id: int, commit_sha: str):
+    db = get_db()
+    try:
+        ic("Starting transaction to refresh repository commit")
+        repo = db.query(Repository).filter_by(id=repo_id, uploader_id=user_id).first()
+        if not repo:
+            ic("Repository not found or does not belong to user")
+            raise Exception("Repository not found or you do not have permission to refresh it")
+        previous_sha = repo.commit_sha
+        repo.commit_sha = commit_sha
+        repo.head_sha = commit_sha
+        db.commit()
+        ic("Repository pinned to commit:", commit_sha)
+        return {
+            "message": "Repository refreshed successfully",
+            "repo_id": repo.id,
+            "url": repo.url,
+            "branch": repo.branch,
+            "previous_commit_sha": previous_sha,
+            "commit_sha": commit_sha
+        }
+    except Exception as e:
+        ic("Error refreshing repository:", str(e))
+        db.rollback()
+        raise Exception(f"Error refreshing repository: {str(e)}")
+
+
+# Record the head pushed to the branch of a listing
+ic("Defining set_repository_head function to record pushes to a listed branch")
+def set_repository_head(repo_id: int, head_sha: str) -> None:
+    """
+    Stores the latest pushed head without touching the pinned commit_sha,
+    which only moves when the seller refreshes the listing.
+    """
+    db = get_db()
+    try:
+        db.query(Repository).filter_by(id=repo_id).update({Repository.head_sha: head_sha}, synchronize_session=False)
+        db.commit()
+        ic("Listing head recorded:", repo_id, head_sha)
+    except Exception as e:
+        ic("Error recording repository head:", str(e))
+        db.rollback()
+        raise Exception(f"Error recording repository head: {str(e)}")
+
+
+# Store the push webhook registered for a listing
+ic("Defining set_repository_webhook function to store the webhook of a listing")
+def set_repository_webhook(repo_id: int, webhook_id: int, secret: str) -> None:
+    db = get_db()
+    try:
+        db.query(Repository).filter_by(id=repo_id).update({
+            Repository.webhook_id: webhook_id,
+            Repository.webhook_secret_encrypted: encrypt_token(secret)
+        }, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        ic("Error storing repository webhook:", str(e))
+        db.rollback()
+        raise Exception(f"Error storing repository webhook: {str(e)}")
+
+
+# Get the webhook of a listing with its decrypted secret
+ic("Defining get_repository_webhook function to get the webhook of a listing")
+def get_repository_webhook(repo_id: int) -> Optional[dict]:
+    db = get_db()
+    repo = db.query(Repository).filter_by(id=repo_id).first()
+    if repo is None or repo.is_transfer or not repo.webhook_secret_encrypted:
+        return None
+    return {
+        "repository_id": repo.id,
+        "uploader_id": repo.uploader_id,
+        "url": repo.url,
+        "branch": repo.branch,
+        "commit_sha": repo.commit_sha,
+        "webhook_id": repo.webhook_id,
+        "secret": decrypt_token(repo.webhook_secret_encrypted)
+    }
+
+
 # Delete a repository from the database
 ic("Defining delete_repository function to delete a repository")
 def delete_repository(repo_id: int, user_id: int):
@@ -177,8 +403,10 @@ def delete_repository(repo_id: int, user_id: int):
         if not repo:
             ic("Repository not found or does not belong to user")
             raise Exception("Repository not found or you do not have permission to delete it")
+        db.query(RepositoryManifest).filter_by(repository_id=repo_id).delete()
         db.delete(repo)
         db.commit()
+        remove_repository_index(repo_id)
         ic("Repository deleted successfully")
         return {"message": "Repository deleted successfully", "repo_id": repo_id}
     except Exception as e:
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+from server.database.config import SessionLocal
+from server.database.migrations import upgrade_schema
+from server.database.models.user import Repository  # registers the repositories table referenced by manifests
+from server.database.models.repository_manifest import (
+    RepositoryManifest, MANIFEST_PENDING, MANIFEST_READY, MANIFEST_FAILED
+)
+from server.database.queries.repository_search import index_repository
+from typing import Optional
+from icecream import ic
+ic("-- Starting repository manifest queries module --")
+upgrade_schema()
+
+# Dependency to get the database session
+ic("Defining get_db function to obtain the database session")
+def get_db():
+    db = SessionLocal()
+    try:
+        return db
+    finally:
+        db.close()
+
+
+def serialize_manifest(manifest: RepositoryManifest) -> dict:
+    return {
+        "status": manifest.status,
+        "head_sha": manifest.head_sha,
+        "file_count": manifest.file_count,
+        "total_size": manifest.total_size,
+        "tree_summary": manifest.tree_summary,
+        "languages": manifest.languages,
+        "readme_excerpt": manifest.readme_excerpt,
+        "error": manifest.error,
+        "captured_at": manifest.captured_at.isoformat() if manifest.captured_at else None
+    }
+
+
+def _get_or_create(db, repository_id: int) -> RepositoryManifest:
+    manifest = db.query(RepositoryManifest).filter_by(repository_id=repository_id).first()
+    if manifest is None:
+        manifest = RepositoryManifest(repository_id=repository_id)
+        db.add(manifest)
+    return manifest
+
+
+# Mark a repository's manifest as being captured
+ic("Defining mark_manifest_pending function to mark a manifest capture as started")
+def mark_manifest_pending(repository_id: int) -> None:
+    db = get_db()
+    try:
+        manifest = _get_or_create(db, repository_id)
+        manifest.status = MANIFEST_PENDING
+        manifest.error = None
+        db.commit()
+    except Exception as e:
+        ic("Error marking manifest as pending:", str(e))
+        db.rollback()
+        raise
+
+
+# Store a captured manifest
+ic("Defining save_repository_manifest function to store a captured manifest")
+def save_repository_manifest(repository_id: int, data: dict) -> dict:
+    db = get_db()
+    try:
+        manifest = _get_or_create(db, repository_id)
+        manifest.status = MANIFEST_READY
+        manifest.head_sha = data["head_sha"]
+        manifest.file_count = data["file_count"]
+        manifest.total_size = data["total_size"]
+        manifest.tree_summary = data["tree_summary"]
+        manifest.languages = data["languages"]
+        manifest.readme_excerpt = data["readme_excerpt"]
+        manifest.error = None
+        manifest.captured_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(manifest)
+        ic("Manifest stored for repository:", repository_id)
+    except Exception as e:
+        ic("Error storing manifest:", str(e))
+        db.rollback()
+        raise
+    try:
+        # The README excerpt is searchable
+        index_repository(repository_id)
+    except Exception as e:
+        ic("Manifest stored but not indexed for search:", repository_id, str(e))
+    return serialize_manifest(manifest)
+
+
+# Record a failed capture, keeping the previous snapshot if there is one
+ic("Defining fail_repository_manifest function to record a failed capture")
+def fail_repository_manifest(repository_id: int, error: str) -> None:
+    db = get_db()
+    try:
+        manifest = _get_or_create(db, repository_id)
+        manifest.status = MANIFEST_FAILED
+        manifest.error = error
+        db.commit()
+    except Exception as e:
+        ic("Error recording manifest failure:", str(e))
+        db.rollback()
+        raise
+
+
+# Get the manifests of several repositories in one query
+ic("Defining get_repository_manifests function to get manifests by repository ID")
+def get_repository_manifests(repository_ids: list[int]) -> dict[int, dict]:
+    if not repository_ids:
+        return {}
+    db = get_db()
+    manifests = db.query(RepositoryManifest).filter(
+        RepositoryManifest.repository_id.in_(repository_ids)
+    ).all()
+    return {manifest.repository_id: serialize_manifest(manifest) for manifest in manifests}
+
+
+# Get the manifest of one repository
+ic("Defining get_repository_manifest function to get the manifest of a repository")
+def get_repository_manifest(repository_id: int) -> Optional[dict]:
+    return get_repository_manifests([repository_id]).get(repository_id)
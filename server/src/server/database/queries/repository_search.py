@@ -0,0 +1,199 @@
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from sqlalchemy import text
+from server.config import settings
+from server.database.config import engine, SessionLocal
+from server.database.migrations import upgrade_schema, has_extension, TRIGRAM_EXPRESSION
+from server.database.models.user import User, Repository
+from server.database.models.repository_manifest import RepositoryManifest
+from server.database.models.repository_search import RepositorySearch
+from server.utils.cursor import encode_cursor, decode_cursor
+from typing import Optional
+from icecream import ic
+ic("-- Starting repository search queries module --")
+upgrade_schema()
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+# Scores are rounded so that the cursor carries them exactly
+SCORE_DECIMALS = 6
+
+
+# Dependency to get the database session
+ic("Defining get_db function to obtain the database session")
+def get_db():
+    db = SessionLocal()
+    try:
+        return db
+    finally:
+        db.close()
+
+
+def search_terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _delete_entry(db, repository_id: int) -> None:
+    db.query(RepositorySearch).filter_by(repository_id=repository_id).delete()
+    if IS_SQLITE:
+        db.execute(text("DELETE FROM repository_search_fts WHERE rowid = :id"), {"id": repository_id})
+
+
+# Add or refresh the search entry of a listing
+ic("Defining index_repository function to add a listing to the search index")
+def index_repository(repository_id: int) -> None:
+    db = get_db()
+    try:
+        row = (
+            db.query(Repository, User.username, RepositoryManifest.readme_excerpt)
+            .join(User, Repository.uploader_id == User.id)
+            .outerjoin(RepositoryManifest, RepositoryManifest.repository_id == Repository.id)
+            .filter(Repository.id == repository_id)
+            .first()
+        )
+        _delete_entry(db, repository_id)
+        if row is not None and not row[0].is_transfer:
+            repo, owner, readme_excerpt = row
+            entry = RepositorySearch(
+                repository_id=repo.id,
+                name=repo.name or "",
+                owner=owner or "",
+                description=(readme_excerpt or "")[:settings.SEARCH_DESCRIPTION_MAX_CHARS],
+                price=repo.price,
+                branch=repo.branch
+            )
+            db.add(entry)
+            if IS_SQLITE:
+                db.execute(
+                    text(
+                        "INSERT INTO repository_search_fts (rowid, name, owner, description) "
+                        "VALUES (:id, :name, :owner, :description)"
+                    ),
+                    {"id": entry.repository_id, "name": entry.name, "owner": entry.owner, "description": entry.description}
+                )
+        db.commit()
+        ic("Search index updated for repository:", repository_id)
+    except Exception as e:
+        ic("Error indexing repository:", str(e))
+        db.rollback()
+        raise
+
+
+# Remove a listing from the search index
+ic("Defining remove_repository_index function to drop a listing from the search index")
+def remove_repository_index(repository_id: int) -> None:
+    db = get_db()
+    try:
+        _delete_entry(db, repository_id)
+        db.commit()
+    except Exception as e:
+        ic("Error removing repository from the search index:", str(e))
+        db.rollback()
+        raise
+
+
+# Index every listing, e.g. after creating the index on an existing database
+ic("Defining rebuild_search_index function to index every listing")
+def rebuild_search_index() -> int:
+    db = get_db()
+    repository_ids = [
+        repository_id for (repository_id,) in
+        db.query(Repository.id).filter(Repository.is_transfer.isnot(True)).order_by(Repository.id)
+    ]
+    for repository_id in repository_ids:
+        index_repository(repository_id)
+    return len(repository_ids)
+
+
+@lru_cache(maxsize=1)
+def _trigram_available() -> bool:
+    # Without pg_trgm (see migrations.TABLE_EXTENSIONS) typos are not matched
+    return has_extension("pg_trgm")
+
+
+def _search_sql(after: Optional[dict]) -> str:
+    if IS_SQLITE:
+        # bm25 is lower for better matches; weights favour name over owner over README
+        ranked = f"""
+            SELECT s.repository_id, s.name, s.owner, s.description, s.price, s.branch,
+                   round(-bm25(repository_search_fts, 10.0, 5.0, 1.0), {SCORE_DECIMALS}) AS score
+            FROM repository_search_fts
+            JOIN repository_search s ON s.repository_id = repository_search_fts.rowid
+            WHERE repository_search_fts MATCH :match
+        """
+        score = ":score"
+    else:
+        trigram = _trigram_available()
+        similarity = f" + similarity({TRIGRAM_EXPRESSION}, :raw)" if trigram else ""
+        typos = f" OR {TRIGRAM_EXPRESSION} % :raw" if trigram else ""
+        # numeric, not real: the score in the cursor compares equal to the row's own
+        ranked = f"""
+            SELECT repository_id, name, owner, description, price, branch,
+                   round((ts_rank_cd(document, query){similarity})::numeric, {SCORE_DECIMALS}) AS score
+            FROM repository_search, to_tsquery('simple', :match) AS query
+            WHERE document @@ query{typos}
+        """
+        score = "CAST(:score AS numeric)"
+    # Keyset on (score, repository_id): later pages cost the same as the first
+    keyset = f"WHERE score < {score} OR (score = {score} AND repository_id < :id)" if after else ""
+    return f"""
+        SELECT * FROM ({ranked}) AS ranked
+        {keyset}
+        ORDER BY score DESC, repository_id DESC
+        LIMIT :limit
+    """
+
+
+def _decode_score(after: dict):
+    # Scores travel in the cursor as decimal strings, read back without rounding
+    try:
+        score = Decimal(after["score"])
+    except (InvalidOperation, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not score.is_finite():
+        raise ValueError("Invalid cursor")
+    return float(score) if IS_SQLITE else score
+
+
+# Search the listings by name, owner and README excerpt
+ic("Defining search_repositories function to search the listings")
+def search_repositories(query: str, limit: int, cursor: Optional[str] = None) -> dict:
+    """
+    Returns a page of listings ranked by relevance and the cursor of the
+    next page, None on the last page. Every term must match, as a prefix.
+    Raises ValueError if the cursor is malformed.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None and not (isinstance(after.get("score"), str) and isinstance(after.get("id"), int)):
+        raise ValueError("Invalid cursor")
+    terms = search_terms(query)
+    if not terms:
+        return {"results": [], "next_cursor": None}
+
+    if IS_SQLITE:
+        match = " ".join(f'"{term}"*' for term in terms)
+    else:
+        match = " & ".join(f"{term}:*" for term in terms)
+    params = {"match": match, "raw": " ".join(terms), "limit": limit + 1}
+    if after:
+        params.update({"score": _decode_score(after), "id": after["id"]})
+
+    db = get_db()
+    rows = db.execute(text(_search_sql(after)), params).mappings().all()
+    results = [
+        {
+            "repository_id": row["repository_id"],
+            "name": row["name"],
+            "owner": row["owner"],
+            "description": row["description"],
+            "price": row["price"],
+            "branch": row["branch"],
+            "score": float(row["score"])
+        } for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor({"score": str(last["score"]), "id": last["repository_id"]})
+    return {"results": results, "next_cursor": next_cursor}
@@ -0,0 +1,427 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, text
+from server.database.config import SessionLocal, engine
+from server.database.migrations import upgrade_schema
+from server.database.models.user import User  # registers the users table referenced by transfer_jobs
+from server.database.models.transfer_job import (
+    TransferJob, STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED
+)
+from typing import Optional
+from icecream import ic
+ic("-- Starting transfer job queries module --")
+upgrade_schema()
+
+IS_POSTGRES = engine.dialect.name == "postgresql"
+
+# Namespace of the advisory locks that serialize claims per buyer (Postgres)
+BUYER_CLAIM_LOCK = 7401
+# SQLite (local mode) runs in one process: its claims are serialized here
+_local_claim_lock = threading.Lock()
+
+# Dependency to get the database session
+ic("Defining get_db function to obtain the database session")
+def get_db():
+    db = SessionLocal()
+    try:
+        return db
+    finally:
+        db.close()
+
+
+def serialize_job(job: TransferJob) -> dict:
+    return {
+        "job_id": job.id,
+        "buyer_id": job.buyer_id,
+        "seller_id": job.seller_id,
+        "repo_name": job.repo_name,
+        "repo_url": job.repo_url,
+        "batch_id": job.batch_id,
+        "priority": job.priority,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "stage": job.stage,
+        "progress_bytes": job.progress_bytes,
+        "total_bytes": job.total_bytes,
+        "target_repo_url": job.target_repo_url,
+        "strategy": job.strategy,
+        "duration_seconds": job.duration_seconds,
+        "result": job.result,
+        "error": job.error
+    }
+
+
+# Queue a repository transfer
+ic("Defining enqueue_transfer_job function to queue a repository transfer")
+def enqueue_transfer_job(
+    buyer_id: int,
+    seller_id: int,
+    repo_name: str,
+    repo_url: str,
+    priority: int,
+    max_attempts: int = 3
+) -> dict:
+    db = get_db()
+    try:
+        job = TransferJob(
+            buyer_id=buyer_id,
+            seller_id=seller_id,
+            repo_name=repo_name,
+            repo_url=repo_url,
+            priority=priority,
+            max_attempts=max_attempts,
+            status=STATUS_QUEUED,
+            run_after=datetime.now(timezone.utc)
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        ic("Transfer job queued with ID:", job.id)
+        return serialize_job(job)
+    except Exception as e:
+        ic("Error queueing transfer job:", str(e))
+        db.rollback()
+        raise Exception(f"Error queueing transfer job: {str(e)}")
+
+
+# Queue the transfers of a cart checkout in one transaction
+ic("Defining enqueue_transfer_batch function to queue several transfers together")
+def enqueue_transfer_batch(
+    buyer_id: int,
+    items: list[dict],
+    batch_id: str,
+    priority: int,
+    max_attempts: int = 3
+) -> list[dict]:
+    """
+    Queues one job per item ({"seller_id", "repo_name", "repo_url"}).
+    A batch is only queued once: if jobs already exist for batch_id, they
+    are returned instead, so a repeated confirmation does not transfer twice.
+    """
+    db = get_db()
+    try:
+        existing = db.query(TransferJob).filter(TransferJob.batch_id == batch_id).order_by(TransferJob.id).all()
+        if existing:
+            ic("Transfer batch already queued:", batch_id)
+            return [serialize_job(job) for job in existing]
+
+        now = datetime.now(timezone.utc)
+        jobs = [
+            TransferJob(
+                buyer_id=buyer_id,
+                seller_id=item["seller_id"],
+                repo_name=item["repo_name"],
+                repo_url=item["repo_url"],
+                batch_id=batch_id,
+                priority=priority,
+                max_attempts=max_attempts,
+                status=STATUS_QUEUED,
+                run_after=now
+            ) for item in items
+        ]
+        db.add_all(jobs)
+        db.commit()
+        for job in jobs:
+            db.refresh(job)
+        ic("Transfer batch queued:", batch_id, len(jobs))
+        return [serialize_job(job) for job in jobs]
+    except Exception as e:
+        ic("Error queueing transfer batch:", str(e))
+        db.rollback()
+        raise Exception(f"Error queueing transfer batch: {str(e)}")
+
+
+def _buyer_has_capacity(db, buyer_id: int, max_running_per_buyer: int) -> bool:
+    """
+    Counts the buyer's running jobs under a per-buyer lock held until the
+    claim commits, so two workers cannot both take the buyer's last slot.
+    """
+    if IS_POSTGRES:
+        db.execute(text("SELECT pg_advisory_xact_lock(:namespace, :buyer_id)"), {
+            "namespace": BUYER_CLAIM_LOCK, "buyer_id": buyer_id
+        })
+    running = db.query(func.count(TransferJob.id)).filter(
+        TransferJob.buyer_id == buyer_id,
+        TransferJob.status == STATUS_RUNNING
+    ).scalar()
+    return running < max_running_per_buyer
+
+
+# Claim the next runnable job for a worker
+ic("Defining claim_transfer_job function to lease the next queued job")
+def claim_transfer_job(
+    worker_id: str,
+    priorities: Optional[list[int]] = None,
+    max_running_per_buyer: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Leases the highest priority runnable job. SKIP LOCKED lets several
+    workers, on any number of nodes, poll the table without blocking on, or
+    claiming, the same row. Jobs of buyers who already have
+    max_running_per_buyer jobs running are left for later, so one large
+    cart cannot occupy every worker. The busy buyers are filtered out in
+    the query, and the count is checked again under a per-buyer lock
+    (a Postgres advisory lock), so concurrent claimers never exceed it.
+    """
+    if not IS_POSTGRES:
+        with _local_claim_lock:
+            return _claim_transfer_job(worker_id, priorities, max_running_per_buyer)
+    return _claim_transfer_job(worker_id, priorities, max_running_per_buyer)
+
+
+def _claim_transfer_job(
+    worker_id: str,
+    priorities: Optional[list[int]],
+    max_running_per_buyer: Optional[int]
+) -> Optional[dict]:
+    db = get_db()
+    try:
+        now = datetime.now(timezone.utc)
+        query = db.query(TransferJob).filter(
+            TransferJob.status == STATUS_QUEUED,
+            TransferJob.run_after <= now
+        )
+        if priorities:
+            query = query.filter(TransferJob.priority.in_(priorities))
+        if max_running_per_buyer:
+            busy_buyers = (
+                select(TransferJob.buyer_id)
+                .where(TransferJob.status == STATUS_RUNNING)
+                .group_by(TransferJob.buyer_id)
+                .having(func.count(TransferJob.id) >= max_running_per_buyer)
+            )
+            query = query.filter(TransferJob.buyer_id.not_in(busy_buyers))
+        job = (
+            query.order_by(TransferJob.priority, TransferJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.rollback()
+            return None
+        if max_running_per_buyer and not _buyer_has_capacity(db, job.buyer_id, max_running_per_buyer):
+            # Another worker took the buyer's last slot since the query above
+            db.rollback()
+            return None
+        job.status = STATUS_RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.stage = None
+        job.progress_bytes = None
+        job.total_bytes = None
+        db.commit()
+        db.refresh(job)
+        return serialize_job(job)
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Mark a job as finished successfully
+ic("Defining complete_transfer_job function to store a job result")
+def complete_transfer_job(job_id: int, worker_id: str, result: dict) -> bool:
+    """
+    Stores the result of a job. Like progress updates, it only applies
+    while the worker still holds the lease; a worker whose job was requeued
+    and claimed by another cannot overwrite the new attempt.
+    Returns False when the worker no longer holds the lease.
+    """
+    db = get_db()
+    try:
+        completed = db.query(TransferJob).filter(
+            TransferJob.id == job_id,
+            TransferJob.status == STATUS_RUNNING,
+            TransferJob.locked_by == worker_id
+        ).update({
+            TransferJob.status: STATUS_SUCCEEDED,
+            TransferJob.stage: "done",
+            TransferJob.strategy: result.get("strategy"),
+            TransferJob.duration_seconds: result.get("duration_seconds"),
+            TransferJob.result: result,
+            TransferJob.error: None,
+            TransferJob.locked_by: None
+        }, synchronize_session=False)
+        db.commit()
+        return completed > 0
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Record the progress of a running job
+ic("Defining update_transfer_progress function to record the stage of a running job")
+def update_transfer_progress(job_id: int, worker_id: str, stage: str, done: int, total: Optional[int]) -> None:
+    """
+    Stores the current stage and byte counts of a job. Reporting progress
+    also renews the worker's lease; updates from a worker that lost the
+    lease are ignored.
+    """
+    db = get_db()
+    try:
+        db.query(TransferJob).filter(
+            TransferJob.id == job_id,
+            TransferJob.status == STATUS_RUNNING,
+            TransferJob.locked_by == worker_id
+        ).update({
+            TransferJob.stage: stage,
+            TransferJob.progress_bytes: done,
+            TransferJob.total_bytes: total,
+            TransferJob.locked_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Renew the lease of a running job
+ic("Defining renew_transfer_lease function to keep a running job leased")
+def renew_transfer_lease(job_id: int, worker_id: str) -> bool:
+    """
+    Heartbeat of a running job, independent of its progress.
+    Returns False when the worker no longer holds the lease.
+    """
+    db = get_db()
+    try:
+        renewed = db.query(TransferJob).filter(
+            TransferJob.id == job_id,
+            TransferJob.status == STATUS_RUNNING,
+            TransferJob.locked_by == worker_id
+        ).update({TransferJob.locked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+        db.commit()
+        return renewed > 0
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Remember the buyer's repository created for a job
+ic("Defining record_transfer_target function to store the repository created for a job")
+def record_transfer_target(job_id: int, worker_id: str, repo_url: str, strategy: Optional[str]) -> None:
+    """
+    Stores the repository created by an attempt, so that retries push into
+    it instead of creating another one.
+    """
+    db = get_db()
+    try:
+        db.query(TransferJob).filter(
+            TransferJob.id == job_id,
+            TransferJob.locked_by == worker_id
+        ).update({
+            TransferJob.target_repo_url: repo_url,
+            TransferJob.strategy: strategy
+        }, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Record a failed attempt, requeueing the job while attempts remain
+ic("Defining fail_transfer_job function to retry or fail a job")
+def fail_transfer_job(job_id: int, worker_id: str, error: str, retry_delay: int) -> Optional[dict]:
+    """
+    Records a failed attempt of the worker holding the lease. Returns the
+    updated job, or None when the worker no longer holds the lease (the job
+    was requeued, and maybe claimed by another worker).
+    """
+    db = get_db()
+    try:
+        job = (
+            db.query(TransferJob)
+            .filter(
+                TransferJob.id == job_id,
+                TransferJob.status == STATUS_RUNNING,
+                TransferJob.locked_by == worker_id
+            )
+            .with_for_update()
+            .first()
+        )
+        if job is None:
+            db.rollback()
+            return None
+        job.error = error
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            # Exponential backoff between attempts
+            delay = retry_delay * (2 ** (job.attempts - 1))
+            job.status = STATUS_QUEUED
+            job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        else:
+            job.status = STATUS_FAILED
+        db.commit()
+        db.refresh(job)
+        return serialize_job(job)
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Return jobs whose worker stopped renewing its lease to the queue
+ic("Defining requeue_stale_transfer_jobs function to recover abandoned jobs")
+def requeue_stale_transfer_jobs(lease_seconds: int) -> int:
+    db = get_db()
+    try:
+        expired = datetime.now(timezone.utc) - timedelta(seconds=lease_seconds)
+        jobs = (
+            db.query(TransferJob)
+            .filter(TransferJob.status == STATUS_RUNNING, TransferJob.locked_at < expired)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in jobs:
+            job.locked_by = None
+            job.status = STATUS_QUEUED if job.attempts < job.max_attempts else STATUS_FAILED
+            job.error = "Worker lease expired"
+        db.commit()
+        return len(jobs)
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Summarize completed transfers by strategy
+ic("Defining get_transfer_strategy_stats function to summarize transfers by strategy")
+def get_transfer_strategy_stats(since: datetime) -> dict:
+    db = get_db()
+    rows = (
+        db.query(
+            TransferJob.strategy,
+            func.count(TransferJob.id),
+            func.avg(TransferJob.duration_seconds),
+            func.sum(TransferJob.duration_seconds)
+        )
+        .filter(TransferJob.status == STATUS_SUCCEEDED, TransferJob.updated_at >= since)
+        .group_by(TransferJob.strategy)
+        .all()
+    )
+    return {
+        strategy or "unknown": {
+            "transfers": count,
+            "avg_duration_seconds": round(avg, 3) if avg is not None else None,
+            "total_duration_seconds": round(total, 3) if total is not None else None
+        } for strategy, count, avg, total in rows
+    }
+
+
+# Get the jobs of a cart checkout for the buyer that queued them
+ic("Defining get_transfer_batch function to get the jobs of a batch")
+def get_transfer_batch(batch_id: str, buyer_id: Optional[int] = None) -> list[dict]:
+    db = get_db()
+    query = db.query(TransferJob).filter(TransferJob.batch_id == batch_id)
+    if buyer_id is not None:
+        query = query.filter(TransferJob.buyer_id == buyer_id)
+    return [serialize_job(job) for job in query.order_by(TransferJob.id).all()]
+
+
+# Get a job for the buyer that queued it
+ic("Defining get_transfer_job function to get a job status")
+def get_transfer_job(job_id: int, buyer_id: Optional[int] = None) -> Optional[dict]:
+    db = get_db()
+    query = db.query(TransferJob).filter(TransferJob.id == job_id)
+    if buyer_id is not None:
+        query = query.filter(TransferJob.buyer_id == buyer_id)
+    job = query.first()
+    return serialize_job(job) if job else None
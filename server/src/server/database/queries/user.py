@@ -1,11 +1,12 @@
 from sqlalchemy.orm import Session
-from server.database.config import Base, engine, SessionLocal
+from server.database.config import SessionLocal
+from server.database.migrations import upgrade_schema
 from server.database.models.user import User
 from server.utils.security.crypt_token import encrypt_token, decrypt_token
 from typing import Optional
 from icecream import ic
 ic("-- Starting user queries module --")
-Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 # Dependency to get the database session
 ic("Defining get_db function to obtain the database session")
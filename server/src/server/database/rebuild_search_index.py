@@ -0,0 +1,9 @@
+from server.database.queries.repository_search import rebuild_search_index
+
+def rebuild_index():
+    print("Rebuilding repository search index...")
+    indexed = rebuild_search_index()
+    print(f"Search index rebuilt with {indexed} listings!")
+
+if __name__ == "__main__":
+    rebuild_index()
@@ -0,0 +1,13 @@
+import server.database.queries.repository  # noqa: F401, imports every model and upgrades their tables
+import server.database.queries.repository_search  # noqa: F401
+import server.database.queries.transfer_job  # noqa: F401
+import server.database.queries.user  # noqa: F401
+from server.database.migrations import upgrade_schema
+
+def upgrade_database():
+    print("Upgrading database schema...")
+    added = upgrade_schema(force=True)
+    print(f"Database schema is up to date! Added columns: {', '.join(added) or 'none'}")
+
+if __name__ == "__main__":
+    upgrade_database()
@@ -1,14 +1,46 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from server.middlewares import TokenRefreshMiddleware
 from dotenv import load_dotenv
 from server.config import settings
+from server.services.github_client import start_github_client, close_github_client
+from server.services.transfer_worker import start_transfer_workers, stop_transfer_workers
+from server.services.workspace import start_workspace_reaper, stop_workspace_reaper
+from server.services.highlight_service import stop_highlighter
+from server.services.github_ratelimit import RateLimitExceeded
 import os
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_github_client()
+    await start_workspace_reaper()
+    await start_transfer_workers()
+    try:
+        yield
+    finally:
+        await stop_transfer_workers()
+        await stop_workspace_reaper()
+        stop_highlighter()
+        await close_github_client()
+
+
+app = FastAPI(lifespan=lifespan)
 load_dotenv()
 
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ALLOW_ORIGINS,
@@ -30,7 +62,11 @@ from server.routers.menu.home import router as home_router
 from server.routers.auth import router as auth_router
 from server.routers.repository.repository import router as repository_router
 from server.routers.paypal.orders import router as paypal_router
+from server.routers.paypal.cart import router as cart_router
 from server.routers.github.preview import router as preview_router
+from server.routers.transfer.transfer import router as transfer_router
+from server.routers.metrics.metrics import router as metrics_router
+from server.routers.webhooks.github import router as webhooks_router
 
 routers = [
     github_router,
@@ -38,7 +74,11 @@ routers = [
     auth_router,
     repository_router,
     preview_router,
-    paypal_router
+    paypal_router,
+    cart_router,
+    transfer_router,
+    metrics_router,
+    webhooks_router
 ]
 
 for router in routers:
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, Field
 
 class UploadModel(BaseModel):
     name_repository: str
@@ -12,4 +13,25 @@ class ConfirmModel(BaseModel):
     repo_name: str
     repo_url: str
     
-    
\ No newline at end of file
+    
+
+class CartModel(BaseModel):
+    repository_ids: list[int]
+    # Idempotency key of the checkout; retries with the same key create nothing new
+    checkout_id: Optional[str] = Field(None, min_length=1, max_length=64)
+
+
+class CartConfirmModel(BaseModel):
+    order_id: str
+
+
+class BatchFileModel(BaseModel):
+    owner: str
+    repo: str
+    branch: str = "main"
+    sha: Optional[str] = None
+    paths: list[str]
+    start_line: int = Field(1, ge=1)
+    line_count: int = Field(30, ge=1)
+    render: bool = False
+    style: Optional[str] = None
@@ -1,13 +1,43 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, HTTPException, Response
 from fastapi.responses import JSONResponse
-from server.services.github_service import get_repository_tree, fetch_file_from_repository
+from server.models import BatchFileModel
+from server.services.github_service import (
+    get_repository_tree, get_repository_tree_level, get_repository_stats,
+    fetch_file_from_repository, fetch_files_from_repository
+)
+from server.services.highlight_service import HIGHLIGHT_STYLES
 from server.database.queries.user import get_token_by_user
+from server.database.queries.repository import get_listing_commit
+from server.config import settings
 
 router = APIRouter(tags=["views"])
 
+# Content addressed by a commit SHA never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def highlight_style(render: bool, style: str = None) -> str:
+    """
+    Returns the Pygments style to render previews with, None for plain text.
+    """
+    if not render:
+        return None
+    style = style or settings.HIGHLIGHT_DEFAULT_STYLE
+    if style not in HIGHLIGHT_STYLES:
+        raise HTTPException(status_code=400, detail=f"Unknown highlight style: {style}")
+    return style
+
 
 @router.get("/tree")
-async def get_repo_tree(repository: str = None, username: str = None, branch: str = "main"):
+async def get_repo_tree(
+    response: Response,
+    repository: str = None,
+    username: str = None,
+    branch: str = "main",
+    lazy: bool = False,
+    tree_sha: str = None,
+    sha: str = None
+):
     """
     🔍 Retrieves the file tree of a public or private GitHub repository.
 
@@ -15,31 +45,102 @@ async def get_repo_tree(repository: str = None, username: str = None, branch: st
         - repository (str): Repository name.
         - username (str): Repository owner's username.
         - branch (str): Branch to query (default "main").
+        - lazy (bool): Return a single directory level instead of the whole tree (default False).
+        - tree_sha (str): In lazy mode, SHA of the directory to list (default: the branch root).
+        - sha (str): Commit the listing is pinned to (default: the pinned commit of the listing, if any).
 
     Logic:
         - Looks up the user's token in the database.
+        - Without a sha, previews the commit the listing is pinned to, so buyers
+          see what they get; the branch head only for repositories not listed.
         - Uses the GitHub API to get the repository tree.
+        - Responses for a pinned commit (sha or tree_sha) are marked immutable.
+        - In lazy mode, only the requested directory is fetched; subdirectories
+          are opened with the SHA of their "tree" entries.
 
     Returns:
-        - A dictionary with the file structure of the specified repository.
+        - A dictionary with the file structure of the specified repository,
+          or of one directory level (with the resolved commit_sha at the root) in lazy mode.
     """
     github_token = get_token_by_user(username=username)
+    sha_commit = sha or get_listing_commit(username, repository, branch)
+
+    if lazy:
+        repo_tree = await get_repository_tree_level(
+            owner=username,
+            repo=repository,
+            branch=branch,
+            tree_sha=tree_sha,
+            token=github_token,
+            sha_commit=sha_commit
+        )
+    else:
+        repo_tree = await get_repository_tree(
+            owner=username,
+            repo=repository,
+            branch=branch,
+            token=github_token,
+            sha_commit=sha_commit
+        )
+
+    if repo_tree is not None and (sha or (lazy and tree_sha)):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return repo_tree
+
+
+@router.get("/stats")
+async def get_repo_stats(
+    response: Response,
+    repository: str = None,
+    username: str = None,
+    branch: str = "main",
+    sha: str = None
+):
+    """
+    📊 Summarizes what is inside a repository without walking its tree.
+
+    Parameters:
+        - repository (str): Repository name.
+        - username (str): Repository owner's username.
+        - branch (str): Branch to query (default "main").
+        - sha (str): Commit the listing is pinned to (default: the pinned commit of the listing, if any).
+
+    Logic:
+        - Looks up the owner's token in the database.
+        - Without a sha, summarizes the commit the listing is pinned to.
+        - Reads the repository tree of the commit and summarizes it with NumPy.
+        - Statistics are cached per commit SHA; responses for a pinned commit are marked immutable.
 
-    repo_tree = get_repository_tree(
+    Returns:
+        - file_count, directory_count and total_size (bytes).
+        - extensions and languages: files and bytes per extension and per language, largest first.
+        - largest_files: The largest files with their sizes.
+        - commit_sha: The summarized commit.
+    """
+    github_token = get_token_by_user(username=username)
+    stats = await get_repository_stats(
         owner=username,
         repo=repository,
         branch=branch,
-        token=github_token
+        token=github_token,
+        sha_commit=sha or get_listing_commit(username, repository, branch)
     )
-
-    return repo_tree
+    if stats is not None and sha:
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return stats
 
 
 @router.get("/file")
 async def get_file(
     path: str = Query(..., description="File path"),
     owner: str = "ExperienceV",
-    repo: str = "ChatBot-OpenAI"
+    repo: str = "ChatBot-OpenAI",
+    branch: str = "main",
+    sha: str = None,
+    start_line: int = Query(1, ge=1, description="First line of the preview"),
+    line_count: int = Query(30, ge=1, le=settings.PREVIEW_MAX_LINES, description="Number of lines in the preview"),
+    render: bool = Query(False, description="Also return the preview as highlighted HTML"),
+    style: str = Query(None, description="Pygments style of the highlighted preview")
 ):
     """
     📄 Retrieves the content of a specific file within a repository.
@@ -48,15 +149,89 @@ async def get_file(
         - path (str): File path within the repository (required).
         - owner (str): Repository owner (default "ExperienceV").
         - repo (str): Repository name (default "ChatBot-OpenAI").
+        - branch (str): Branch to read the file from (default "main").
+        - sha (str): Commit the listing is pinned to (default: the pinned commit of the listing, if any).
+        - start_line (int): First line of the preview (default 1).
+        - line_count (int): Number of lines in the preview (default 30).
+        - render (bool): Also return the preview as highlighted HTML (default False).
+        - style (str): Pygments style of the highlighted preview (default HIGHLIGHT_DEFAULT_STYLE).
 
     Logic:
         - Looks up the owner's GitHub token.
-        - Queries GitHub for the file content at the specified path.
+        - Without a sha, reads the file at the commit the listing is pinned to.
+        - Resolves the file to its blob SHA through the tree of the commit (or of the branch head).
+        - Serves the blob from the content-addressed cache, fetching it from GitHub on a miss.
+        - Large files are read with HTTP byte ranges only up to the last requested line.
+        - In rendered mode the file is highlighted in a process pool, once per
+          (blob SHA, lexer, style); later previews are sliced from the cached render.
 
     Returns:
-        - A JSON object with the file content (may be base64 encoded if binary).
+        - A JSON object with a preview of the file content and its blob SHA.
+          In rendered mode it also holds the highlighted "html" (inline styles,
+          one line per preview line), the "lexer" and the "style".
+          Previews resolved to a blob are marked immutable.
+
+    Errors:
+        - 400: If the style is not a Pygments style.
     """
+    style = highlight_style(render, style)
     token = get_token_by_user(username=owner)
-    result = await fetch_file_from_repository(owner, repo, path, token)
-    print(result)
-    return JSONResponse(content=result)
+    sha_commit = sha or get_listing_commit(owner, repo, branch)
+    result = await fetch_file_from_repository(
+        owner, repo, path, token, branch=branch, start_line=start_line, line_count=line_count, sha_commit=sha_commit,
+        style=style
+    )
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL} if sha and "sha" in result else None
+    return JSONResponse(content=result, headers=headers)
+
+
+@router.post("/files")
+async def get_files(batch: BatchFileModel):
+    """
+    📚 Retrieves previews of several files of a repository in one request.
+
+    Parameters (JSON body):
+        - owner (str): Repository owner.
+        - repo (str): Repository name.
+        - branch (str): Branch to read the files from (default "main").
+        - sha (str, optional): Commit the listing is pinned to (default: the pinned commit of the listing, if any).
+        - paths (list[str]): File paths within the repository.
+        - start_line (int): First line of each preview (default 1).
+        - line_count (int): Number of lines in each preview (default 30).
+        - render (bool): Also return the previews as highlighted HTML (default False).
+        - style (str, optional): Pygments style of the highlighted previews.
+
+    Logic:
+        - Looks up the owner's GitHub token and the listing's pinned commit once for the whole batch.
+        - Resolves the branch once and fetches cache misses concurrently, with a concurrency cap.
+
+    Returns:
+        - A JSON object mapping each path to its preview, as returned by /file.
+    """
+    if not batch.paths:
+        raise HTTPException(status_code=400, detail="No paths provided")
+    if len(batch.paths) > settings.PREVIEW_BATCH_MAX_PATHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many paths, the limit is {settings.PREVIEW_BATCH_MAX_PATHS}"
+        )
+    if batch.line_count > settings.PREVIEW_MAX_LINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"line_count cannot exceed {settings.PREVIEW_MAX_LINES}"
+        )
+    style = highlight_style(batch.render, batch.style)
+
+    token = get_token_by_user(username=batch.owner)
+    files = await fetch_files_from_repository(
+        batch.owner,
+        batch.repo,
+        batch.paths,
+        token,
+        branch=batch.branch,
+        start_line=batch.start_line,
+        line_count=batch.line_count,
+        sha_commit=batch.sha or get_listing_commit(batch.owner, batch.repo, batch.branch),
+        style=style
+    )
+    return JSONResponse(content={"files": files})
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import  JSONResponse
 from server.utils.security.modules import auth_dependency
+from server.utils.cursor import cursor_after_id, keyset_page
 from server.database.queries.user import get_user_data
 from server.database.queries.repository import get_set_repositories
+from server.config import settings
 
 router = APIRouter(tags=["menu"])
 
@@ -10,6 +12,9 @@ router = APIRouter(tags=["menu"])
 async def get_user_info(
     username: str = None,
     email: str = None, 
+    limit: int = Query(settings.LISTING_PAGE_SIZE, ge=1, le=settings.LISTING_MAX_PAGE_SIZE),
+    cursor: str = None,
+    repo_name: str = None,
     user: dict = Depends(auth_dependency)):
     """
     📋 Retrieves user profile information and their repositories.
@@ -17,12 +22,16 @@ async def get_user_info(
     Parameters:
         - username (str, optional): GitHub username. If provided, takes priority.
         - email (str, optional): User's email. Used if `username` is not provided.
+        - limit (int): Repositories per page (default LISTING_PAGE_SIZE).
+        - cursor (str, optional): next_cursor of the previous page.
+        - repo_name (str, optional): Only return the repositories with this name.
         - user (dict): Authenticated user extracted from the JWT token (default if neither `username` nor `email` is provided).
 
     Logic:
         - Looks up the user profile using `username`, `email`, or authenticated ID.
-        - Retrieves the list of repositories uploaded or transferred to the user.
-        - Classifies repositories into `uploaded` and `transferred`.
+        - Retrieves one page of the repositories uploaded or transferred to the user
+          (ordered by ID, keyset cursor), so heavy sellers cost the same as anyone else.
+        - Classifies the page into `uploaded` and `transferred`.
 
     Returns:
         - A JSON with the following structure:
@@ -31,13 +40,19 @@ async def get_user_info(
             "user": {
                 "profile": {...},                 // User profile data
                 "repositories": [...],           // Uploaded repositories
-                "transfer_repository": [...]     // Repositories transferred to the user
+                "transfer_repository": [...],    // Repositories transferred to the user
+                "next_cursor": "..."             // Cursor of the next page, null on the last page
             }
         }
         ```
-        - In case of error (user not found), returns a JSON with error details and the corresponding HTTP code.
+        - In case of error (user not found, malformed cursor), returns a JSON with error details and the corresponding HTTP code.
     """
     try:
+        try:
+            after_id = cursor_after_id(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Get profile
         if username:
             data_profile = get_user_data(username=username)
@@ -49,16 +64,16 @@ async def get_user_info(
         if not data_profile:
             raise HTTPException(status_code=404, detail="User not found.")
 
-        # Get uploaded (and transferred) repositories for the user
+        # Get one page of the uploaded (and transferred) repositories, plus one row to know if there is another
+        fetch = {"limit": limit + 1, "after_id": after_id, "repo_name": repo_name}
         if username:
-            all_repos = get_set_repositories(user_name=username)
+            all_repos = get_set_repositories(user_name=username, **fetch)
         elif email:
-            all_repos = get_set_repositories(user_email=email)
+            all_repos = get_set_repositories(user_email=email, **fetch)
         else:
-            all_repos = get_set_repositories(user_id=user.get("id"))
+            all_repos = get_set_repositories(user_id=user.get("id"), **fetch)
 
-        if not all_repos:
-            all_repos = []
+        all_repos, next_cursor = keyset_page(all_repos, limit)
 
         # Separate uploaded vs transferred
         uploaded = []
@@ -76,7 +91,8 @@ async def get_user_info(
         user_info = {
             "profile": data_profile,
             "repositories": uploaded,
-            "transfer_repository": transferred
+            "transfer_repository": transferred,
+            "next_cursor": next_cursor
         }
 
         return {"user": user_info}
@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Query
+from server.services.github_cache import github_cache
+from server.services.tree_store import tree_store
+from server.services.blob_cache import blob_cache
+from server.services.highlight_service import rendered_cache
+from server.services.archive_store import archive_store
+from server.services.github_ratelimit import rate_limiter
+from server.services.workspace import workspace_manager
+from server.database.queries.transfer_job import get_transfer_strategy_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/caches")
+async def cache_metrics() -> dict:
+    """
+    📈 Reports the size and hit/miss counters of the GitHub caches and the
+    state of the rate-limit scheduler.
+
+    Returns:
+        - github_etag: Conditional-request cache of GitHub API reads.
+        - tree_store: Persistent commit-keyed repository tree store.
+        - blob_cache: Content-addressed cache of previewed files.
+        - rendered_cache: Highlighted previews keyed by blob SHA, lexer and style.
+        - archive_store: On-disk zipballs of pinned commits, shared by transfers.
+        - rate_limit: Tracked tokens, tokens low on budget, shed and delayed requests.
+        - workspaces: Transfer workspaces in use, reserved and used bytes against the quota.
+    """
+    return {
+        "github_etag": github_cache.stats(),
+        "tree_store": await asyncio.to_thread(tree_store.stats),
+        "blob_cache": blob_cache.stats(),
+        "rendered_cache": rendered_cache.stats(),
+        "archive_store": await asyncio.to_thread(archive_store.stats),
+        "rate_limit": rate_limiter.stats(),
+        "workspaces": await asyncio.to_thread(workspace_manager.stats)
+    }
+
+
+@router.get("/transfers")
+async def transfer_metrics(days: int = Query(7, ge=1, le=365)) -> dict:
+    """
+    📈 Reports completed transfers per strategy over the last `days` days.
+
+    Returns:
+        - strategies: For each strategy ("template", "mirror", "packfile", "archive"),
+          the number of transfers and their average and total duration in seconds.
+          Template transfers are copied by GitHub and move no bytes through the workers.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return {"days": days, "strategies": await asyncio.to_thread(get_transfer_strategy_stats, since)}
@@ -0,0 +1,219 @@
+import hashlib
+import httpx
+from icecream import ic
+from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import RedirectResponse, JSONResponse
+from server.models import CartModel, CartConfirmModel
+from server.services.paypal_service import create_cart_order, capture_order
+from server.utils.security.modules import auth_dependency
+from server.config import settings
+from server.database.models.transfer_job import PRIORITY_PAID, PRIORITY_FREE
+from server.database.queries.repository import get_repositories_by_ids
+from server.database.queries.transfer_job import enqueue_transfer_batch, get_transfer_batch
+
+router = APIRouter(prefix="/cart", tags=["paypal"])
+
+
+def _job_items(listings: list[dict]) -> list[dict]:
+    return [
+        {"seller_id": listing["uploader_id"], "repo_name": listing["name"], "repo_url": listing["url"]}
+        for listing in listings
+    ]
+
+
+def _checkout_key(user_id: int, cart: CartModel, repository_ids: list[int]) -> str:
+    """
+    Identifies a checkout: the client's checkout_id, or the buyer and the
+    set of listings in the cart.
+    """
+    key = cart.checkout_id or ",".join(str(repo_id) for repo_id in sorted(repository_ids))
+    return hashlib.sha256(f"{user_id}:{key}".encode()).hexdigest()[:32]
+
+
+def _batch_report(jobs: list[dict]) -> list[dict]:
+    return [
+        {
+            "repo_name": job["repo_name"],
+            "repo_url": job["repo_url"],
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "result": job["result"],
+            "error": job["error"]
+        } for job in jobs
+    ]
+
+
+@router.post("/checkout")
+async def cart_checkout(
+    cart: CartModel,
+    user: dict = Depends(auth_dependency)
+):
+    """
+    🛒 Checks out several repositories with a single PayPal order.
+
+    Parameters (JSON body):
+        - repository_ids (list[int]): IDs of the listings to buy.
+        - checkout_id (str, optional): Idempotency key of the checkout (default: the buyer and the cart's listings).
+        - user (dict): Authenticated user (extracted from JWT token).
+
+    Logic:
+        - Loads the listings; prices and sellers come from the database, not the client.
+        - Creates one PayPal order with a purchase unit per paid listing first,
+          so nothing is transferred when PayPal fails.
+        - Then queues the free listings for transfer in the free lane.
+        - Idempotent per checkout: a retry gets the same PayPal order (PayPal-Request-Id)
+          and the same free batch instead of new ones.
+
+    Returns:
+        - approval_url and order_id of the PayPal order (null when the cart is free).
+        - free_batch_id and the transfer jobs of the free listings.
+    Errors:
+        - HTTPException 400 if the cart is empty, too large, or contains the buyer's own listings.
+        - HTTPException 404 if a listing does not exist.
+        - HTTPException 502 if PayPal rejects the order.
+    """
+    repository_ids = list(dict.fromkeys(cart.repository_ids))
+    if not repository_ids:
+        raise HTTPException(status_code=400, detail="The cart is empty")
+    if len(repository_ids) > settings.CART_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items, the limit is {settings.CART_MAX_ITEMS}")
+
+    listings = get_repositories_by_ids(repository_ids)
+    found = {listing["repository_id"] for listing in listings}
+    missing = [repo_id for repo_id in repository_ids if repo_id not in found]
+    if missing or any(listing["is_transfer"] for listing in listings):
+        raise HTTPException(status_code=404, detail=f"Listings not found: {missing}")
+    if any(listing["uploader_id"] == user["id"] for listing in listings):
+        raise HTTPException(status_code=400, detail="You cannot buy your own repositories")
+
+    free = [listing for listing in listings if not listing["price"]]
+    paid = [listing for listing in listings if listing["price"]]
+
+    checkout_key = _checkout_key(user["id"], cart, repository_ids)
+
+    order_id = None
+    approval_url = None
+    if paid:
+        try:
+            order = await create_cart_order(paid, buyer_id=user["id"], request_id=f"cart-{checkout_key}")
+        except httpx.HTTPError as e:
+            ic("Error creating cart order:", str(e))
+            raise HTTPException(status_code=502, detail="Could not create the PayPal order")
+        order_id = order.get("id")
+        approval_url = next(
+            (link["href"] for link in order.get("links", []) if link["rel"] in ("approve", "payer-action")),
+            None
+        )
+        if not order_id or not approval_url:
+            ic("Approval link not found in PayPal response:", order)
+            raise HTTPException(status_code=502, detail="Approval link not found in PayPal response")
+
+    free_batch_id = None
+    free_jobs = []
+    if free:
+        # Queued once per checkout: a repeated checkout returns the same jobs
+        free_batch_id = f"free:{checkout_key}"
+        free_jobs = enqueue_transfer_batch(
+            buyer_id=user["id"],
+            items=_job_items(free),
+            batch_id=free_batch_id,
+            priority=PRIORITY_FREE,
+            max_attempts=settings.TRANSFER_MAX_ATTEMPTS
+        )
+
+    return JSONResponse(
+        status_code=202 if free_jobs and not paid else 200,
+        content={
+            "order_id": order_id,
+            "approval_url": approval_url,
+            "free_batch_id": free_batch_id,
+            "free_items": _batch_report(free_jobs)
+        }
+    )
+
+
+@router.get("/success")
+async def cart_success(request: Request):
+    """
+    ✅ Handles the PayPal callback after a cart order is approved.
+
+    Logic:
+        - Redirects to the frontend with the approved order ID, which is
+          then confirmed with /cart/confirm.
+
+    Returns:
+        - RedirectResponse: Redirects to the frontend with the order ID or an error.
+    """
+    order_id = request.query_params.get("token")
+    if not order_id or not request.query_params.get("PayerID"):
+        return RedirectResponse(f"{settings.FRONTEND_URL}/success?error=Missing required PayPal parameters")
+    return RedirectResponse(f"{settings.FRONTEND_URL}/success?order_id={order_id}")
+
+
+@router.post("/confirm")
+async def cart_confirm(
+    confirm: CartConfirmModel,
+    user: dict = Depends(auth_dependency)
+):
+    """
+    📋 Captures an approved cart order once and queues all of its transfers.
+
+    Parameters (JSON body):
+        - order_id (str): Approved PayPal order ID.
+        - user (dict): Authenticated user (JWT token).
+
+    Logic:
+        - A cart that was already confirmed is reported again without capturing twice.
+        - Captures every purchase unit of the order in a single PayPal call.
+        - Queues one paid-lane job per captured unit, sharing the batch ID "paypal:<order_id>".
+          Workers run them concurrently, at most TRANSFER_MAX_RUNNING_PER_BUYER at a time per buyer.
+
+    Returns:
+        - JSONResponse (202): batch_id, per-item transfer jobs and the units that were not captured.
+    Errors:
+        - HTTPException 502 if the capture fails.
+    """
+    batch_id = f"paypal:{confirm.order_id}"
+    existing = get_transfer_batch(batch_id, buyer_id=user["id"])
+    if existing:
+        return JSONResponse(
+            status_code=202,
+            content={"status": "captured", "batch_id": batch_id, "items": _batch_report(existing), "failed_items": []}
+        )
+
+    try:
+        result = await capture_order(confirm.order_id)
+    except httpx.HTTPError as e:
+        ic("Error capturing cart order:", str(e))
+        raise HTTPException(status_code=502, detail="Error capturing the PayPal order")
+
+    captured_ids = []
+    failed_items = []
+    for unit in result.get("purchase_units", []):
+        captures = unit.get("payments", {}).get("captures", [])
+        capture = captures[0] if captures else {}
+        repository_id = unit.get("reference_id", "")
+        buyer_id = capture.get("custom_id") or unit.get("custom_id")
+        if capture.get("status") == "COMPLETED" and buyer_id == str(user["id"]) and repository_id.isdigit():
+            captured_ids.append(int(repository_id))
+        else:
+            failed_items.append({"repository_id": repository_id, "status": capture.get("status")})
+
+    listings = get_repositories_by_ids(captured_ids)
+    jobs = enqueue_transfer_batch(
+        buyer_id=user["id"],
+        items=_job_items(listings),
+        batch_id=batch_id,
+        priority=PRIORITY_PAID,
+        max_attempts=settings.TRANSFER_MAX_ATTEMPTS
+    ) if listings else []
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": result.get("status", "captured").lower(),
+            "batch_id": batch_id,
+            "items": _batch_report(jobs),
+            "failed_items": failed_items
+        }
+    )
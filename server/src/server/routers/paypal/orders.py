@@ -3,7 +3,8 @@ from server.services.paypal_service import create_order, capture_authorization,
 from server.utils.security.modules import auth_dependency
 from fastapi.responses import RedirectResponse, JSONResponse
 from server.config import settings
-from server.services.github_service import transfer_repository
+from server.database.models.transfer_job import PRIORITY_PAID, PRIORITY_FREE
+from server.database.queries.transfer_job import enqueue_transfer_job
 
 router = APIRouter(tags=["paypal"])
 
@@ -26,25 +27,33 @@ async def create_payment(
         - user (dict): Authenticated user (extracted from JWT token).
 
     Logic:
+        - Free repositories are queued for transfer in the free lane.
         - Creates a PayPal order with product and amount data.
         - Gets the approval link for the user to confirm payment.
         - If it fails, redirects to an error page.
 
     Returns:
+        - JSONResponse (202): Transfer job ID for free repositories.
         - RedirectResponse: Redirects to PayPal approval URL or error page in the frontend.
     """
     print("Checking if repository is free or paid")
     if not repo_price:
-        response_transfer = await transfer_repository(
-            user=user,
-            seller_id=seller_id,
+        job = enqueue_transfer_job(
+            buyer_id=user["id"],
+            seller_id=int(seller_id),
             repo_name=repo_name,
-            repo_url=repo_url
+            repo_url=repo_url,
+            priority=PRIORITY_FREE,
+            max_attempts=settings.TRANSFER_MAX_ATTEMPTS
         )
-        response_transfer["repo_name"] = repo_name
         return JSONResponse(
-            content=response_transfer,
-            status_code=200
+            content={
+                "message": "Repository transfer queued",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "repo_name": repo_name
+            },
+            status_code=202
         )
     print("\n=== STARTING PAYMENT ORDER CREATION ===")
     print(f"Repository: {repo_name}")
@@ -150,7 +159,7 @@ async def confirm(
     user: dict = Depends(auth_dependency)
     ):
     """
-    📋 Captures the payment authorization and transfers the repository.
+    📋 Captures the payment authorization and queues the repository transfer.
 
     Parameters (form data):
         - authorization_id (str): PayPal authorization ID.
@@ -161,10 +170,10 @@ async def confirm(
 
     Logic:
         - Captures the payment authorization in PayPal.
-        - Executes the logic to transfer the repository to the buyer.
+        - Queues the transfer to the buyer in the paid lane; a worker runs it.
 
     Returns:
-        - dict: Capture status and PayPal response.
+        - JSONResponse (202): Capture status, PayPal response and transfer job ID.
     Errors:
         - HTTPException 400 if authorization_id is missing.
         - HTTPException 500 if payment capture fails.
@@ -181,19 +190,23 @@ async def confirm(
     except Exception as e: 
         raise HTTPException(status_code=500, detail=f"Error capturing: {str(e)}")
     try:
-        seller_id = int(seller_id)
-        transfer_response = await transfer_repository(
-            user=user,
-            seller_id=seller_id,
+        job = enqueue_transfer_job(
+            buyer_id=user["id"],
+            seller_id=int(seller_id),
             repo_name=repo_name,
-            repo_url=repo_url
+            repo_url=repo_url,
+            priority=PRIORITY_PAID,
+            max_attempts=settings.TRANSFER_MAX_ATTEMPTS
         )
-        print(transfer_response)
-        return {"status": "captured", "paypal_response": result}
-    except HTTPException as http_exc:
+        print(job)
+        return JSONResponse(
+            status_code=202,
+            content={"status": "captured", "paypal_response": result, "job_id": job["job_id"]}
+        )
+    except Exception as e:
         return JSONResponse(
-            status_code=http_exc.status_code,
-            content={"detail": http_exc.detail}
+            status_code=500,
+            content={"detail": f"Error queueing transfer: {str(e)}"}
         )
 
 
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import httpx
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from server.utils.security.modules import auth_dependency
 from fastapi.responses import JSONResponse
 from server.models import UploadModel
 from server.database.queries.user import get_token_by_user
-from server.database.queries.repository import set_repository, get_set_repositories, delete_repository
-from server.services.github_service import list_github_repositories
+from server.database.queries.repository import (
+    set_repository, get_set_repositories, get_repositories_by_ids, set_repository_commit, delete_repository,
+    get_repository_webhook
+)
+from server.services.github_service import (
+    list_github_repositories, list_github_repositories_page, resolve_branch_sha,
+    register_listing_webhook, delete_listing_webhook
+)
+from server.services.github_ratelimit import PRIORITY_INTERACTIVE
+from server.utils.functions import github_parse_url
+from server.services.manifest_service import capture_repository_manifest
+from server.database.queries.repository_search import search_repositories
+from server.database.queries.repository_manifest import get_repository_manifest
+from server.utils.cursor import cursor_after_id, keyset_page
+from server.config import settings
 
 router = APIRouter(tags=["repository"])
 
@@ -34,7 +48,7 @@ async def github_repositories(user: dict = Depends(auth_dependency)) -> list:
         github_token = get_token_by_user(username=name)
 
         # get repository information with token
-        repositories = list_github_repositories(
+        repositories = await list_github_repositories(
             access_token=github_token
             )
         
@@ -55,9 +69,53 @@ async def github_repositories(user: dict = Depends(auth_dependency)) -> list:
         )
 
 
+@router.get("/get_github_repositories/paginated")
+async def github_repositories_paginated(
+    cursor: str = "1",
+    user: dict = Depends(auth_dependency)
+) -> dict:
+    """
+    📋 Retrieves one page of the authenticated user's GitHub repositories.
+
+    Parameters:
+        - cursor (str): Cursor returned as next_cursor by the previous page (default: first page).
+        - user (dict): Authenticated user extracted from the JWT token.
+
+    Logic:
+        - Gets the GitHub token from the database.
+        - Fetches a single page of up to 100 repositories.
+
+    Returns:
+        - {"repositories": [...], "next_cursor": "..."}; next_cursor is null on the last page.
+        - HTTPException 400 if the cursor is invalid.
+    """
+    if not cursor.isdigit() or int(cursor) < 1:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    github_token = get_token_by_user(username=user.get("name"))
+    return await list_github_repositories_page(access_token=github_token, page=int(cursor))
+
+
+async def resolve_listing_commit(repo_url: str, branch: str, token: str) -> str:
+    """
+    Resolve the head commit of a listed branch, which the listing is pinned to.
+    """
+    try:
+        owner, repo = github_parse_url(repo_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await resolve_branch_sha(owner, repo, branch, token, PRIORITY_INTERACTIVE)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=400, detail=f"Branch '{branch}' not found in {owner}/{repo}")
+        raise HTTPException(status_code=502, detail=f"GitHub error {e.response.status_code}")
+
+
 @router.post("/upload_repository")
 async def upload_repository(
     up_model: UploadModel,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(auth_dependency)
 ) -> dict:
     """
@@ -65,15 +123,20 @@ async def upload_repository(
 
     Parameters:
         - up_model (UploadModel): Model with repository data (name, URL, branch).
+        - background_tasks (BackgroundTasks): Runs the manifest capture after the response.
         - user (dict): Authenticated user extracted from the JWT token.
 
     Logic:
         - Extracts the user's ID and name.
+        - Resolves the head commit of the branch; the listing is pinned to it.
         - Registers the repository with the provided data.
+        - Schedules the capture of the listing manifest (tree summary, size, languages, README excerpt, head SHA).
+        - Schedules the registration of a push webhook with its own secret on the seller's repository.
         - Returns the registration response or an error if it fails.
 
     Returns:
-        - Response with registered repository information.
+        - Response with registered repository information, including the pinned commit_sha.
+        - HTTPException 400 if the URL or branch is invalid.
         - In case of error, returns a JSON message and 500 code.
     """
     try:
@@ -83,13 +146,18 @@ async def upload_repository(
         # get ID from user
         user_id = user.get("id")
 
+        # Pin the listing to the current head of the branch
+        github_token = get_token_by_user(user_id=user_id)
+        commit_sha = await resolve_listing_commit(up_model.url_repository, up_model.branch, github_token)
+
         # Upload the repository using the service
         response = set_repository(
             user_id=user_id,     
             price=up_model.price,
             name_repository=up_model.name_repository,
             url_repository=up_model.url_repository,
-            branch=up_model.branch
+            branch=up_model.branch,
+            commit_sha=commit_sha
         )
 
         if not response:
@@ -97,6 +165,23 @@ async def upload_repository(
                 status_code=500,
                 content={"message": "Something went wrong..."}
             )
+
+        # Capture the listing manifest once, so listings need no GitHub calls
+        background_tasks.add_task(
+            capture_repository_manifest,
+            repository_id=response["repo_id"],
+            uploader_id=user_id,
+            repo_url=up_model.url_repository,
+            branch=up_model.branch,
+            sha_commit=commit_sha
+        )
+        # Pushes to the branch are reported to this listing's own webhook
+        background_tasks.add_task(
+            register_listing_webhook,
+            repository_id=response["repo_id"],
+            uploader_id=user_id,
+            repo_url=up_model.url_repository
+        )
         return response
     except HTTPException as http_exc:
         raise HTTPException(
@@ -105,39 +190,87 @@ async def upload_repository(
         )
 
 
+@router.get("/search_repositories")
+async def search_listed_repositories(
+    q: str = Query(..., min_length=1, description="Search terms"),
+    limit: int = Query(settings.SEARCH_PAGE_SIZE, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    cursor: str = None
+) -> dict:
+    """
+    🔎 Searches the marketplace listings by repository name, owner username and README excerpt.
+
+    Parameters:
+        - q (str): Search terms; every term must match, as a word prefix.
+        - limit (int): Results per page (default SEARCH_PAGE_SIZE).
+        - cursor (str, optional): next_cursor of the previous page.
+
+    Logic:
+        - Queries the full-text index (tsvector and trigram indexes on Postgres, FTS5 on SQLite),
+          never the repositories table itself.
+        - Ranks matches in the name above the owner and the README, with typo-tolerant name matches on Postgres.
+        - Pages with a keyset cursor on (rank, repository ID), so later pages cost the same as the first.
+
+    Returns:
+        - results: Listings with repository_id, name, owner, description, price, branch and score.
+        - next_cursor: Cursor of the next page, null on the last page.
+
+    Errors:
+        - 400: If the cursor is malformed.
+    """
+    try:
+        return search_repositories(q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/get_uploaded_repositories")
 async def get_uploaded_repositories(
+    limit: int = Query(settings.LISTING_PAGE_SIZE, ge=1, le=settings.LISTING_MAX_PAGE_SIZE),
+    cursor: str = None,
     user: dict = Depends(auth_dependency)
-) -> list:
+) -> dict:
     """
-    📋 Retrieves the list of repositories uploaded (registered) by the authenticated user.
+    📋 Retrieves the repositories uploaded (registered) by the authenticated user, a page at a time.
 
     Parameters:
+        - limit (int): Repositories per page (default LISTING_PAGE_SIZE).
+        - cursor (str, optional): next_cursor of the previous page.
         - user (dict): Authenticated user extracted from the JWT token.
 
     Logic:
         - Extracts the user's ID.
-        - Queries the database for repositories uploaded by the user.
-        - Returns the list or a message if no repositories exist.
+        - Queries one page of the user's repositories, ordered by ID, with a keyset cursor.
+        - Returns the page or a message if the user has no repositories.
 
     Returns:
-        - List of registered repositories.
+        - repositories: The page of registered repositories, each with the manifest captured at upload (null until captured).
+        - next_cursor: Cursor of the next page, null on the last page.
         - If no repositories are found, returns a JSON message and 404 code.
+
+    Errors:
+        - 400: If the cursor is malformed.
     """
     try:
         # get ID from user
         user_id = user.get("id")
 
-        # Get the uploaded repositories using the service
-        repositories = get_set_repositories(user_id)
+        try:
+            after_id = cursor_after_id(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        if not repositories:
+        # Get one page of uploaded repositories, plus one row to know if there is another
+        repositories, next_cursor = keyset_page(
+            get_set_repositories(user_id, limit=limit + 1, after_id=after_id), limit
+        )
+
+        if not repositories and after_id is None:
             return JSONResponse(
                 status_code=404,
                 content={"message": "No uploaded repositories found."}
             )
 
-        return repositories
+        return {"repositories": repositories, "next_cursor": next_cursor}
     except HTTPException as http_exc:
         raise HTTPException(
             status_code=http_exc.status_code,
@@ -145,9 +278,66 @@ async def get_uploaded_repositories(
         )
 
 
+@router.post("/refresh_repository/{repo_id}")
+async def refresh_repository(
+    repo_id: int,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(auth_dependency)
+) -> dict:
+    """
+    🔄 Re-pins a listed repository to the current head of its branch.
+
+    Parameters:
+        - repo_id (int): ID of the repository to refresh.
+        - background_tasks (BackgroundTasks): Runs the manifest capture after the response.
+        - user (dict): Authenticated user extracted from the JWT token.
+
+    Logic:
+        - Verifies that the user is the owner of the repository.
+        - Resolves the head commit of the listed branch and pins the listing to it.
+        - Schedules a new manifest capture if the commit changed.
+        - Registers the listing's push webhook if it has none yet (listings created before webhooks).
+
+    Returns:
+        - Response with the previous and the new commit_sha.
+        - HTTPException 404 if the repository does not exist or is not owned by the user.
+    """
+    user_id = user.get("id")
+    listing = next(iter(get_repositories_by_ids([repo_id])), None)
+    if listing is None or listing["uploader_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Repository not found")
+
+    github_token = get_token_by_user(user_id=user_id)
+    commit_sha = await resolve_listing_commit(listing["url"], listing["branch"], github_token)
+
+    try:
+        response = set_repository_commit(repo_id=repo_id, user_id=user_id, commit_sha=commit_sha)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if response["previous_commit_sha"] != commit_sha or not get_repository_manifest(repo_id):
+        background_tasks.add_task(
+            capture_repository_manifest,
+            repository_id=repo_id,
+            uploader_id=user_id,
+            repo_url=listing["url"],
+            branch=listing["branch"],
+            sha_commit=commit_sha
+        )
+    if get_repository_webhook(repo_id) is None:
+        background_tasks.add_task(
+            register_listing_webhook,
+            repository_id=repo_id,
+            uploader_id=user_id,
+            repo_url=listing["url"]
+        )
+    return response
+
+
 @router.delete("/delete_repository/{repo_id}")
 async def delete_repository_endpoint(
     repo_id: int,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(auth_dependency)
 ) -> dict:
     """
@@ -155,11 +345,13 @@ async def delete_repository_endpoint(
 
     Parameters:
         - repo_id (int): ID of the repository to delete.
+        - background_tasks (BackgroundTasks): Removes the listing's webhook after the response.
         - user (dict): Authenticated user extracted from the JWT token.
 
     Logic:
         - Verifies that the user is the owner of the repository.
         - Deletes the repository if verification is successful.
+        - Schedules the removal of its push webhook from the seller's repository.
         - Returns the deletion response.
 
     Returns:
@@ -171,7 +363,15 @@ async def delete_repository_endpoint(
         user_id = user.get("id")
 
         # Delete the repository
+        webhook = get_repository_webhook(repo_id)
         response = delete_repository(repo_id=repo_id, user_id=user_id)
+        if webhook and webhook["webhook_id"]:
+            background_tasks.add_task(
+                delete_listing_webhook,
+                uploader_id=user_id,
+                repo_url=webhook["url"],
+                webhook_id=webhook["webhook_id"]
+            )
 
         return response
     except Exception as e:
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from server.config import settings
+from server.utils.security.modules import auth_dependency
+from server.database.models.transfer_job import STATUS_SUCCEEDED, STATUS_FAILED
+from server.database.queries.transfer_job import get_transfer_job, get_transfer_batch
+
+router = APIRouter(prefix="/transfer", tags=["transfer"])
+
+
+@router.get("/batch/{batch_id}")
+async def transfer_batch_status(
+    batch_id: str,
+    user: dict = Depends(auth_dependency)
+) -> dict:
+    """
+    🔄 Retrieves the status of every transfer queued by one cart checkout.
+
+    Parameters:
+        - batch_id (str): Batch ID returned by /cart/checkout or /cart/confirm.
+        - user (dict): Authenticated user extracted from the JWT token.
+
+    Returns:
+        - The batch ID, a per-status count and the jobs of the batch.
+        - HTTPException 404 if the batch does not exist for the buyer.
+    """
+    jobs = get_transfer_batch(batch_id, buyer_id=user.get("id"))
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Transfer batch not found")
+    counts = {}
+    for job in jobs:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    return {"batch_id": batch_id, "counts": counts, "jobs": jobs}
+
+
+def _progress_event(job: dict) -> dict:
+    return {
+        key: job[key]
+        for key in ("job_id", "status", "stage", "progress_bytes", "total_bytes", "attempts", "error", "result")
+    }
+
+
+@router.get("/{job_id}/events")
+async def transfer_events(
+    job_id: int,
+    request: Request,
+    user: dict = Depends(auth_dependency)
+) -> StreamingResponse:
+    """
+    📡 Streams the progress of a transfer as server-sent events.
+
+    Parameters:
+        - job_id (int): Transfer job ID returned by /create-order, /confirm or /cart/confirm.
+        - request (Request): Used to stop streaming when the client disconnects.
+        - user (dict): Authenticated user extracted from the JWT token.
+
+    Logic:
+        - Checks the job every TRANSFER_EVENTS_POLL_INTERVAL seconds and sends a
+          "progress" event whenever its status, stage or byte counts change.
+        - Sends a keepalive comment when nothing changed for TRANSFER_EVENTS_KEEPALIVE seconds.
+        - Ends with a "done" event once the job succeeded or failed for good.
+
+    Returns:
+        - text/event-stream with "progress" and "done" events; data is the job's
+          status, stage (downloading, extracting, creating_repo, pushing, saving, done),
+          progress_bytes, total_bytes, attempts, error and result.
+        - HTTPException 404 if the job does not exist.
+    """
+    buyer_id = user.get("id")
+    job = get_transfer_job(job_id, buyer_id=buyer_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Transfer job not found")
+
+    async def stream():
+        nonlocal job
+        last_event = None
+        last_sent = time.monotonic()
+        while True:
+            event = _progress_event(job)
+            if event != last_event:
+                finished = job["status"] in (STATUS_SUCCEEDED, STATUS_FAILED)
+                name = "done" if finished else "progress"
+                yield f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+                if finished:
+                    return
+                last_event = event
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= settings.TRANSFER_EVENTS_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+
+            await asyncio.sleep(settings.TRANSFER_EVENTS_POLL_INTERVAL)
+            if await request.is_disconnected():
+                return
+            job = await asyncio.to_thread(get_transfer_job, job_id, buyer_id) or job
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{job_id}")
+async def transfer_status(
+    job_id: int,
+    user: dict = Depends(auth_dependency)
+) -> dict:
+    """
+    🔄 Retrieves the status of a queued repository transfer.
+
+    Parameters:
+        - job_id (int): Transfer job ID returned by /create-order or /confirm.
+        - user (dict): Authenticated user extracted from the JWT token.
+
+    Logic:
+        - Looks up the job, only if it belongs to the authenticated buyer.
+
+    Returns:
+        - Job status ("queued", "running", "succeeded" or "failed"), attempts,
+          result of the transfer and last error.
+        - HTTPException 404 if the job does not exist.
+    """
+    job = get_transfer_job(job_id, buyer_id=user.get("id"))
+    if not job:
+        raise HTTPException(status_code=404, detail="Transfer job not found")
+    return job
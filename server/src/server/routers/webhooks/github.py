@@ -0,0 +1,83 @@
+import json
+from fastapi import APIRouter, Header, HTTPException, Request
+from typing import Optional
+from icecream import ic
+from server.utils.functions import github_parse_url
+from server.utils.security.webhook import verify_github_signature
+from server.database.queries.repository import get_repository_webhook, set_repository_head
+from server.services.github_service import invalidate_repository_caches
+
+router = APIRouter(tags=["webhooks"])
+
+# "after" of a push that deleted the branch
+NULL_SHA = "0" * 40
+
+
+@router.post("/webhooks/github/{repo_id}")
+async def github_webhook(
+    repo_id: int,
+    request: Request,
+    x_github_event: Optional[str] = Header(None),
+    x_hub_signature_256: Optional[str] = Header(None)
+) -> dict:
+    """
+    🪝 Receives GitHub webhook deliveries for one listed repository.
+
+    Parameters:
+        - repo_id (int): Listing the webhook was registered for.
+        - request (Request): Raw delivery; its body is checked against the signature.
+        - x_github_event (str): Event name sent by GitHub (ping, push, ...).
+        - x_hub_signature_256 (str): HMAC-SHA256 of the body with the listing's own webhook secret.
+
+    Logic:
+        - Rejects deliveries whose signature does not match the secret of this listing.
+        - Ignores pushes to other repositories or branches than the listed ones.
+        - On a push to the listed branch, evicts the cached responses, trees and path indexes of the repository.
+        - Records the pushed head as head_sha; the pinned commit_sha only moves on /refresh_repository.
+        - Other events are acknowledged and ignored.
+
+    Returns:
+        - A JSON with the event, the pushed head and the commit the listing stays pinned to.
+        - HTTPException 401 if the listing has no webhook or the signature is missing or invalid.
+    """
+    body = await request.body()
+    webhook = get_repository_webhook(repo_id)
+    if webhook is None or not verify_github_signature(body, x_hub_signature_256, webhook["secret"]):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    if x_github_event == "ping":
+        return {"event": "ping", "message": "pong"}
+    if x_github_event != "push":
+        return {"event": x_github_event, "message": "ignored"}
+
+    ref = payload.get("ref", "")
+    repository = payload.get("repository") or {}
+    full_name = repository.get("full_name", "")
+    owner, repo = github_parse_url(webhook["url"])
+    repo = repo.removesuffix(".git")
+    if ref != f"refs/heads/{webhook['branch']}" or full_name.lower() != f"{owner}/{repo}".lower():
+        return {"event": "push", "message": "ignored"}
+
+    owner, repo = full_name.split("/", 1)
+    branch = webhook["branch"]
+    head_sha = payload.get("after")
+    ic("Push received:", repo_id, full_name, branch, head_sha)
+
+    evicted = await invalidate_repository_caches(owner, repo)
+    if head_sha and head_sha != NULL_SHA:
+        set_repository_head(repo_id, head_sha)
+
+    return {
+        "event": "push",
+        "repository_id": repo_id,
+        "repository": full_name,
+        "branch": branch,
+        "head_sha": head_sha,
+        "commit_sha": webhook["commit_sha"],
+        "evicted": evicted
+    }
@@ -0,0 +1,102 @@
+import os
+import threading
+from pathlib import Path
+from icecream import ic
+from server.config import settings
+
+
+class ArchiveStore:
+    """
+    On-disk store of repository zipballs keyed by (owner, repo, commit sha).
+    The archive of a commit never changes, so every buyer of a listing
+    pinned to that commit is served from the same file. Least recently used
+    archives (by modification time, refreshed on every hit) are removed once
+    the stored bytes exceed max_bytes; archives held by a reader are never removed.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._in_use: dict[Path, int] = {}
+
+    def path_for(self, owner: str, repo: str, sha: str) -> Path:
+        # GitHub owner and repository names are case insensitive
+        return self.root / owner.lower() / repo.lower() / f"{sha}.zip"
+
+    def acquire(self, owner: str, repo: str, sha: str) -> tuple[Path, bool]:
+        """
+        Hold the archive of a commit, stored or not yet downloaded, so that
+        it cannot be evicted until release(). The hold is taken before the
+        file is looked up, so a concurrent trim can never remove it between
+        the lookup and the read.
+        Returns the archive's path and whether it is already stored.
+        """
+        path = self.path_for(owner, repo, sha)
+        with self._lock:
+            self._in_use[path] = self._in_use.get(path, 0) + 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return path, False
+        self.hits += 1
+        return path, True
+
+    def temp_path(self, owner: str, repo: str, sha: str) -> Path:
+        """
+        Where to download an archive before it is added with put().
+        """
+        path = self.path_for(owner, repo, sha).with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def put(self, owner: str, repo: str, sha: str, temp_path: Path) -> Path:
+        """
+        Add a downloaded archive. The caller holds it (acquire()), so the
+        trim that makes room for it never removes it.
+        """
+        path = self.path_for(owner, repo, sha)
+        temp_path.replace(path)
+        self._trim()
+        return path
+
+    def release(self, path: Path) -> None:
+        """
+        Drop a hold taken with acquire().
+        """
+        with self._lock:
+            self._in_use[path] -= 1
+            if not self._in_use[path]:
+                del self._in_use[path]
+
+    def _archives(self) -> list[tuple[Path, os.stat_result]]:
+        return [(path, path.stat()) for path in self.root.glob("*/*/*.zip")]
+
+    def _trim(self) -> None:
+        with self._lock:
+            files = self._archives()
+            total = sum(stat.st_size for _, stat in files)
+            for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                if path in self._in_use:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+                ic("Evicted archive:", path.parent.name, path.stem)
+
+    def stats(self) -> dict:
+        files = self._archives() if self.root.exists() else []
+        return {
+            "entries": len(files),
+            "bytes": sum(stat.st_size for _, stat in files),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+archive_store = ArchiveStore(settings.ARCHIVE_STORE_DIR, settings.ARCHIVE_STORE_MAX_BYTES)
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from icecream import ic
+from server.config import settings
+
+
+class BlobCache:
+    """
+    Content-addressed cache of git blobs keyed by blob SHA.
+    Blobs live in a byte-bounded in-memory LRU; when spill_dir is set,
+    blobs evicted from memory are written there and read back on demand,
+    with the least recently used files removed once spill_max_bytes is
+    exceeded. The spilled files are tracked in an in-memory index (built
+    from the directory once), so evictions never list or stat the directory.
+    Since a SHA identifies the content, entries never go stale and are
+    shared by every branch, fork and listing containing the same file.
+    Async code uses load() and store(), which do the spill I/O in a worker
+    thread; get() and put() do it inline.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entry_bytes: int,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: int = 0
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_max_bytes = spill_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        # Spilled files, least recently used first, and their total size
+        self._spilled: Optional[OrderedDict[str, int]] = None
+        self._spilled_size = 0
+        self._spill_lock = threading.Lock()
+
+    def _spill_path(self, sha: str) -> Path:
+        return self.spill_dir / sha[:2] / sha
+
+    def _spill_index(self) -> OrderedDict[str, int]:
+        # Called with _spill_lock held; files of earlier runs are indexed once
+        if self._spilled is None:
+            files = [(path, path.stat()) for path in self.spill_dir.glob("*/*") if path.suffix != ".tmp"]
+            files.sort(key=lambda item: item[1].st_mtime)
+            self._spilled = OrderedDict((path.name, stat.st_size) for path, stat in files)
+            self._spilled_size = sum(self._spilled.values())
+        return self._spilled
+
+    def _get_memory(self, sha: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(sha)
+            if data is not None:
+                self._entries.move_to_end(sha)
+                self.hits += 1
+            return data
+
+    def _put_memory(self, sha: str, data: bytes) -> list[tuple[str, bytes]]:
+        # Returns the entries evicted from memory, to be spilled
+        if len(data) > self.max_entry_bytes:
+            return []
+        evicted = []
+        with self._lock:
+            if sha in self._entries:
+                self._entries.move_to_end(sha)
+                return []
+            self._entries[sha] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and self._entries:
+                old_sha, old_data = self._entries.popitem(last=False)
+                self._size -= len(old_data)
+                evicted.append((old_sha, old_data))
+        return evicted if self.spill_dir is not None else []
+
+    def _counted(self, data: Optional[bytes]) -> Optional[bytes]:
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def get(self, sha: str) -> Optional[bytes]:
+        data = self._get_memory(sha)
+        if data is not None:
+            return data
+        data = self._counted(self._read_spill(sha))
+        if data is not None:
+            self.put(sha, data)
+        return data
+
+    def put(self, sha: str, data: bytes) -> None:
+        self._write_spills(self._put_memory(sha, data))
+
+    async def load(self, sha: str) -> Optional[bytes]:
+        """
+        get() for the event loop: memory hits are served inline, spilled
+        blobs are read in a worker thread.
+        """
+        data = self._get_memory(sha)
+        if data is not None:
+            return data
+        if self.spill_dir is None:
+            return self._counted(None)
+        data = self._counted(await asyncio.to_thread(self._read_spill, sha))
+        if data is not None:
+            await self.store(sha, data)
+        return data
+
+    async def store(self, sha: str, data: bytes) -> None:
+        """
+        put() for the event loop: blobs evicted from memory are spilled in
+        a worker thread.
+        """
+        evicted = self._put_memory(sha, data)
+        if evicted:
+            await asyncio.to_thread(self._write_spills, evicted)
+
+    def _read_spill(self, sha: str) -> Optional[bytes]:
+        if self.spill_dir is None:
+            return None
+        with self._spill_lock:
+            spilled = self._spill_index()
+            if sha not in spilled:
+                return None
+            spilled.move_to_end(sha)
+        path = self._spill_path(sha)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            with self._spill_lock:
+                self._spilled_size -= self._spilled.pop(sha, 0)
+            return None
+
+    def _write_spills(self, entries: list[tuple[str, bytes]]) -> None:
+        for sha, data in entries:
+            self._write_spill(sha, data)
+
+    def _write_spill(self, sha: str, data: bytes) -> None:
+        with self._spill_lock:
+            spilled = self._spill_index()
+            if sha in spilled:
+                spilled.move_to_end(sha)
+                return
+        path = self._spill_path(sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temp_path.write_bytes(data)
+        temp_path.replace(path)
+
+        removed = []
+        with self._spill_lock:
+            if sha not in spilled:
+                spilled[sha] = len(data)
+                self._spilled_size += len(data)
+            while self._spilled_size > self.spill_max_bytes and spilled:
+                old_sha, old_size = spilled.popitem(last=False)
+                self._spilled_size -= old_size
+                removed.append(old_sha)
+        for old_sha in removed:
+            self._spill_path(old_sha).unlink(missing_ok=True)
+            ic("Removed spilled blob:", old_sha)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "spill_dir": str(self.spill_dir) if self.spill_dir else None,
+            "spilled_entries": len(self._spilled) if self._spilled is not None else None,
+            "spilled_bytes": self._spilled_size if self._spilled is not None else None,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+blob_cache = BlobCache(
+    max_bytes=settings.BLOB_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.BLOB_CACHE_MAX_ENTRY_BYTES,
+    spill_dir=settings.BLOB_CACHE_SPILL_DIR,
+    spill_max_bytes=settings.BLOB_CACHE_SPILL_MAX_BYTES
+)
@@ -0,0 +1,93 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from server.config import settings
+
+# Headers kept alongside a cached body so a response rebuilt from the cache
+# behaves like the original one (pagination links, content type).
+KEPT_HEADERS = ("content-type", "link", "etag", "last-modified")
+
+
+@dataclass
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content: bytes
+    headers: dict
+
+
+class ConditionalCache:
+    """
+    LRU store of GitHub GET responses keyed by (token, accept, URL).
+    Entries carry their validators so the next request can be sent as a
+    conditional request and a 304 answered from the stored body.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(token: Optional[str], accept: str, url: str) -> tuple:
+        # Never keep raw tokens in memory longer than needed
+        token_hash = hashlib.sha256(token.encode()).hexdigest() if token else ""
+        return token_hash, accept, url
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def validators(self, key: tuple) -> dict:
+        """
+        Conditional request headers for a cached entry, if any.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: tuple, content: bytes, headers) -> None:
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+        self._entries[key] = CachedResponse(
+            etag=etag,
+            last_modified=last_modified,
+            content=content,
+            headers={name: headers[name] for name in KEPT_HEADERS if name in headers}
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, url_fragment: str) -> int:
+        """
+        Drop every entry whose URL contains `url_fragment`, ignoring case
+        as GitHub does for owner and repository names.
+        Returns the number of evicted entries.
+        """
+        url_fragment = url_fragment.lower()
+        keys = [key for key in self._entries if url_fragment in key[2].lower()]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+github_cache = ConditionalCache(max_entries=settings.GITHUB_ETAG_CACHE_SIZE)
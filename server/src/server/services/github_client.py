@@ -0,0 +1,165 @@
+import httpx
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from icecream import ic
+from server.config import settings
+from server.services.github_cache import github_cache
+from server.services.github_ratelimit import rate_limiter, PRIORITY_INTERACTIVE
+
+# Application-scoped client shared by every GitHub call. It is opened and
+# closed by the FastAPI lifespan in server/main.py so connections (and their
+# TLS sessions) to api.github.com are reused across requests.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def build_github_client() -> httpx.AsyncClient:
+    """
+    Build the pooled, keep-alive async client used for the GitHub API.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.GITHUB_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GITHUB_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GITHUB_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(
+        connect=settings.GITHUB_CONNECT_TIMEOUT,
+        read=settings.GITHUB_READ_TIMEOUT,
+        write=settings.GITHUB_WRITE_TIMEOUT,
+        pool=settings.GITHUB_POOL_TIMEOUT
+    )
+    return httpx.AsyncClient(
+        base_url=settings.GITHUB_API_URL,
+        http2=settings.GITHUB_HTTP2,
+        limits=limits,
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"X-GitHub-Api-Version": "2022-11-28"}
+    )
+
+
+async def start_github_client() -> httpx.AsyncClient:
+    """
+    Create the shared GitHub client. Called on application startup.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_github_client()
+        ic("GitHub client started")
+    return _client
+
+
+async def close_github_client() -> None:
+    """
+    Close the shared GitHub client. Called on application shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        ic("GitHub client closed")
+    _client = None
+
+
+def get_github_client() -> httpx.AsyncClient:
+    """
+    Return the shared GitHub client, creating it lazily when the application
+    lifespan has not run (scripts, tests).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_github_client()
+    return _client
+
+
+def github_headers(token: Optional[str] = None, accept: str = "application/vnd.github+json") -> dict:
+    """
+    Build the headers for a GitHub API request.
+    """
+    headers = {"Accept": accept}
+    if token:
+        headers["Authorization"] = f"token {token}"
+    return headers
+
+
+async def github_request(
+    method: str,
+    url: str,
+    token: Optional[str] = None,
+    accept: str = "application/vnd.github+json",
+    priority: int = PRIORITY_INTERACTIVE,
+    **kwargs
+) -> httpx.Response:
+    """
+    Send a request to the GitHub API through the shared client.
+    `url` may be absolute or relative to GITHUB_API_URL.
+    The request is admitted by the rate-limit scheduler for its priority.
+    """
+    headers = github_headers(token, accept)
+    headers.update(kwargs.pop("headers", None) or {})
+    client = get_github_client()
+    await rate_limiter.acquire(token, priority)
+    response = await client.request(method, url, headers=headers, **kwargs)
+    rate_limiter.update(token, response.status_code, response.headers)
+    return response
+
+
+@asynccontextmanager
+async def github_stream(
+    method: str,
+    url: str,
+    token: Optional[str] = None,
+    accept: str = "application/vnd.github+json",
+    priority: int = PRIORITY_INTERACTIVE,
+    **kwargs
+) -> AsyncIterator[httpx.Response]:
+    """
+    Send a request through the shared client without reading the body,
+    so large responses can be consumed in chunks.
+    """
+    headers = github_headers(token, accept)
+    headers.update(kwargs.pop("headers", None) or {})
+    client = get_github_client()
+    await rate_limiter.acquire(token, priority)
+    async with client.stream(method, url, headers=headers, **kwargs) as response:
+        rate_limiter.update(token, response.status_code, response.headers)
+        yield response
+
+
+async def github_get(
+    url: str,
+    token: Optional[str] = None,
+    accept: str = "application/vnd.github+json",
+    params: Optional[dict] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> httpx.Response:
+    """
+    Conditional GET against the GitHub API.
+    Sends the stored ETag/Last-Modified for (token, URL) and, when GitHub
+    answers 304 Not Modified, returns the cached body as a 200 response.
+    304s do not count against the token's rate limit.
+    """
+    client = get_github_client()
+    request = client.build_request("GET", url, headers=github_headers(token, accept), params=params)
+    key = github_cache.make_key(token, accept, str(request.url))
+    validators = github_cache.validators(key)
+    request.headers.update(validators)
+
+    await rate_limiter.acquire(token, priority, conditional=bool(validators))
+    response = await client.send(request)
+    rate_limiter.update(token, response.status_code, response.headers)
+
+    if response.status_code == 304:
+        entry = github_cache.get(key)
+        if entry is not None:
+            github_cache.hits += 1
+            return httpx.Response(200, headers=entry.headers, content=entry.content, request=request)
+        # Entry evicted while the request was in flight, fetch it again
+        await rate_limiter.acquire(token, priority)
+        response = await client.send(client.build_request(
+            "GET", url, headers=github_headers(token, accept), params=params
+        ))
+        rate_limiter.update(token, response.status_code, response.headers)
+
+    github_cache.misses += 1
+    if response.status_code == 200:
+        github_cache.store(key, response.content, response.headers)
+    return response
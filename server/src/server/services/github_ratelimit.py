@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
+from icecream import ic
+from server.config import settings
+
+# Request priorities, lower is more important
+PRIORITY_TRANSFER = 0     # downloads and repository creation for a sale
+PRIORITY_INTERACTIVE = 1  # a signed-in user acting on their own account
+PRIORITY_PREVIEW = 2      # public previews spending the owner's token
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request is shed to protect a token's remaining quota.
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(int(retry_after) + 1, 1)
+        super().__init__(f"GitHub rate limit budget exhausted, retry in {self.retry_after}s")
+
+
+@dataclass
+class TokenBudget:
+    remaining: Optional[int] = None
+    limit: Optional[int] = None
+    reset: float = 0.0
+
+
+class RateLimitScheduler:
+    """
+    Tracks X-RateLimit-Remaining/Limit/Reset per token and admits requests
+    by priority. Each priority may only spend the quota above its reserve,
+    a fraction of the token's reported limit, so previews stop well before
+    the headroom kept for transfers is touched, whether the limit is 5000
+    (tokens) or 60 (anonymous calls).
+    A request over budget waits for the reset if that is within its
+    priority's maximum wait, and is shed with RateLimitExceeded otherwise.
+    """
+
+    def __init__(self, reserves: dict[int, float], max_waits: dict[int, float]):
+        self.reserves = reserves
+        self.max_waits = max_waits
+        self.shed = 0
+        self.waited = 0
+        self._budgets: dict[str, TokenBudget] = {}
+
+    @staticmethod
+    def _key(token: Optional[str]) -> str:
+        return hashlib.sha256(token.encode()).hexdigest() if token else ""
+
+    def reserve(self, budget: TokenBudget, priority: int) -> int:
+        """
+        Requests of the token kept back from a priority.
+        """
+        return int(self.reserves.get(priority, 0) * (budget.limit or 0))
+
+    async def acquire(self, token: Optional[str], priority: int = PRIORITY_INTERACTIVE, conditional: bool = False) -> None:
+        """
+        Admit a request, waiting or shedding it when the token's budget is
+        down to the priority's reserve. Conditional requests are admitted
+        the same way but not counted, since a 304 costs nothing; the budget
+        GitHub reports on their response corrects it either way.
+        """
+        budget = self._budgets.get(self._key(token))
+        while budget is not None and budget.remaining is not None:
+            now = time.time()
+            if budget.reset <= now:
+                # Window is over, the next response reports the new budget
+                budget.remaining = None
+                return
+            if budget.remaining > self.reserve(budget, priority):
+                if not conditional:
+                    budget.remaining -= 1
+                return
+
+            wait = budget.reset - now
+            if wait > self.max_waits.get(priority, 0):
+                self.shed += 1
+                ic("Shedding GitHub request, priority:", priority, "remaining:", budget.remaining)
+                raise RateLimitExceeded(wait)
+            self.waited += 1
+            ic("Waiting for GitHub rate limit reset:", round(wait, 1))
+            await asyncio.sleep(wait)
+
+    def update(self, token: Optional[str], status_code: int, headers) -> None:
+        """
+        Record the budget GitHub reported on a response.
+        """
+        resource = headers.get("x-ratelimit-resource")
+        if resource and resource != "core":
+            return
+
+        budget = self._budgets.setdefault(self._key(token), TokenBudget())
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        limit = headers.get("x-ratelimit-limit")
+        if remaining is not None and reset is not None:
+            budget.remaining = int(remaining)
+            budget.reset = float(reset)
+        if limit is not None:
+            budget.limit = int(limit)
+
+        # Secondary rate limits only tell how long to back off
+        retry_after = headers.get("retry-after")
+        if status_code in (403, 429) and retry_after is not None:
+            budget.remaining = 0
+            budget.reset = time.time() + float(retry_after)
+
+    def stats(self) -> dict:
+        now = time.time()
+        low = sum(
+            1 for budget in self._budgets.values()
+            if budget.remaining is not None and budget.reset > now
+            and budget.remaining <= self.reserve(budget, PRIORITY_PREVIEW)
+        )
+        return {"tokens": len(self._budgets), "low_budget_tokens": low, "shed": self.shed, "waited": self.waited}
+
+
+rate_limiter = RateLimitScheduler(
+    reserves={
+        PRIORITY_TRANSFER: 0,
+        PRIORITY_INTERACTIVE: settings.GITHUB_RATE_RESERVE_INTERACTIVE,
+        PRIORITY_PREVIEW: settings.GITHUB_RATE_RESERVE_PREVIEW
+    },
+    max_waits={
+        PRIORITY_TRANSFER: settings.GITHUB_RATE_MAX_WAIT_TRANSFER,
+        PRIORITY_INTERACTIVE: settings.GITHUB_RATE_MAX_WAIT_INTERACTIVE,
+        PRIORITY_PREVIEW: settings.GITHUB_RATE_MAX_WAIT_PREVIEW
+    }
+)
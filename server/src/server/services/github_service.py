@@ -1,65 +1,223 @@
 import httpx
+import asyncio
+import secrets
 from urllib.parse import quote
-import base64
-import requests
 import tempfile
 import subprocess
 import shutil
+import time
+from collections import OrderedDict
 from pathlib import Path
-import zipfile
 from icecream import ic
-from typing import Optional
-from server.utils.functions import github_parse_url
+from typing import Awaitable, Callable, Optional
+from server.config import settings
+from server.utils.functions import github_parse_url, preview_lines, parse_link_header, link_page_number
+from server.utils.archive import extract_zip
+from server.utils.git import git_auth_env, import_working_tree
+from server.utils.packfile import push_zip_as_commit
+from server.utils.tree_stats import tree_statistics
+from server.services.github_client import github_request, github_get, github_stream
+from server.services.github_cache import github_cache
+from server.services.github_ratelimit import RateLimitExceeded, PRIORITY_TRANSFER, PRIORITY_PREVIEW
+from server.services.mirror_service import ensure_mirror, push_from_mirror
+from server.services.tree_store import tree_store
+from server.services.blob_cache import blob_cache
+from server.services.archive_store import archive_store
+from server.services.workspace import workspace_manager
+from server.services.highlight_service import rendered_cache, lexer_for_path, render
 from fastapi import HTTPException
 from server.database.queries.user import get_token_by_user
-from server.database.queries.repository import get_set_repositories, save_transfer_repo
+from server.database.queries.repository import get_listing_by_url, save_transfer_repo, set_repository_webhook
+from server.database.queries.repository_manifest import get_repository_manifest
 
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
 
-def download_github_repository(owner: str, repo: str, access_token: str, branch: str = "main") -> tuple[Path, Path]:
+# path -> (blob SHA, size) maps of recently previewed commits
+PATH_INDEX_CACHE_SIZE = 256
+_path_indexes: OrderedDict[tuple, dict] = OrderedDict()
+
+# Statistics of recently summarized commits
+TREE_STATS_CACHE_SIZE = 256
+_tree_stats: OrderedDict[tuple, dict] = OrderedDict()
+
+# Cache misses currently being fetched, shared by concurrent callers
+_in_flight: dict[tuple, asyncio.Future] = {}
+
+# Transfer stages reported to progress callbacks
+STAGE_DOWNLOADING = "downloading"
+STAGE_EXTRACTING = "extracting"
+STAGE_CREATING_REPO = "creating_repo"
+STAGE_PUSHING = "pushing"
+STAGE_SAVING = "saving"
+
+# Ways a repository is copied to the buyer
+STRATEGY_TEMPLATE = "template"  # generated by GitHub, no bytes through our servers
+STRATEGY_MIRROR = "mirror"
+STRATEGY_PACKFILE = "packfile"
+STRATEGY_ARCHIVE = "archive"
+
+# progress(stage, done_bytes, total_bytes); total_bytes is None when unknown
+ProgressCallback = Callable[[str, int, Optional[int]], Awaitable[None]]
+
+
+async def report_progress(progress: Optional[ProgressCallback], stage: str, done: int = 0, total: Optional[int] = None) -> None:
+    if progress is not None:
+        await progress(stage, done, total)
+
+
+async def stream_to_file(
+    url: str,
+    destination: Path,
+    token: Optional[str] = None,
+    max_bytes: int = settings.ZIPBALL_MAX_BYTES,
+    chunk_size: int = settings.ZIPBALL_CHUNK_SIZE,
+    priority: int = PRIORITY_TRANSFER,
+    progress: Optional[ProgressCallback] = None
+) -> int:
     """
-    Download a GitHub repository as a ZIP and extract it to a temporary directory.
-    Returns the path to the extracted repo root and the temp directory.
+    Stream a GitHub response body to disk in chunks, reporting the received
+    bytes to `progress` as the "downloading" stage.
+    Aborts once more than max_bytes have been received.
+    Returns the number of bytes written.
     """
-    zip_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
-    headers = {
-        "Authorization": f"token {access_token}",
-        "Accept": "application/vnd.github+json"
-    }
-    ic(zip_url, headers)
+    started = time.monotonic()
+    received = 0
 
-    response = requests.get(zip_url, headers=headers)
-    ic(response.status_code)
+    async with github_stream("GET", url, token=token, priority=priority) as response:
+        ic(response.status_code)
+        if response.status_code != 200:
+            body = await response.aread()
+            raise Exception(f"Failed to download repository: {response.status_code} - {body.decode(errors='ignore')}")
 
-    if response.status_code != 200:
-        raise Exception(f"Failed to download repository: {response.status_code} - {response.text}")
+        content_length = int(response.headers.get("content-length") or 0)
+        if content_length > max_bytes:
+            raise Exception(f"Repository archive is too large: {content_length} bytes (limit {max_bytes})")
 
-    temp_dir = Path(tempfile.mkdtemp())
-    zip_path = temp_dir / f"{repo}.zip"
-    ic(temp_dir, zip_path)
+        with open(destination, "wb") as f:
+            async for chunk in response.aiter_bytes(chunk_size):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise Exception(f"Repository archive exceeds the limit of {max_bytes} bytes")
+                await asyncio.to_thread(f.write, chunk)
+                await report_progress(progress, STAGE_DOWNLOADING, received, content_length or None)
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    ic(f"Downloaded {received} bytes in {elapsed:.2f}s ({received / elapsed / 1024 / 1024:.2f} MB/s)")
+    return received
+
+
+async def get_archive(
+    owner: str,
+    repo: str,
+    sha_commit: str,
+    access_token: str,
+    progress: Optional[ProgressCallback] = None
+) -> Path:
+    """
+    Get the zipball of a commit from the archive store, downloading it once
+    for all concurrent callers on a miss.
+    The archive is returned held, so it cannot be evicted while it is used:
+    the caller must pass it to archive_store.release() when done.
+    """
+    zip_path, stored = await asyncio.to_thread(archive_store.acquire, owner, repo, sha_commit)
+    if stored:
+        ic("Archive served from the store:", owner, repo, sha_commit)
+        return zip_path
+
+    async def download_archive() -> Path:
+        temp_path = archive_store.temp_path(owner, repo, sha_commit)
+        try:
+            await stream_to_file(
+                f"/repos/{owner}/{repo}/zipball/{sha_commit}", temp_path, token=access_token, progress=progress
+            )
+            return await asyncio.to_thread(archive_store.put, owner, repo, sha_commit, temp_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    try:
+        await single_flight(("zipball", owner.lower(), repo.lower(), sha_commit), download_archive)
+    except BaseException:
+        archive_store.release(zip_path)
+        raise
+    return zip_path
+
+
+async def extract_archive(zip_path: Path, target_dir: Path, progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Extract a zipball in a worker thread. Returns the extracted bytes.
+    """
+    await report_progress(progress, STAGE_EXTRACTING, 0, zip_path.stat().st_size)
+    started = time.monotonic()
+    extracted = await asyncio.to_thread(
+        extract_zip,
+        zip_path,
+        target_dir,
+        workers=settings.ZIP_EXTRACT_WORKERS,
+        parallel_threshold=settings.ZIP_PARALLEL_THRESHOLD,
+        chunk_size=settings.ZIPBALL_CHUNK_SIZE
+    )
+    elapsed = max(time.monotonic() - started, 1e-6)
+    ic(f"Extracted {extracted} bytes in {elapsed:.2f}s ({extracted / elapsed / 1024 / 1024:.2f} MB/s)")
+    await report_progress(progress, STAGE_EXTRACTING, extracted, extracted)
+    return extracted
+
+
+async def download_github_repository(
+    owner: str,
+    repo: str,
+    access_token: str,
+    branch: str = "main",
+    sha_commit: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    workspace: Optional[Path] = None
+) -> tuple[Path, Path]:
+    """
+    Download a GitHub repository as a ZIP and extract it to `workspace`, or
+    to a new temporary directory that is removed again if anything fails.
+    The archive is streamed to disk and extracted entry by entry, so memory
+    use does not grow with the repository size. When sha_commit is given the
+    archive of that commit is used instead of the head of the branch, and it
+    is taken from (or added to) the archive store, so each commit is only
+    downloaded once however many buyers it has.
+    Returns the path to the extracted repo root and the temp directory.
+    """
+    temp_dir = workspace or Path(tempfile.mkdtemp())
 
-    with open(zip_path, "wb") as f:
-        f.write(response.content)
+    try:
+        if sha_commit is not None:
+            zip_path = await get_archive(owner, repo, sha_commit, access_token, progress)
+            try:
+                await extract_archive(zip_path, temp_dir, progress)
+            finally:
+                archive_store.release(zip_path)
+        else:
+            zip_url = f"/repos/{owner}/{repo}/zipball/{branch}"
+            zip_path = temp_dir / f"{repo}.zip"
+            ic(zip_url, temp_dir, zip_path)
 
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
+            await stream_to_file(zip_url, zip_path, token=access_token, progress=progress)
+            await extract_archive(zip_path, temp_dir, progress)
+            zip_path.unlink()
 
-    extracted_folders = [f for f in temp_dir.iterdir() if f.is_dir()]
-    ic(extracted_folders)
+        extracted_folders = [f for f in temp_dir.iterdir() if f.is_dir()]
+        ic(extracted_folders)
 
-    if not extracted_folders:
-        raise Exception("No extracted folder found in ZIP.")
+        if not extracted_folders:
+            raise Exception("No extracted folder found in ZIP.")
+    except BaseException:
+        if workspace is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
 
     repo_root_path = extracted_folders[0]
     return repo_root_path, temp_dir
 
 
-def get_github_username(token: str) -> str:
+async def get_github_username(token: str) -> str:
     """
     Retrieve the GitHub username associated with the provided token.
     """
-    url = "https://api.github.com/user"
-    headers = {"Authorization": f"token {token}"}
-    response = requests.get(url, headers=headers)
+    response = await github_get("/user", token=token)
     ic(response.status_code)
 
     if response.status_code != 200:
@@ -70,34 +228,29 @@ def get_github_username(token: str) -> str:
     return username
 
 
-def download_user_repository(token: str, repo: str, branch: str = "main") -> Path:
+async def download_user_repository(token: str, repo: str, branch: str = "main") -> tuple[Path, Path]:
     """
     Download a repository for the authenticated user.
     """
-    owner = get_github_username(token)
+    owner = await get_github_username(token)
     ic(owner)
-    return download_github_repository(owner, repo, token, branch)
+    return await download_github_repository(owner, repo, token, branch)
 
 
-def create_github_repository(repo_name: str, token: str, private: bool = True) -> str:
+async def create_github_repository(repo_name: str, token: str, private: bool = True) -> str:
     """
     Create a new GitHub repository for the authenticated user.
     Returns the clone URL.
     """
-    url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
     data = {
         "name": repo_name,
         "private": private,
         "auto_init": False
     }
 
-    ic(url, headers, data)
+    ic(data)
 
-    response = requests.post(url, headers=headers, json=data)
+    response = await github_request("POST", "/user/repos", token=token, json=data, priority=PRIORITY_TRANSFER)
     ic(response.status_code, response.text)
 
     if response.status_code != 201:
@@ -106,159 +259,849 @@ def create_github_repository(repo_name: str, token: str, private: bool = True) -
     return response.json()["clone_url"]
 
 
-def upload_repository_to_github(local_repo_path: Path, new_repo_name: str, github_token: str) -> str:
+async def find_github_repository(repo_name: str, token: str) -> Optional[str]:
+    """
+    Look up a repository of the authenticated user by name.
+    Returns its clone URL, or None if the user has no such repository.
     """
-    Upload a local repository to a new GitHub repository.
+    owner = await get_github_username(token)
+    response = await github_request("GET", f"/repos/{owner}/{repo_name}", token=token, priority=PRIORITY_TRANSFER)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()["clone_url"]
+
+
+async def is_repository_empty(clone_url: str, token: str) -> bool:
+    """
+    Whether a repository has no branches yet, i.e. nothing was pushed to it.
+    """
+    owner, repo = github_parse_url(clone_url)
+    response = await github_request(
+        "GET", f"/repos/{owner}/{repo.removesuffix('.git')}/branches", token=token,
+        params={"per_page": 1}, priority=PRIORITY_TRANSFER
+    )
+    response.raise_for_status()
+    return not response.json()
+
+
+class TransferTarget:
+    """
+    The buyer's repository of a transfer job, shared by its attempts.
+    The first attempt creates it and reports it to `on_created`, which
+    stores it on the job; retries are given the stored URL and push into
+    the same repository instead of failing to create it again.
+    """
+
+    def __init__(
+        self,
+        clone_url: Optional[str] = None,
+        strategy: Optional[str] = None,
+        retry: bool = False,
+        on_created: Optional[Callable[[str, Optional[str]], Awaitable[None]]] = None
+    ):
+        self.clone_url = clone_url
+        self.strategy = strategy
+        # A retry may find the repository of an attempt that stopped before storing it
+        self.retry = retry
+        self.on_created = on_created
+
+    async def created(self, clone_url: str, strategy: Optional[str]) -> str:
+        self.clone_url = clone_url
+        self.strategy = strategy
+        if self.on_created is not None:
+            await self.on_created(clone_url, strategy)
+        return clone_url
+
+    async def create(self, repo_name: str, token: str, strategy: str) -> str:
+        """
+        Returns the buyer's repository, creating it on the first attempt.
+        """
+        if self.clone_url is not None:
+            ic("Reusing buyer's repository of an earlier attempt:", self.clone_url)
+            return self.clone_url
+        return await self.created(await create_github_repository(repo_name, token), strategy)
+
+
+async def upload_repository_to_github(
+    local_repo_path: Path,
+    new_repo_name: str,
+    github_token: str,
+    progress: Optional[ProgressCallback] = None,
+    target: Optional[TransferTarget] = None,
+    workspace: Optional[Path] = None
+) -> str:
+    """
+    Upload a local repository to a new GitHub repository, or to the
+    repository of `target` when an earlier attempt already created it.
+    The temporary folder holding the repository is deleted afterwards,
+    unless it is a `workspace` whose owner removes it.
     Returns the new repository's clone URL.
     """
     ic(local_repo_path, new_repo_name)
 
-    clone_url = create_github_repository(new_repo_name, github_token)
-    authed_url = clone_url.replace("https://", f"https://{github_token}@")
-    ic(clone_url, authed_url)
+    await report_progress(progress, STAGE_CREATING_REPO)
+    target = target or TransferTarget()
+    clone_url = await target.create(new_repo_name, github_token, STRATEGY_ARCHIVE)
+    ic(clone_url)
 
     try:
-        subprocess.run(["git", "init"], cwd=local_repo_path, check=True)
-        subprocess.run(["git", "remote", "add", "origin", authed_url], cwd=local_repo_path, check=True)
-        subprocess.run(["git", "add", "."], cwd=local_repo_path, check=True)
-        subprocess.run(["git", "commit", "-m", "Imported from AgoraPay platform"], cwd=local_repo_path, check=True)
-        subprocess.run(["git", "branch", "-M", "main"], cwd=local_repo_path, check=True)
-        subprocess.run(["git", "push", "-u", "origin", "main"], cwd=local_repo_path, check=True)
+        await report_progress(progress, STAGE_PUSHING)
+        # The token goes in the environment, never in the remote URL or the repository config
+        await import_working_tree(
+            local_repo_path, clone_url, settings.TRANSFER_COMMIT_MESSAGE, env=git_auth_env(github_token)
+        )
 
     except subprocess.CalledProcessError as e:
         ic(e)
         raise Exception(f"Failed to upload repository to GitHub: {str(e)}")
 
     finally:
-        temp_root = local_repo_path.parent
-        ic(f"Deleting temporary folder: {temp_root}")
-        shutil.rmtree(temp_root, ignore_errors=True)
+        if workspace is None:
+            temp_root = local_repo_path.parent
+            ic(f"Deleting temporary folder: {temp_root}")
+            shutil.rmtree(temp_root, ignore_errors=True)
 
     ic("Repository uploaded successfully")
     return clone_url
 
 
-def list_github_repositories(access_token: str):
+async def upload_archive_to_github(
+    owner: str,
+    repo: str,
+    new_repo_name: str,
+    seller_token: str,
+    buyer_token: str,
+    sha_commit: str,
+    progress: Optional[ProgressCallback] = None,
+    target: Optional[TransferTarget] = None
+) -> str:
     """
-    List all repositories for the authenticated user.
+    Upload the zipball of a commit to a new GitHub repository without
+    extracting it: blobs, trees and the commit are built in memory from the
+    archive entries and pushed as a packfile over smart HTTP, with no git
+    subprocess and no working tree. The zipball comes from the archive
+    store and stays held there until the push is done. The repository of
+    `target` is reused when an earlier attempt created it.
+    Returns the new repository's clone URL.
     """
-    url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.github+json"
-    }
+    zip_path = await get_archive(owner, repo, sha_commit, seller_token, progress)
+    try:
+        await report_progress(progress, STAGE_CREATING_REPO)
+        target = target or TransferTarget()
+        clone_url = await target.create(new_repo_name, buyer_token, STRATEGY_PACKFILE)
+        await report_progress(progress, STAGE_PUSHING, 0, zip_path.stat().st_size)
+        started = time.monotonic()
+        commit_id = await asyncio.to_thread(
+            push_zip_as_commit,
+            zip_path,
+            clone_url,
+            settings.TRANSFER_COMMIT_MESSAGE,
+            settings.TRANSFER_COMMIT_AUTHOR,
+            buyer_token
+        )
+        ic(f"Pushed commit {commit_id} in {time.monotonic() - started:.2f}s")
+        return clone_url
+    finally:
+        archive_store.release(zip_path)
+
+
+async def generate_from_template(
+    owner: str,
+    repo: str,
+    new_repo_name: str,
+    buyer_token: str,
+    branch: str = "main",
+    sha_commit: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Optional[str]:
+    """
+    Let GitHub copy the repository by generating the buyer's repository
+    from it, when the source is a template repository the buyer can read,
+    the listed branch is its default branch and (for pinned listings) that
+    branch is still at the pinned commit. Nothing is downloaded or pushed.
+    The creating_repo stage is reported only once the generation is requested.
+    Returns the new repository's clone URL, or None when this path does not
+    apply and the transfer has to copy the files itself.
+    """
+    response = await github_get(f"/repos/{owner}/{repo}", token=buyer_token, priority=PRIORITY_TRANSFER)
+    if response.status_code != 200:
+        return None
+    source = response.json()
+    if not source.get("is_template") or source.get("default_branch") != branch:
+        return None
+    if sha_commit:
+        try:
+            head_sha = await resolve_branch_sha(owner, repo, branch, buyer_token, PRIORITY_TRANSFER)
+        except httpx.HTTPStatusError:
+            return None
+        if head_sha != sha_commit:
+            ic("Template head moved past the pinned commit, copying instead:", owner, repo)
+            return None
+
+    await report_progress(progress, STAGE_CREATING_REPO)
+    response = await github_request(
+        "POST", f"/repos/{owner}/{repo}/generate", token=buyer_token, priority=PRIORITY_TRANSFER,
+        json={"name": new_repo_name, "private": True, "include_all_branches": False}
+    )
+    if response.status_code != 201:
+        ic("Template generation failed, copying instead:", response.status_code, response.text)
+        return None
+    return response.json()["clone_url"]
+
+
+def _serialize_repositories(repos: list) -> list:
+    return [
+        {
+            "name": repo["name"],
+            "url": repo["html_url"],
+            "visibility": "Private" if repo["private"] else "Public",
+            "default_branch": repo["default_branch"]
+        } for repo in repos
+    ]
+
+
+async def _get_repositories_page(access_token: str, page: int):
     params = {
         "visibility": "all",
         "affiliation": "owner",
-        "per_page": 100
+        "per_page": 100,
+        "page": page
     }
 
-    ic(url, headers, params)
-
-    response = requests.get(url, headers=headers, params=params)
-    ic(response.status_code)
+    response = await github_get("/user/repos", token=access_token, params=params)
+    ic(page, response.status_code)
 
-    if response.status_code == 200:
-        repos_data = []
-        for repo in response.json():
-            repos_data.append({
-                "name": repo["name"],
-                "url": repo["html_url"],
-                "visibility": "Private" if repo["private"] else "Public",
-                "default_branch": repo["default_branch"]
-            })
-        ic(len(repos_data))
-        return repos_data
-    else:
+    if response.status_code != 200:
         raise Exception(f"Failed to get repositories: {response.status_code} - {response.text}")
+    return response
+
+
+async def list_github_repositories_page(access_token: str, page: int = 1) -> dict:
+    """
+    List one page (up to 100) of the authenticated user's repositories.
+    Returns the repositories and the cursor of the next page, if any.
+    """
+    response = await _get_repositories_page(access_token, page)
+    links = parse_link_header(response.headers.get("link"))
+    return {
+        "repositories": _serialize_repositories(response.json()),
+        "next_cursor": str(page + 1) if "next" in links else None
+    }
+
+
+async def list_github_repositories(access_token: str):
+    """
+    List all repositories for the authenticated user.
+    The first page tells, through its Link header, how many pages exist;
+    the remaining pages are then fetched concurrently and merged in order.
+    """
+    first = await _get_repositories_page(access_token, 1)
+    repos = first.json()
+
+    last_url = parse_link_header(first.headers.get("link")).get("last")
+    last_page = link_page_number(last_url) if last_url else 1
+
+    if last_page > 1:
+        semaphore = asyncio.Semaphore(settings.GITHUB_PAGE_CONCURRENCY)
+
+        async def fetch_page(page: int) -> list:
+            async with semaphore:
+                response = await _get_repositories_page(access_token, page)
+                return response.json()
+
+        pages = await asyncio.gather(*(fetch_page(page) for page in range(2, last_page + 1)))
+        for page in pages:
+            repos.extend(page)
 
+    repos_data = _serialize_repositories(repos)
+    ic(len(repos_data))
+    return repos_data
 
-def get_repository_tree(
+
+async def single_flight(key: tuple, factory):
+    """
+    Run factory() once for concurrent callers sharing the same key, so a
+    burst of cache misses results in a single GitHub request.
+    """
+    future = _in_flight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(future)
+
+
+async def invalidate_repository_caches(owner: str, repo: str) -> dict:
+    """
+    Drop everything cached for a repository after a push: conditional
+    responses (branch heads, listings), stored trees and path indexes.
+    Blobs are content-addressed and stay valid.
+    """
+    evicted_responses = github_cache.evict(f"/repos/{owner}/{repo}/")
+    evicted_trees = await asyncio.to_thread(tree_store.evict_repository, owner, repo)
+    index_keys = [key for key in _path_indexes if key[:2] == (owner.lower(), repo.lower())]
+    for key in index_keys:
+        del _path_indexes[key]
+    ic("Repository caches invalidated:", owner, repo, evicted_responses, evicted_trees, len(index_keys))
+    return {"responses": evicted_responses, "trees": evicted_trees, "path_indexes": len(index_keys)}
+
+
+async def register_listing_webhook(repository_id: int, uploader_id: int, repo_url: str) -> Optional[int]:
+    """
+    Register a push webhook on the seller's repository for one listing.
+    Every listing gets its own delivery URL and secret, so a delivery
+    signed with one listing's secret cannot move any other listing.
+    Returns the hook ID, or None when GITHUB_WEBHOOK_URL is unset or the
+    seller's token may not manage the repository's hooks.
+    """
+    if not settings.GITHUB_WEBHOOK_URL:
+        return None
+    owner, repo = github_parse_url(repo_url)
+    token = get_token_by_user(user_id=uploader_id)
+    secret = secrets.token_hex(32)
+    response = await github_request(
+        "POST", f"/repos/{owner}/{repo}/hooks", token=token,
+        json={
+            "name": "web",
+            "active": True,
+            "events": ["push"],
+            "config": {
+                "url": f"{settings.GITHUB_WEBHOOK_URL.rstrip('/')}/{repository_id}",
+                "content_type": "json",
+                "secret": secret
+            }
+        }
+    )
+    if response.status_code != 201:
+        ic("Webhook not registered:", owner, repo, response.status_code, response.text)
+        return None
+    webhook_id = response.json()["id"]
+    set_repository_webhook(repository_id, webhook_id, secret)
+    ic("Webhook registered for listing:", repository_id, webhook_id)
+    return webhook_id
+
+
+async def delete_listing_webhook(uploader_id: int, repo_url: str, webhook_id: int) -> None:
+    """
+    Remove the push webhook of a deleted listing from the seller's repository.
+    """
+    owner, repo = github_parse_url(repo_url)
+    token = get_token_by_user(user_id=uploader_id)
+    response = await github_request("DELETE", f"/repos/{owner}/{repo}/hooks/{webhook_id}", token=token)
+    if response.status_code not in (204, 404):
+        ic("Webhook not deleted:", owner, repo, webhook_id, response.status_code)
+
+
+async def resolve_branch_sha(
     owner: str,
     repo: str,
     branch: str = "main",
-    token: Optional[str] = None
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> str:
+    """
+    Resolve a branch to the SHA of its latest commit.
+    """
+    url_branch = f"/repos/{owner}/{repo}/branches/{branch}"
+    response_branch = await github_get(
+        url_branch, token=token, accept="application/vnd.github.v3+json", priority=priority
+    )
+    response_branch.raise_for_status()
+    return response_branch.json()["commit"]["sha"]
+
+
+async def _fetch_tree(
+    owner: str,
+    repo: str,
+    tree_sha: str,
+    token: Optional[str],
+    priority: int,
+    recursive: bool
+) -> dict:
+    url_tree = f"/repos/{owner}/{repo}/git/trees/{tree_sha}"
+    response_tree = await github_request(
+        "GET", url_tree, token=token, accept="application/vnd.github.v3+json",
+        params={"recursive": 1} if recursive else None, priority=priority
+    )
+    response_tree.raise_for_status()
+    return response_tree.json()
+
+
+async def _complete_tree_entries(
+    owner: str,
+    repo: str,
+    level: dict,
+    prefix: str,
+    token: Optional[str],
+    priority: int,
+    semaphore: asyncio.Semaphore
+) -> list:
+    """
+    Expand one tree level into the full list of entries below it.
+    Each subdirectory is fetched recursively in parallel; subdirectories
+    that GitHub truncates too are split again one level further down.
+    """
+    entries = []
+    subtrees = []
+    for entry in level.get("tree", []):
+        entries.append({**entry, "path": f"{prefix}{entry['path']}"})
+        if entry.get("type") == "tree":
+            subtrees.append(entry)
+
+    async def expand(entry: dict) -> list:
+        subtree_prefix = f"{prefix}{entry['path']}/"
+        async with semaphore:
+            subtree = await _fetch_tree(owner, repo, entry["sha"], token, priority, recursive=True)
+        if not subtree.get("truncated"):
+            return [{**item, "path": f"{subtree_prefix}{item['path']}"} for item in subtree.get("tree", [])]
+        async with semaphore:
+            sublevel = await _fetch_tree(owner, repo, entry["sha"], token, priority, recursive=False)
+        return await _complete_tree_entries(owner, repo, sublevel, subtree_prefix, token, priority, semaphore)
+
+    for subtree_entries in await asyncio.gather(*(expand(entry) for entry in subtrees)):
+        entries.extend(subtree_entries)
+    return entries
+
+
+async def get_tree_by_sha(
+    owner: str,
+    repo: str,
+    sha_commit: str,
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> dict:
+    """
+    Get the recursive tree of a commit, from the tree store when possible.
+    When GitHub truncates the recursive listing, the missing entries are
+    filled in by fetching the subtrees in parallel.
+    """
+    cached_tree = await asyncio.to_thread(tree_store.get, owner, repo, sha_commit)
+    if cached_tree is not None:
+        return cached_tree
+
+    async def fetch_tree() -> dict:
+        tree = await _fetch_tree(owner, repo, sha_commit, token, priority, recursive=True)
+        if tree.get("truncated"):
+            ic("Tree truncated by GitHub, fetching subtrees:", owner, repo, sha_commit)
+            root = await _fetch_tree(owner, repo, sha_commit, token, priority, recursive=False)
+            semaphore = asyncio.Semaphore(settings.GITHUB_TREE_CONCURRENCY)
+            tree["tree"] = await _complete_tree_entries(owner, repo, root, "", token, priority, semaphore)
+            tree["truncated"] = False
+
+        await asyncio.to_thread(tree_store.put, owner, repo, sha_commit, tree)
+        return tree
+
+    return await single_flight(("tree", owner.lower(), repo.lower(), sha_commit), fetch_tree)
+
+
+async def get_tree_level(
+    owner: str,
+    repo: str,
+    tree_sha: str,
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> dict:
+    """
+    Get the direct children of a single tree (a directory, or the root
+    when given a commit SHA), from the tree store when possible.
+    """
+    store_key = f"level:{tree_sha}"
+    cached_level = await asyncio.to_thread(tree_store.get, owner, repo, store_key)
+    if cached_level is not None:
+        return cached_level
+
+    async def fetch_level() -> dict:
+        level = await _fetch_tree(owner, repo, tree_sha, token, priority, recursive=False)
+        await asyncio.to_thread(tree_store.put, owner, repo, store_key, level)
+        return level
+
+    return await single_flight(("level", owner.lower(), repo.lower(), tree_sha), fetch_level)
+
+
+async def get_repository_tree(
+    owner: str,
+    repo: str,
+    branch: str = "main",
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW,
+    sha_commit: Optional[str] = None
 ):
     """
-    Get the file tree of a repository for a given branch.
+    Get the file tree of a repository for a given branch, or for sha_commit
+    when the commit is already known.
+    Only the branch to commit resolution goes to GitHub when the tree of
+    that commit is already in the tree store, and nothing does when the
+    commit is given.
     """
-    headers = {
-        "Accept": "application/vnd.github.v3+json"
-    }
+    try:
+        if sha_commit is None:
+            sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+        return await get_tree_by_sha(owner, repo, sha_commit, token, priority)
+
+    except httpx.HTTPError as e:
+        print(f"Failed to get repository tree: {e}")
+        return None
 
-    if token:
-        headers["Authorization"] = f"token {token}"
 
+async def get_repository_tree_level(
+    owner: str,
+    repo: str,
+    branch: str = "main",
+    tree_sha: Optional[str] = None,
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW,
+    sha_commit: Optional[str] = None
+):
+    """
+    Get one directory level of a repository. Without tree_sha the root of
+    the branch (or of sha_commit) is returned; subdirectories are then
+    opened by the SHA of their "tree" entries, so the cost does not depend
+    on repository size.
+    """
     try:
-        # Get the SHA of the latest commit in the branch
-        url_branch = f"https://api.github.com/repos/{owner}/{repo}/branches/{branch}"
-        response_branch = requests.get(url_branch, headers=headers)
-        response_branch.raise_for_status()
-        sha_commit = response_branch.json()["commit"]["sha"]
+        if tree_sha is None and sha_commit is None:
+            sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+        level = await get_tree_level(owner, repo, tree_sha or sha_commit, token, priority)
+        return {**level, "commit_sha": sha_commit}
 
-        # Get the repository tree using the commit SHA
-        url_tree = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{sha_commit}?recursive=1"
-        response_tree = requests.get(url_tree, headers=headers)
-        response_tree.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"Failed to get repository tree level: {e}")
+        return None
 
-        return response_tree.json()
 
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to get repository tree: {e}")
+async def get_repository_stats(
+    owner: str,
+    repo: str,
+    branch: str = "main",
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW,
+    sha_commit: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Get language and extension histograms, byte totals, file counts and the
+    largest files of a repository at a branch head, or at sha_commit.
+    Statistics are computed once per commit, off the event loop, and kept
+    in memory; the tree itself comes from the tree store.
+    """
+    try:
+        if sha_commit is None:
+            sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+        stats_key = (owner.lower(), repo.lower(), sha_commit)
+
+        stats = _tree_stats.get(stats_key)
+        if stats is None:
+            async def summarize() -> dict:
+                tree = await get_tree_by_sha(owner, repo, sha_commit, token, priority)
+                summary = await asyncio.to_thread(tree_statistics, tree.get("tree", []))
+                return {**summary, "commit_sha": sha_commit, "truncated": tree.get("truncated", False)}
+
+            stats = await single_flight(("stats", *stats_key), summarize)
+            _tree_stats[stats_key] = stats
+            while len(_tree_stats) > TREE_STATS_CACHE_SIZE:
+                _tree_stats.popitem(last=False)
+        else:
+            _tree_stats.move_to_end(stats_key)
+        return stats
+
+    except httpx.HTTPError as e:
+        print(f"Failed to get repository stats: {e}")
         return None
-    
 
-async def fetch_file_from_repository(
+
+async def get_blob_entry(
+    owner: str,
+    repo: str,
+    path: str,
+    branch: str = "main",
+    token: Optional[str] = None,
+    sha_commit: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> Optional[tuple[str, int]]:
+    """
+    Find the blob SHA and size of a file through the commit's tree.
+    Path indexes are kept per commit, so repeated lookups are dict reads.
+    The branch is only resolved when sha_commit is not given.
+    Raises FileNotFoundError if the file is not in a complete tree; returns
+    None when the tree is truncated and the path may be missing from it.
+    """
+    if sha_commit is None:
+        sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+    index_key = (owner.lower(), repo.lower(), sha_commit)
+
+    index = _path_indexes.get(index_key)
+    if index is None:
+        tree = await get_tree_by_sha(owner, repo, sha_commit, token, priority)
+        index = {
+            entry["path"]: (entry["sha"], entry.get("size", 0))
+            for entry in tree.get("tree", [])
+            if entry.get("type") == "blob"
+        }, tree.get("truncated", False)
+        _path_indexes[index_key] = index
+        while len(_path_indexes) > PATH_INDEX_CACHE_SIZE:
+            _path_indexes.popitem(last=False)
+    else:
+        _path_indexes.move_to_end(index_key)
+
+    blobs, truncated = index
+    if path not in blobs and not truncated:
+        raise FileNotFoundError(path)
+    return blobs.get(path)
+
+
+async def fetch_blob(
     owner: str,
     repo: str,
+    blob_sha: str,
+    token: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> bytes:
+    """
+    Get the raw content of a blob, from the blob cache when possible.
+    """
+    content = await blob_cache.load(blob_sha)
+    if content is not None:
+        return content
+
+    async def download_blob() -> bytes:
+        response = await github_request(
+            "GET", f"/repos/{owner}/{repo}/git/blobs/{blob_sha}",
+            token=token, accept=RAW_MEDIA_TYPE, priority=priority
+        )
+        response.raise_for_status()
+        await blob_cache.store(blob_sha, response.content)
+        return response.content
+
+    return await single_flight(("blob", blob_sha), download_blob)
+
+
+async def fetch_raw_lines(
+    url: str,
+    token: Optional[str] = None,
+    line_count: int = 30,
+    start_line: int = 1,
+    params: Optional[dict] = None,
+    priority: int = PRIORITY_PREVIEW
+) -> bytes:
+    """
+    Fetch only the leading bytes of a raw file needed to hold lines
+    1..start_line + line_count - 1. Byte ranges are requested in growing
+    windows; if GitHub ignores the Range header the body is streamed and
+    the connection closed as soon as enough lines have arrived.
+    """
+    needed_lines = start_line + line_count - 1
+    content = bytearray()
+    newlines = 0
+    window = settings.PREVIEW_RANGE_BYTES
+
+    while True:
+        offset = len(content)
+        headers = {"Range": f"bytes={offset}-{offset + window - 1}"}
+        async with github_stream(
+            "GET", url, token=token, accept=RAW_MEDIA_TYPE, headers=headers, params=params, priority=priority
+        ) as response:
+            if response.status_code == 416:
+                # The previous window ended exactly at the end of the file
+                return bytes(content)
+            response.raise_for_status()
+
+            async for chunk in response.aiter_bytes():
+                content += chunk
+                newlines += chunk.count(b"\n")
+                if newlines >= needed_lines:
+                    return bytes(content)
+
+            if response.status_code != 206:
+                return bytes(content)
+
+            total = response.headers.get("content-range", "").rpartition("/")[2]
+            if total.isdigit() and len(content) >= int(total):
+                return bytes(content)
+
+        window *= 2
+
+
+async def highlight_file_preview(
     path: str,
-    token: Optional[str] = None
+    content: bytes,
+    preview: str,
+    start_line: int,
+    style: str,
+    blob_sha: Optional[str] = None,
+    complete: bool = False
 ) -> dict:
     """
-    Fetch a file's content from a GitHub repository.
-    Returns a preview (first 30 lines) of the file content.
+    Highlight the lines of a preview. `content` holds the file from its
+    first line, so lexing starts in the right state; it is rendered in the
+    highlight process pool and sliced to the preview window. Complete blobs
+    are rendered once per (blob SHA, lexer, style) and served from the
+    rendered cache afterwards. Sources over HIGHLIGHT_MAX_BYTES only render
+    the preview window.
     """
-    headers = {
-        "Accept": "application/vnd.github.v3+json"
-    }
-    if token:
-        headers["Authorization"] = f"token {token}"
+    lexer = lexer_for_path(path)
+    line_total = preview.count("\n") + 1 if preview else 0
+    if len(content) > settings.HIGHLIGHT_MAX_BYTES:
+        return {"html": await render(preview, lexer, style), "lexer": lexer, "style": style}
 
-    encoded_path = quote(path)
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{encoded_path}"
-    print(f"Url: {url}")
+    key = f"{blob_sha}:{lexer}:{style}" if blob_sha and complete else None
+    cached = await rendered_cache.load(key) if key else None
+    if cached is not None:
+        html = cached.decode()
+    elif key:
+        async def render_blob() -> str:
+            rendered = await render(content.decode("utf-8", errors="ignore"), lexer, style)
+            await rendered_cache.store(key, rendered.encode())
+            return rendered
+        html = await single_flight(("highlight", key), render_blob)
+    else:
+        html = await render(content.decode("utf-8", errors="ignore"), lexer, style)
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, headers=headers)
+    lines = html.split("\n")[start_line - 1:start_line - 1 + line_total]
+    return {"html": "\n".join(lines), "lexer": lexer, "style": style}
 
-    if r.status_code != 200:
+
+async def fetch_file_from_repository(
+    owner: str,
+    repo: str,
+    path: str,
+    token: Optional[str] = None,
+    branch: str = "main",
+    start_line: int = 1,
+    line_count: int = 30,
+    sha_commit: Optional[str] = None,
+    priority: int = PRIORITY_PREVIEW,
+    style: Optional[str] = None
+) -> dict:
+    """
+    Fetch a file's content from a GitHub repository.
+    Returns a preview (line_count lines from start_line) of the file content.
+    The file is resolved to its blob SHA: small blobs are served from the
+    blob cache, so identical files are only downloaded once, while large
+    blobs are read with byte ranges up to the last requested line.
+    When a Pygments `style` is given the preview is also returned as
+    highlighted HTML.
+    """
+    try:
+        blob = await get_blob_entry(owner, repo, path, branch, token, sha_commit, priority)
+        if blob is not None:
+            blob_sha, size = blob
+            content = await blob_cache.load(blob_sha)
+            if content is None and size > settings.BLOB_CACHE_MAX_ENTRY_BYTES:
+                content = await fetch_raw_lines(
+                    f"/repos/{owner}/{repo}/git/blobs/{blob_sha}", token, line_count, start_line, priority=priority
+                )
+            elif content is None:
+                content = await fetch_blob(owner, repo, blob_sha, token, priority)
+            result = {"content": preview_lines(content, line_count, start_line), "sha": blob_sha}
+            if style:
+                result.update(await highlight_file_preview(
+                    path, content, result["content"], start_line, style,
+                    blob_sha=blob_sha, complete=len(content) == size
+                ))
+            return result
+    except FileNotFoundError:
         return {
-            "content": f"// Error {r.status_code}: could not fetch the file"
+            "content": "// Error 404: could not fetch the file"
         }
-
-    data = r.json()
-    if "content" not in data:
+    except httpx.HTTPStatusError as e:
         return {
-            "content": "// The file does not contain valid data"
+            "content": f"// Error {e.response.status_code}: could not fetch the file"
         }
+    except httpx.HTTPError as e:
+        print(f"Failed to resolve file through the tree: {e}")
+
+    # Paths missing from a truncated tree fall back to the contents API
+    encoded_path = quote(path)
+    url = f"/repos/{owner}/{repo}/contents/{encoded_path}"
+    print(f"Url: {url}")
 
     try:
-        content = base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
-        preview = "\n".join(content.splitlines()[:30])
-        return {"content": preview}
+        content = await fetch_raw_lines(
+            url, token, line_count, start_line, params={"ref": sha_commit or branch}, priority=priority
+        )
+        result = {"content": preview_lines(content, line_count, start_line)}
+        if style:
+            result.update(await highlight_file_preview(path, content, result["content"], start_line, style))
+        return result
+    except RateLimitExceeded:
+        raise
+    except httpx.HTTPStatusError as e:
+        return {
+            "content": f"// Error {e.response.status_code}: could not fetch the file"
+        }
     except Exception as e:
         return {"content": f"// Error decoding file: {e}"}
 
 
+async def fetch_files_from_repository(
+    owner: str,
+    repo: str,
+    paths: list[str],
+    token: Optional[str] = None,
+    branch: str = "main",
+    start_line: int = 1,
+    line_count: int = 30,
+    priority: int = PRIORITY_PREVIEW,
+    sha_commit: Optional[str] = None,
+    style: Optional[str] = None
+) -> dict:
+    """
+    Fetch previews of several files of one repository and ref.
+    The branch is resolved once (not at all when sha_commit is given) and
+    cache misses are fetched concurrently, at most
+    PREVIEW_BATCH_CONCURRENCY at a time.
+    Returns the previews keyed by path.
+    """
+    try:
+        if sha_commit is None:
+            sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+    except httpx.HTTPStatusError as e:
+        error = {"content": f"// Error {e.response.status_code}: could not fetch the file"}
+        return {path: error for path in paths}
+
+    semaphore = asyncio.Semaphore(settings.PREVIEW_BATCH_CONCURRENCY)
+
+    async def fetch(path: str) -> dict:
+        async with semaphore:
+            return await fetch_file_from_repository(
+                owner, repo, path, token,
+                branch=branch,
+                start_line=start_line,
+                line_count=line_count,
+                sha_commit=sha_commit,
+                priority=priority,
+                style=style
+            )
+
+    unique_paths = list(dict.fromkeys(paths))
+    results = await asyncio.gather(*(fetch(path) for path in unique_paths))
+    return dict(zip(unique_paths, results))
+
+
 async def transfer_repository(
     user: dict,
     seller_id: int,
     repo_name: str,
-    repo_url: str
+    repo_url: str,
+    progress: Optional[ProgressCallback] = None,
+    target: Optional[TransferTarget] = None
 ) -> dict:
     """
     Transfer a repository from a seller to a buyer (current user).
-    Downloads the repo from the seller's account and uploads it to the buyer's account.
+    Safe to retry with the same `target`: the buyer's repository is created
+    once, a repository that already holds the pushed files is not pushed
+    again, and saving the purchase twice keeps the first record.
+    When the seller's repository is a template the buyer can read, GitHub
+    generates the buyer's copy and no engine runs at all.
+    Each stage (downloading, extracting, creating_repo, pushing, saving) is
+    reported to `progress`, with byte counts where they are known.
+    The result records the strategy used and how long the copy took.
+    With the "mirror" engine the buyer's repository is pushed, with its full
+    history, from a local bare mirror of the seller's repository; with the
+    "archive" engine the zipball is downloaded and uploaded as one commit,
+    and the "packfile" engine builds that commit in memory from the zipball.
+    Both take the zipball from the archive store, for the pinned commit or,
+    on unpinned listings, the head of the branch resolved first.
     """
     ic("Initializing repository transfer")
     try:
@@ -276,58 +1119,132 @@ async def transfer_repository(
         ic(f"Seller token: {'***' if seller_token else None}, Buyer token: {'***' if buyer_token else None}")
 
         # Get repository information from the seller's account
-        ic("Getting seller's repositories with ID:", seller_id)
-        seller_repos = get_set_repositories(user_id=seller_id)
-        ic("Seller's repositories obtained:")
-        ic("Getting repo_id for repository with URL:", repo_url)
-        repo_id = next(
-            (repo["repository_id"] for repo in seller_repos if repo["url"] == repo_url),
-            None
-        )
+        ic("Getting seller's listing with URL:", seller_id, repo_url)
+        source_repo = get_listing_by_url(seller_id, repo_url)
+        repo_id = source_repo["repository_id"] if source_repo else None
         ic("Repo ID found:", repo_id)
+        if not source_repo:
+            raise Exception("Source repository not found")
+        branch = source_repo.get("branch") or "main"
+        # Transfer exactly the commit the listing was pinned to
+        commit_sha = source_repo.get("commit_sha")
 
-        # Download the repository from the seller's account
-        ic("Downloading seller's repository:", repo_name)
-        downloaded_path, temp_dir = download_github_repository(
-            owner=owner,
-            repo=repo_name,
-            access_token=seller_token
-        )
-        ic("Repository downloaded at:", downloaded_path, "with temp dir:", temp_dir)
-
-        # Upload the repository to the buyer's account
         unique_name = f"AgoraPay-{repo_name}"
-        ic("Uploading repository to buyer's GitHub with name:", unique_name)
-        new_repo_url = upload_repository_to_github(
-            local_repo_path=downloaded_path,
-            new_repo_name=unique_name,
-            github_token=buyer_token
-        )
-        ic("Repository uploaded successfully. New repository URL:", new_repo_url)
+        started = time.monotonic()
+        target = target or TransferTarget()
+        if target.clone_url is None and target.retry:
+            # An earlier attempt may have created the repository and stopped before storing it
+            existing_url = await find_github_repository(unique_name, buyer_token)
+            if existing_url is not None:
+                await target.created(existing_url, target.strategy)
+        resumed = target.clone_url is not None
+        generated_url = None
+        if not resumed and settings.TRANSFER_TEMPLATE_GENERATE:
+            generated_url = await generate_from_template(
+                owner, repo_name, unique_name, buyer_token, branch=branch, sha_commit=commit_sha, progress=progress
+            )
+
+        if generated_url is not None:
+            strategy = STRATEGY_TEMPLATE
+            new_repo_url = await target.created(generated_url, strategy)
+            ic("Repository generated by GitHub from template:", unique_name)
+        elif resumed and not await is_repository_empty(target.clone_url, buyer_token):
+            # An earlier attempt already pushed (or generated) the files
+            strategy = target.strategy or settings.TRANSFER_ENGINE
+            new_repo_url = target.clone_url
+            ic("Buyer's repository already holds the files:", new_repo_url, strategy)
+        elif settings.TRANSFER_ENGINE == "mirror":
+            strategy = STRATEGY_MIRROR
+            # Refresh the local mirror and push the real history to the buyer
+            ic("Refreshing mirror of seller's repository:", repo_name)
+            await report_progress(progress, STAGE_DOWNLOADING)
+
+            async def fetched(done: int, total: Optional[int]) -> None:
+                await report_progress(progress, STAGE_DOWNLOADING, done, total)
+
+            async def pushed(done: int, total: Optional[int]) -> None:
+                await report_progress(progress, STAGE_PUSHING, done, total)
+
+            mirror_path = await ensure_mirror(owner, repo_name, seller_token, on_bytes=fetched)
+
+            ic("Creating buyer's repository with name:", unique_name)
+            await report_progress(progress, STAGE_CREATING_REPO)
+            new_repo_url = await target.create(unique_name, buyer_token, strategy)
+            await report_progress(progress, STAGE_PUSHING)
+            await push_from_mirror(
+                mirror_path, new_repo_url, buyer_token, branch=branch, sha_commit=commit_sha, on_bytes=pushed
+            )
+        elif settings.TRANSFER_ENGINE == "packfile":
+            strategy = STRATEGY_PACKFILE
+            # Unpinned listings copy the current head, through the archive store as well
+            commit_sha = commit_sha or await resolve_branch_sha(owner, repo_name, branch, seller_token, PRIORITY_TRANSFER)
+            # Build the commit from the stored zipball in memory and push it as a packfile
+            ic("Uploading seller's archive as a packfile with name:", unique_name)
+            new_repo_url = await upload_archive_to_github(
+                owner=owner,
+                repo=repo_name,
+                new_repo_name=unique_name,
+                seller_token=seller_token,
+                buyer_token=buyer_token,
+                sha_commit=commit_sha,
+                progress=progress,
+                target=target
+            )
+        else:
+            strategy = STRATEGY_ARCHIVE
+            commit_sha = commit_sha or await resolve_branch_sha(owner, repo_name, branch, seller_token, PRIORITY_TRANSFER)
+            # Extracted files live in a workspace admitted against the disk
+            # quota and removed however the transfer ends; the zipball stays
+            # in the archive store
+            manifest = get_repository_manifest(repo_id) if repo_id else None
+            expected_bytes = (manifest or {}).get("total_size")
+            async with workspace_manager.workspace(expected_bytes) as workspace:
+                # Download the repository from the seller's account
+                ic("Downloading seller's repository:", repo_name)
+                downloaded_path, temp_dir = await download_github_repository(
+                    owner=owner,
+                    repo=repo_name,
+                    access_token=seller_token,
+                    branch=branch,
+                    sha_commit=commit_sha,
+                    progress=progress,
+                    workspace=workspace
+                )
+                ic("Repository downloaded at:", downloaded_path, "with temp dir:", temp_dir)
+
+                # Upload the repository to the buyer's account
+                ic("Uploading repository to buyer's GitHub with name:", unique_name)
+                new_repo_url = await upload_repository_to_github(
+                    local_repo_path=downloaded_path,
+                    new_repo_name=unique_name,
+                    github_token=buyer_token,
+                    progress=progress,
+                    target=target,
+                    workspace=workspace
+                )
+        duration = round(time.monotonic() - started, 3)
+        ic("Repository uploaded successfully. New repository URL:", new_repo_url, strategy, duration)
 
         # Save repo information in the database
         ic("Saving transferred repository information in the database")
-        source_repo = next(
-            (repo for repo in seller_repos if repo["repository_id"] == repo_id),
-            None
-        )
-        if not source_repo:
-            raise Exception("Source repository not found")
-
+        await report_progress(progress, STAGE_SAVING)
         transfer_response = save_transfer_repo(
             user_id=user["id"],
             repo_name=unique_name,
             repo_url=new_repo_url,
             seller_id=seller_id,
             seller_repo_id=repo_id,
-            branch=source_repo.get("branch", "main")
+            branch=branch,
+            commit_sha=commit_sha
         )
         ic("Database response after saving transfer:", transfer_response)
 
         ic("Repository transfer completed successfully")
         return {
             "message": "Repository transferred successfully",
-            "repo_url": transfer_response
+            "repo_url": transfer_response,
+            "strategy": strategy,
+            "duration_seconds": duration
         }
 
     except HTTPException as http_exc:
@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from icecream import ic
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name, get_lexer_for_filename
+from pygments.styles import get_all_styles
+from pygments.util import ClassNotFound
+from server.config import settings
+from server.services.blob_cache import BlobCache
+
+HIGHLIGHT_STYLES = frozenset(get_all_styles())
+
+# Highlighted files keyed by "blob_sha:lexer:style". Like the blobs they are
+# rendered from, they never go stale.
+rendered_cache = BlobCache(
+    max_bytes=settings.HIGHLIGHT_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.HIGHLIGHT_CACHE_MAX_ENTRY_BYTES
+)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def lexer_for_path(path: str) -> str:
+    """
+    Pick a lexer from the file name alone, so choosing one costs no lexing.
+    Returns the lexer's short name, "text" when no lexer matches.
+    """
+    try:
+        aliases = get_lexer_for_filename(path).aliases
+    except ClassNotFound:
+        return "text"
+    return aliases[0] if aliases else "text"
+
+
+def render_html(code: str, lexer: str, style: str) -> str:
+    """
+    Highlight `code` as HTML with inline styles, one output line per source
+    line, so the result can be sliced like the source. Runs in the pool.
+    """
+    formatter = HtmlFormatter(style=style, noclasses=True, nowrap=True)
+    return highlight(code, get_lexer_by_name(lexer, stripnl=False, ensurenl=False), formatter)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Workers are started after the event loop and its threads are running;
+        # forking then can copy held locks into the child, so they are spawned
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.HIGHLIGHT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        ic("Highlight process pool started with workers:", settings.HIGHLIGHT_WORKERS)
+    return _executor
+
+
+async def render(code: str, lexer: str, style: str) -> str:
+    """
+    Highlight `code` in the process pool, keeping lexing off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), render_html, code, lexer, style)
+
+
+def stop_highlighter() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
@@ -0,0 +1,79 @@
+import asyncio
+import httpx
+from typing import Optional
+from icecream import ic
+from server.config import settings
+from server.utils.functions import github_parse_url, summarize_top_level, find_readme, preview_lines
+from server.utils.tree_stats import tree_statistics
+from server.services.github_ratelimit import PRIORITY_INTERACTIVE
+from server.services.github_service import resolve_branch_sha, get_tree_by_sha, fetch_blob
+from server.database.queries.user import get_token_by_user
+from server.database.queries.repository_manifest import (
+    mark_manifest_pending, save_repository_manifest, fail_repository_manifest
+)
+
+
+async def build_repository_manifest(
+    owner: str,
+    repo: str,
+    branch: str = "main",
+    token: Optional[str] = None,
+    sha_commit: Optional[str] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> dict:
+    """
+    Build the manifest of a repository at the head of a branch (or at
+    sha_commit): the top-level tree summary, the size, file count and
+    language breakdown from tree_statistics, and the beginning of the README.
+    Uses the tree and blob caches.
+    """
+    if sha_commit is None:
+        sha_commit = await resolve_branch_sha(owner, repo, branch, token, priority)
+    tree = await get_tree_by_sha(owner, repo, sha_commit, token, priority)
+    entries = tree.get("tree", [])
+
+    readme_excerpt = None
+    readme = find_readme(entries)
+    if readme is not None:
+        content = await fetch_blob(owner, repo, readme["sha"], token, priority)
+        readme_excerpt = preview_lines(content, settings.MANIFEST_README_LINES)[:settings.MANIFEST_README_MAX_CHARS]
+
+    stats = await asyncio.to_thread(tree_statistics, entries)
+    return {
+        "head_sha": sha_commit,
+        "readme_excerpt": readme_excerpt,
+        "file_count": stats["file_count"],
+        "total_size": stats["total_size"],
+        "languages": stats["languages"],
+        "tree_summary": summarize_top_level(entries)
+    }
+
+
+async def capture_repository_manifest(
+    repository_id: int,
+    uploader_id: int,
+    repo_url: str,
+    branch: str = "main",
+    sha_commit: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Capture and store the manifest of a listed repository. Meant to run as a
+    background task; failures are recorded on the manifest, not raised.
+    """
+    ic("Capturing manifest for repository:", repository_id)
+    try:
+        await asyncio.to_thread(mark_manifest_pending, repository_id)
+        owner, repo = github_parse_url(repo_url)
+        token = get_token_by_user(user_id=uploader_id)
+        data = await build_repository_manifest(owner, repo, branch, token, sha_commit)
+        manifest = await asyncio.to_thread(save_repository_manifest, repository_id, data)
+        ic("Manifest captured:", repository_id, data["file_count"], "files")
+        return manifest
+    except Exception as e:
+        error = f"GitHub error {e.response.status_code}" if isinstance(e, httpx.HTTPStatusError) else str(e)
+        ic("Manifest capture failed:", repository_id, error)
+        try:
+            await asyncio.to_thread(fail_repository_manifest, repository_id, error)
+        except Exception:
+            pass
+        return None
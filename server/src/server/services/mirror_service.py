@@ -0,0 +1,177 @@
+import asyncio
+import fcntl
+import os
+import shutil
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from icecream import ic
+from server.config import settings
+from server.utils.git import git_auth_env, run_git, parse_progress_bytes
+
+# on_bytes(done_bytes, total_bytes); total_bytes is only known once done
+BytesCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+# Only branches and tags are mirrored: GitHub also advertises refs/pull/*,
+# which would pull every pull request head into the mirror.
+MIRROR_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+
+def get_mirror_path(owner: str, repo: str) -> Path:
+    """
+    Location of the local bare mirror of a GitHub repository.
+    """
+    return Path(settings.MIRROR_ROOT) / owner.lower() / f"{repo.lower()}.git"
+
+
+def _byte_progress(on_bytes: Optional[BytesCallback]):
+    # Turns git --progress lines into byte counts for on_bytes
+    if on_bytes is None:
+        return None
+
+    async def on_progress(line: str) -> None:
+        parsed = parse_progress_bytes(line)
+        if parsed is not None:
+            done, complete = parsed
+            await on_bytes(done, done if complete else None)
+
+    return on_progress
+
+
+def _lock_path(path: Path) -> Path:
+    # Next to the mirror rather than inside it, so evicting the mirror keeps it
+    return path.with_name(f"{path.name}.lock")
+
+
+def _directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+@asynccontextmanager
+async def _locked(path: Path, exclusive: bool):
+    """
+    Hold a mirror's lock file: shared while pushing from it, exclusive while
+    fetching into it or evicting it. flock locks are shared with the other
+    processes using MIRROR_ROOT. Using a mirror also refreshes the lock
+    file's modification time, which orders the eviction.
+    """
+    lock_path = _lock_path(path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    mode = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+    with open(lock_path, "a") as lock:
+        while True:
+            try:
+                fcntl.flock(lock, mode)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(settings.MIRROR_LOCK_POLL_INTERVAL)
+        try:
+            os.utime(lock_path)
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def evict_mirrors(max_bytes: int, keep: Optional[Path] = None) -> list[Path]:
+    """
+    Remove the least recently used mirrors until they take at most
+    max_bytes. Mirrors being fetched or pushed from (locked), and `keep`,
+    are never removed. Returns the removed mirrors.
+    """
+    root = Path(settings.MIRROR_ROOT)
+    if not root.exists():
+        return []
+    mirrors = []
+    for path in root.glob("*/*.git"):
+        try:
+            last_used = _lock_path(path).stat().st_mtime
+        except FileNotFoundError:
+            last_used = 0.0
+        mirrors.append((last_used, path, _directory_size(path)))
+    total = sum(size for _, _, size in mirrors)
+
+    removed = []
+    for _, path, size in sorted(mirrors, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        with open(_lock_path(path), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        total -= size
+        removed.append(path)
+        ic("Evicted mirror:", path)
+    return removed
+
+
+async def ensure_mirror(owner: str, repo: str, token: str, on_bytes: Optional[BytesCallback] = None) -> Path:
+    """
+    Create or refresh the local bare mirror of owner/repo.
+    The first call fetches the whole repository; later calls run an
+    incremental fetch that only transfers objects the mirror lacks.
+    The bytes received are reported to on_bytes as the fetch runs.
+    Afterwards, the least recently used mirrors are evicted beyond
+    MIRROR_MAX_BYTES.
+    Returns the path to the bare repository.
+    """
+    path = get_mirror_path(owner, repo)
+    env = git_auth_env(token)
+
+    async with _locked(path, exclusive=True):
+        if not (path / "HEAD").exists():
+            ic("Creating bare mirror:", path)
+            path.mkdir(parents=True, exist_ok=True)
+            await run_git(["init", "--bare", "--quiet", str(path)])
+            await run_git(["remote", "add", "origin", f"https://github.com/{owner}/{repo}.git"], cwd=path)
+            for index, refspec in enumerate(MIRROR_REFSPECS):
+                action = "--replace-all" if index == 0 else "--add"
+                await run_git(["config", action, "remote.origin.fetch", refspec], cwd=path)
+
+        ic("Fetching into mirror:", path)
+        await run_git(["fetch", "--prune", "--progress", "origin"], cwd=path, env=env, on_progress=_byte_progress(on_bytes))
+
+    await asyncio.to_thread(evict_mirrors, settings.MIRROR_MAX_BYTES, path)
+    return path
+
+
+async def push_from_mirror(
+    mirror_path: Path,
+    clone_url: str,
+    token: str,
+    branch: str = "main",
+    sha_commit: Optional[str] = None,
+    on_bytes: Optional[BytesCallback] = None
+) -> None:
+    """
+    Push `branch` of a local mirror, or the commit `sha_commit` when given,
+    with its full history, to `clone_url` as the `main` branch.
+    The bytes written are reported to on_bytes as the push runs.
+    The mirror is locked (shared) for the push, so a concurrent fetch
+    cannot prune refs or repack under it, nor can it be evicted.
+    Raises FileNotFoundError if the mirror was evicted since ensure_mirror().
+    """
+    source = sha_commit or f"refs/heads/{branch}"
+    async with _locked(mirror_path, exclusive=False):
+        if not (mirror_path / "HEAD").exists():
+            raise FileNotFoundError(f"Mirror was evicted before the push: {mirror_path}")
+        ic("Pushing from mirror:", mirror_path, source)
+        await run_git(
+            ["push", "--progress", clone_url, f"{source}:refs/heads/main"],
+            cwd=mirror_path,
+            env=git_auth_env(token),
+            on_progress=_byte_progress(on_bytes)
+        )
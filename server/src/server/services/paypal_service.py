@@ -3,7 +3,7 @@ import os
 from dotenv import load_dotenv
 import requests
 import urllib.parse
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 load_dotenv()
 
@@ -118,6 +118,70 @@ async def create_order(amount: float, product_name: str, seller_id: str, repo_ur
             raise
 
 
+async def create_cart_order(items: List[Dict[str, Any]], buyer_id: int, request_id: str) -> Dict[str, Any]:
+    """
+    Creates a single PayPal order with one purchase unit per cart item,
+    to be captured at once. Each unit references the listing it pays for
+    and carries the buyer's ID. PayPal returns the same order for repeated
+    calls with the same request_id (PayPal-Request-Id), so retrying a
+    checkout does not create a second order.
+    """
+    token = await get_access_token()
+    backend_url = get_base_url()
+
+    order_data = {
+        "intent": "CAPTURE",
+        "purchase_units": [
+            {
+                "reference_id": str(item["repository_id"]),
+                "custom_id": str(buyer_id),
+                "description": item["name"][:127],
+                "amount": {
+                    "currency_code": "USD",
+                    "value": f"{item['price']:.2f}"
+                }
+            } for item in items
+        ],
+        "application_context": {
+            "return_url": f"{backend_url}/cart/success",
+            "cancel_url": f"{backend_url}/cancel",
+            "user_action": "PAY_NOW"
+        }
+    }
+    print(f"Creating cart order with {len(items)} purchase units")
+
+    async with httpx.AsyncClient() as client:
+        res = await client.post(
+            f"{PAYPAL_API}/v2/checkout/orders",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+                "PayPal-Request-Id": request_id
+            },
+            json=order_data
+        )
+        res.raise_for_status()
+        return res.json()
+
+
+async def capture_order(order_id: str) -> Dict[str, Any]:
+    """
+    Captures every purchase unit of an approved order in one call.
+    """
+    token = await get_access_token()
+    async with httpx.AsyncClient() as client:
+        res = await client.post(
+            f"{PAYPAL_API}/v2/checkout/orders/{order_id}/capture",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+                "Prefer": "return=representation"
+            }
+        )
+        res.raise_for_status()
+        return res.json()
+
+
 async def authorize_payment(order_id):
     access_token = await get_access_token()
 
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Optional
+from fastapi import HTTPException
+from icecream import ic
+from server.config import settings
+from server.database.models.transfer_job import PRIORITY_PAID, PRIORITY_FREE
+from server.database.queries.transfer_job import (
+    claim_transfer_job, complete_transfer_job, fail_transfer_job, requeue_stale_transfer_jobs,
+    update_transfer_progress, renew_transfer_lease, record_transfer_target
+)
+from server.services.github_service import TransferTarget, transfer_repository
+
+# Worker tasks owned by this process, started and stopped by the lifespan
+_workers: list[asyncio.Task] = []
+
+
+def _worker_id(index: int) -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+class JobProgress:
+    """
+    Progress callback that stores a job's stage and byte counts.
+    Stage changes are written immediately; byte updates within a stage at
+    most every TRANSFER_PROGRESS_INTERVAL seconds.
+    """
+
+    def __init__(self, job_id: int, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stage: Optional[str] = None
+        self._written_at = 0.0
+
+    async def __call__(self, stage: str, done: int = 0, total: Optional[int] = None) -> None:
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if stage == self._stage and not finished and now - self._written_at < settings.TRANSFER_PROGRESS_INTERVAL:
+            return
+        self._stage = stage
+        self._written_at = now
+        try:
+            await asyncio.to_thread(update_transfer_progress, self.job_id, self.worker_id, stage, done, total)
+        except Exception as e:
+            ic("Could not store transfer progress:", self.job_id, str(e))
+
+
+async def _renew_lease(job_id: int, worker_id: str, transfer: asyncio.Task) -> bool:
+    """
+    Renew a running job's lease every TRANSFER_HEARTBEAT_INTERVAL seconds,
+    however long a stage takes without reporting progress. If the lease was
+    lost (requeued after a stall), the transfer is cancelled so that two
+    workers never run the same job. Returns True when that happened.
+    """
+    while True:
+        await asyncio.sleep(settings.TRANSFER_HEARTBEAT_INTERVAL)
+        try:
+            held = await asyncio.to_thread(renew_transfer_lease, job_id, worker_id)
+        except Exception as e:
+            ic("Could not renew transfer lease:", job_id, str(e))
+            continue
+        if not held:
+            ic("Transfer lease lost, stopping job:", job_id)
+            transfer.cancel()
+            return True
+
+
+async def run_transfer_job(job: dict, worker_id: str) -> None:
+    """
+    Run one claimed job and record its outcome.
+    Retries reuse the buyer's repository created by an earlier attempt.
+    """
+    ic("Running transfer job:", job["job_id"], "attempt", job["attempts"])
+
+    async def record_target(repo_url: str, strategy: Optional[str]) -> None:
+        await asyncio.to_thread(record_transfer_target, job["job_id"], worker_id, repo_url, strategy)
+
+    target = TransferTarget(
+        clone_url=job.get("target_repo_url"),
+        strategy=job.get("strategy"),
+        retry=job["attempts"] > 1,
+        on_created=record_target
+    )
+    transfer = asyncio.create_task(transfer_repository(
+        user={"id": job["buyer_id"]},
+        seller_id=job["seller_id"],
+        repo_name=job["repo_name"],
+        repo_url=job["repo_url"],
+        progress=JobProgress(job["job_id"], worker_id),
+        target=target
+    ))
+    heartbeat = asyncio.create_task(_renew_lease(job["job_id"], worker_id, transfer))
+    try:
+        result = await transfer
+        if await asyncio.to_thread(complete_transfer_job, job["job_id"], worker_id, result):
+            ic("Transfer job completed:", job["job_id"])
+        else:
+            ic("Transfer lease lost before completion, result not stored:", job["job_id"])
+    except asyncio.CancelledError:
+        if heartbeat.done() and not heartbeat.cancelled() and heartbeat.result():
+            # The job now belongs to the queue again, do not record an outcome
+            return
+        raise
+    except Exception as e:
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        updated = await asyncio.to_thread(
+            fail_transfer_job, job["job_id"], worker_id, error, settings.TRANSFER_RETRY_DELAY
+        )
+        if updated is None:
+            ic("Transfer lease lost before failure, outcome not stored:", job["job_id"], error)
+        else:
+            ic("Transfer job failed:", job["job_id"], updated["status"], error)
+    finally:
+        heartbeat.cancel()
+
+
+async def _worker_loop(worker_id: str, priorities: list[int]) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(requeue_stale_transfer_jobs, settings.TRANSFER_JOB_LEASE)
+            job = await asyncio.to_thread(
+                claim_transfer_job, worker_id, priorities, settings.TRANSFER_MAX_RUNNING_PER_BUYER
+            )
+        except Exception as e:
+            ic("Transfer worker could not poll the queue:", worker_id, str(e))
+            job = None
+
+        if job is None:
+            await asyncio.sleep(settings.TRANSFER_POLL_INTERVAL)
+            continue
+
+        await run_transfer_job(job, worker_id)
+
+
+async def start_transfer_workers() -> None:
+    """
+    Start this node's workers. Paid workers take paid jobs before free ones;
+    free workers only take free jobs, so free transfers cannot occupy every
+    worker and paid transfers never wait behind them.
+    """
+    lanes = (
+        [[PRIORITY_PAID, PRIORITY_FREE]] * settings.TRANSFER_WORKERS_PAID
+        + [[PRIORITY_FREE]] * settings.TRANSFER_WORKERS_FREE
+    )
+    for index, priorities in enumerate(lanes):
+        worker_id = _worker_id(index)
+        _workers.append(asyncio.create_task(_worker_loop(worker_id, priorities), name=worker_id))
+    ic("Transfer workers started:", len(_workers))
+
+
+async def stop_transfer_workers() -> None:
+    """
+    Cancel this node's workers. Jobs they were running are requeued once
+    their lease expires.
+    """
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    ic("Transfer workers stopped")
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from icecream import ic
+from server.config import settings
+
+
+class TreeStore:
+    """
+    Persistent, size-bounded store of repository trees keyed by
+    (owner, repo, commit sha). A tree for a commit never changes, so entries
+    never go stale; least recently used entries are evicted once the stored
+    bytes exceed max_bytes. Backed by SQLite so it survives restarts.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trees (
+                    owner TEXT NOT NULL,
+                    repo TEXT NOT NULL,
+                    sha TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (owner, repo, sha)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_trees_last_access ON trees (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _key(owner: str, repo: str, sha: str) -> tuple[str, str, str]:
+        # GitHub owner and repository names are case insensitive
+        return owner.lower(), repo.lower(), sha
+
+    def get(self, owner: str, repo: str, sha: str) -> Optional[dict]:
+        key = self._key(owner, repo, sha)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT data FROM trees WHERE owner = ? AND repo = ? AND sha = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute(
+                "UPDATE trees SET last_access = ? WHERE owner = ? AND repo = ? AND sha = ?",
+                (time.time(), *key)
+            )
+            conn.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, owner: str, repo: str, sha: str, tree: dict) -> None:
+        data = zlib.compress(json.dumps(tree, separators=(",", ":")).encode())
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO trees (owner, repo, sha, data, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (*self._key(owner, repo, sha), data, len(data), time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM trees").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT owner, repo, sha, size FROM trees ORDER BY last_access").fetchall()
+        for owner, repo, sha, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM trees WHERE owner = ? AND repo = ? AND sha = ?", (owner, repo, sha))
+            total -= size
+            ic("Evicted tree:", owner, repo, sha)
+
+    def evict_repository(self, owner: str, repo: str) -> int:
+        """
+        Drop every tree stored for a repository.
+        Returns the number of evicted entries.
+        """
+        owner, repo, _ = self._key(owner, repo, "")
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM trees WHERE owner = ? AND repo = ?", (owner, repo)).rowcount
+            conn.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM trees").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+tree_store = TreeStore(settings.TREE_STORE_PATH, settings.TREE_STORE_MAX_BYTES)
@@ -0,0 +1,224 @@
+import asyncio
+import fcntl
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+from icecream import ic
+from server.config import settings
+
+
+class WorkspaceUnavailable(Exception):
+    """
+    Raised when a workspace cannot be admitted within the disk quota.
+    """
+
+
+def _directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _workspace_owner(path: Path) -> Optional[tuple[int, int]]:
+    """
+    Owning process ID and reserved bytes encoded in a workspace name
+    ("<pid>-<reserved bytes>-<id>"), None for anything else under the root.
+    """
+    pid, _, rest = path.name.partition("-")
+    reservation, _, _ = rest.partition("-")
+    if not pid.isdigit() or not path.is_dir():
+        return None
+    return int(pid), int(reservation) if reservation.isdigit() else 0
+
+
+class WorkspaceManager:
+    """
+    Allocates transfer working directories under one root (ideally a tmpfs)
+    and admits them against a total disk quota shared by every process
+    using the root. Each workspace reserves its expected size up front and
+    records it in its directory name; admission sums the reservations of
+    the workspaces whose process is alive, under a lock file, so workers of
+    several processes never admit more than the quota together. When the
+    quota is taken, new workspaces wait for others to be released, up to
+    admission_timeout seconds.
+    Workspaces are removed on every exit path; a reaper removes directories
+    left behind by processes that are gone.
+    """
+
+    def __init__(self, root: str, quota_bytes: int, admission_timeout: float, poll_interval: float):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self.admission_timeout = admission_timeout
+        self.poll_interval = poll_interval
+        self.reserved = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.reaped = 0
+        self._active: dict[Path, int] = {}
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _reserved_by_all(self) -> int:
+        total = 0
+        for path in self.root.iterdir():
+            owner = _workspace_owner(path)
+            if owner is not None and (owner[0] == os.getpid() or _process_alive(owner[0])):
+                total += owner[1]
+        return total
+
+    def _claim(self, path: Path, reservation: int) -> bool:
+        """
+        Create the workspace if its reservation fits in the quota left by
+        every live process. Returns False when it does not fit.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".admission.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self._reserved_by_all() + reservation > self.quota_bytes:
+                    return False
+                path.mkdir()
+                return True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _admit(self, path: Path, reservation: int) -> None:
+        if reservation > self.quota_bytes:
+            self.rejected += 1
+            raise WorkspaceUnavailable(f"Workspace of {reservation} bytes exceeds the quota of {self.quota_bytes} bytes")
+        deadline = time.monotonic() + self.admission_timeout
+        condition = self._get_condition()
+        while not await asyncio.to_thread(self._claim, path, reservation):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise WorkspaceUnavailable("Transfer workspace quota exhausted, try again later")
+            # Woken by releases in this process, polling for those of other processes
+            async with condition:
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout=min(self.poll_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        self.reserved += reservation
+        self.admitted += 1
+
+    async def _release(self, reservation: int) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.reserved -= reservation
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def workspace(self, expected_bytes: Optional[int] = None):
+        """
+        Yield a new empty directory, reserving expected_bytes of the quota
+        (WORKSPACE_DEFAULT_RESERVATION when unknown) until it is removed.
+        """
+        reservation = expected_bytes or settings.WORKSPACE_DEFAULT_RESERVATION
+        path = self.root / f"{os.getpid()}-{reservation}-{uuid.uuid4().hex}"
+        # Registered before the directory exists, so the reaper never sees it unowned
+        self._active[path] = reservation
+        try:
+            await self._admit(path, reservation)
+        except BaseException:
+            self._active.pop(path, None)
+            raise
+        try:
+            yield path
+        finally:
+            self._active.pop(path, None)
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            await self._release(reservation)
+
+    def reap(self) -> int:
+        """
+        Remove workspaces whose process is gone, and those of this process
+        that are no longer in use. Workspaces of other live processes are
+        left alone however old they are. Returns the number removed.
+        """
+        if not self.root.exists():
+            return 0
+        removed = 0
+        for path in self.root.iterdir():
+            if path in self._active:
+                continue
+            owner = _workspace_owner(path)
+            if owner is None:
+                continue
+            pid = owner[0]
+            if pid == os.getpid() or not _process_alive(pid):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                ic("Reaped transfer workspace:", path.name)
+        self.reaped += removed
+        return removed
+
+    def stats(self) -> dict:
+        exists = self.root.exists()
+        return {
+            "root": str(self.root),
+            "active": len(self._active),
+            "reserved_bytes": self.reserved,
+            "reserved_bytes_all_processes": self._reserved_by_all() if exists else 0,
+            "used_bytes": _directory_size(self.root) if exists else 0,
+            "quota_bytes": self.quota_bytes,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "reaped": self.reaped
+        }
+
+
+workspace_manager = WorkspaceManager(
+    root=settings.WORKSPACE_ROOT,
+    quota_bytes=settings.WORKSPACE_QUOTA_BYTES,
+    admission_timeout=settings.WORKSPACE_ADMISSION_TIMEOUT,
+    poll_interval=settings.WORKSPACE_ADMISSION_POLL_INTERVAL
+)
+
+# Reaper task owned by this process, started and stopped by the lifespan
+_reaper: Optional[asyncio.Task] = None
+
+
+async def _reaper_loop() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(workspace_manager.reap)
+        except Exception as e:
+            ic("Workspace reaper failed:", str(e))
+        await asyncio.sleep(settings.WORKSPACE_REAPER_INTERVAL)
+
+
+async def start_workspace_reaper() -> None:
+    global _reaper
+    _reaper = asyncio.create_task(_reaper_loop(), name="workspace-reaper")
+
+
+async def stop_workspace_reaper() -> None:
+    global _reaper
+    if _reaper is not None:
+        _reaper.cancel()
+        await asyncio.gather(_reaper, return_exceptions=True)
+        _reaper = None
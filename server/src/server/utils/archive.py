@@ -0,0 +1,81 @@
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def safe_member_path(target_dir: Path, member_name: str) -> Path:
+    """
+    Resolves the destination of a ZIP member inside target_dir.
+    Raises ValueError if the member would be written outside of it.
+    """
+    root = target_dir.resolve()
+    destination = (root / member_name).resolve()
+    if destination != root and root not in destination.parents:
+        raise ValueError(f"Unsafe path in archive: {member_name}")
+    return destination
+
+
+def _extract_members(zip_path: Path, target_dir: Path, names: list[str], chunk_size: int) -> int:
+    # Each worker opens its own handle: ZipFile objects are not thread safe
+    written = 0
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for name in names:
+            info = zip_ref.getinfo(name)
+            destination = safe_member_path(target_dir, name)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with zip_ref.open(info) as source, open(destination, "wb") as target:
+                shutil.copyfileobj(source, target, chunk_size)
+            mode = (info.external_attr >> 16) & 0o777
+            if mode & 0o111:
+                os.chmod(destination, mode)
+            written += info.file_size
+    return written
+
+
+def extract_zip(
+    zip_path: Path,
+    target_dir: Path,
+    workers: int = 1,
+    parallel_threshold: int = 0,
+    chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Extracts a ZIP archive entry by entry, copying each one in chunks so
+    memory use does not depend on file or archive size.
+    Archives whose uncompressed size reaches parallel_threshold are
+    extracted by `workers` threads. Returns the number of bytes written.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        members = zip_ref.infolist()
+
+    files = []
+    total_size = 0
+    for info in members:
+        destination = safe_member_path(target_dir, info.filename)
+        if info.is_dir():
+            destination.mkdir(parents=True, exist_ok=True)
+        else:
+            files.append(info)
+            total_size += info.file_size
+
+    if workers <= 1 or total_size < parallel_threshold or len(files) < 2:
+        return _extract_members(zip_path, target_dir, [info.filename for info in files], chunk_size)
+
+    # Balance the workers by size, largest entries first
+    buckets = [[] for _ in range(workers)]
+    loads = [0] * workers
+    for info in sorted(files, key=lambda item: item.file_size, reverse=True):
+        index = loads.index(min(loads))
+        buckets[index].append(info.filename)
+        loads[index] += info.file_size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda names: _extract_members(zip_path, target_dir, names, chunk_size),
+            [bucket for bucket in buckets if bucket]
+        )
+        return sum(results)
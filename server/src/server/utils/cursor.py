@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Encodes the sort key of the last returned row as an opaque, URL-safe cursor.
+    """
+    data = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes a cursor made by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def cursor_after_id(cursor: Optional[str]) -> Optional[int]:
+    """
+    Returns the last ID seen by a keyset cursor over IDs, None without a cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    after_id = decode_cursor(cursor).get("id")
+    if not isinstance(after_id, int):
+        raise ValueError("Invalid cursor")
+    return after_id
+
+
+def keyset_page(rows: Optional[list], limit: int, key: str = "repository_id") -> tuple[list, Optional[str]]:
+    """
+    Splits the limit + 1 rows fetched for a page into the page itself and
+    the cursor of the next page, None when this is the last one.
+    """
+    rows = rows or []
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor({"id": page[-1][key]})
@@ -1,4 +1,5 @@
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qs
+from typing import Optional
 
 def github_parse_url(repo_url: str) -> tuple[str, str]:
     """
@@ -9,3 +10,98 @@ def github_parse_url(repo_url: str) -> tuple[str, str]:
     if len(parts) != 2:
         raise ValueError(f"Invalid URL: {repo_url}")
     return parts[0], parts[1]
+
+
+def parse_link_header(link_header: Optional[str]) -> dict:
+    """
+    Parses a GitHub pagination Link header into a {rel: url} dictionary.
+    """
+    links = {}
+    if not link_header:
+        return links
+    for part in link_header.split(","):
+        url_part, _, params = part.partition(";")
+        url = url_part.strip().strip("<>")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "rel":
+                for rel in value.strip('"').split():
+                    links[rel] = url
+    return links
+
+
+def link_page_number(url: str) -> int:
+    """
+    Extracts the `page` query parameter of a pagination link.
+    """
+    page = parse_qs(urlparse(url).query).get("page", ["1"])[0]
+    return int(page)
+
+
+def preview_lines(content: bytes, line_count: int = 30, start_line: int = 1) -> str:
+    """
+    Returns `line_count` lines of `content` starting at `start_line` (1-based),
+    decoding only the bytes that are needed.
+    """
+    begin = 0
+    for _ in range(start_line - 1):
+        position = content.find(b"\n", begin)
+        if position == -1:
+            return ""
+        begin = position + 1
+
+    end = begin
+    for _ in range(line_count):
+        position = content.find(b"\n", end)
+        if position == -1:
+            end = len(content)
+            break
+        end = position + 1
+
+    text = content[begin:end].decode("utf-8", errors="ignore")
+    return "\n".join(text.splitlines()[:line_count])
+
+
+# File extensions counted in a repository's language breakdown
+EXTENSION_LANGUAGES = {
+    ".py": "Python", ".ipynb": "Jupyter Notebook", ".js": "JavaScript", ".jsx": "JavaScript",
+    ".mjs": "JavaScript", ".ts": "TypeScript", ".tsx": "TypeScript", ".html": "HTML", ".css": "CSS",
+    ".scss": "SCSS", ".vue": "Vue", ".svelte": "Svelte", ".java": "Java", ".kt": "Kotlin",
+    ".scala": "Scala", ".go": "Go", ".rs": "Rust", ".c": "C", ".h": "C", ".cpp": "C++", ".cc": "C++",
+    ".hpp": "C++", ".cs": "C#", ".rb": "Ruby", ".php": "PHP", ".swift": "Swift", ".m": "Objective-C",
+    ".dart": "Dart", ".lua": "Lua", ".r": "R", ".jl": "Julia", ".sh": "Shell", ".bash": "Shell",
+    ".ps1": "PowerShell", ".sql": "SQL", ".sol": "Solidity", ".ex": "Elixir", ".exs": "Elixir",
+    ".erl": "Erlang", ".hs": "Haskell", ".clj": "Clojure", ".zig": "Zig", ".nim": "Nim"
+}
+
+
+def summarize_top_level(entries: list[dict]) -> list[dict]:
+    """
+    Summarizes the top-level entries of a recursive git tree with the number
+    of files and bytes below each of them, directories first.
+    """
+    top_level: dict[str, dict] = {}
+    for entry in entries:
+        root, separator, _ = entry["path"].partition("/")
+        if not separator:
+            top_level.setdefault(root, {"path": root, "type": entry.get("type"), "files": 0, "size": 0})
+        if entry.get("type") != "blob":
+            continue
+        summary = top_level.setdefault(root, {"path": root, "type": "tree", "files": 0, "size": 0})
+        summary["files"] += 1
+        summary["size"] += entry.get("size", 0)
+    return sorted(top_level.values(), key=lambda item: (item["type"] != "tree", item["path"]))
+
+
+def find_readme(entries: list[dict]) -> Optional[dict]:
+    """
+    Returns the tree entry of the repository's root README, if any.
+    """
+    readmes = [
+        entry for entry in entries
+        if entry.get("type") == "blob" and "/" not in entry["path"]
+        and entry["path"].lower().split(".")[0] == "readme"
+    ]
+    # Prefer README.md over other formats
+    readmes.sort(key=lambda entry: (not entry["path"].lower().endswith(".md"), entry["path"]))
+    return readmes[0] if readmes else None
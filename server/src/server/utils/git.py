@@ -0,0 +1,93 @@
+import asyncio
+import base64
+import os
+import re
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+# "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00 MiB/s", as written by fetch and push --progress
+_PROGRESS = re.compile(r"(?:Receiving|Writing) objects:\s+(\d+)% \(\d+/\d+\), ([\d.]+) (bytes|KiB|MiB|GiB)")
+_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+
+
+def git_auth_env(token: str) -> dict:
+    """
+    Environment that makes git authenticate HTTPS requests with a GitHub
+    token without writing it to a remote URL, the repository config or the
+    process arguments.
+    """
+    basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+    return {
+        **os.environ,
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}"
+    }
+
+
+def parse_progress_bytes(line: str) -> Optional[tuple[int, bool]]:
+    """
+    Reads the bytes transferred so far from a git progress line.
+    Returns the byte count and whether the transfer is complete, or None
+    for lines without a byte count.
+    """
+    match = _PROGRESS.search(line)
+    if match is None:
+        return None
+    percent, amount, unit = match.groups()
+    return int(float(amount) * _UNITS[unit]), percent == "100"
+
+
+async def run_git(
+    args: list[str],
+    cwd: Optional[Path] = None,
+    env: Optional[dict] = None,
+    on_progress: Optional[Callable[[str], Awaitable[None]]] = None
+) -> None:
+    """
+    Run a git command without blocking the event loop.
+    With on_progress, stderr (where --progress output goes) is read as it
+    is written and every line, including the \r-terminated updates, is
+    passed to it.
+    Raises CalledProcessError if the command fails.
+    """
+    if on_progress is None:
+        process = await asyncio.create_subprocess_exec("git", *args, cwd=cwd, env=env)
+        return_code = await process.wait()
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, ["git", *args])
+        return
+
+    process = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=cwd, env=env, stderr=asyncio.subprocess.PIPE
+    )
+    # Last lines of stderr, kept for the error of a failed command
+    tail: deque[str] = deque(maxlen=20)
+    pending = b""
+    while chunk := await process.stderr.read(4096):
+        *lines, pending = re.split(rb"[\r\n]", pending + chunk)
+        for line in lines:
+            if line:
+                text = line.decode(errors="replace")
+                tail.append(text)
+                await on_progress(text)
+    return_code = await process.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, ["git", *args], stderr="\n".join(tail))
+
+
+async def import_working_tree(work_tree: Path, remote_url: str, message: str, env: Optional[dict] = None) -> None:
+    """
+    Commit every file of work_tree as a new repository and push it to the
+    `main` branch of remote_url.
+    Raises CalledProcessError if any git command fails.
+    """
+    await run_git(["init"], cwd=work_tree)
+    await run_git(["remote", "add", "origin", remote_url], cwd=work_tree)
+    await run_git(["add", "."], cwd=work_tree)
+    await run_git(["commit", "-m", message], cwd=work_tree, env=env)
+    await run_git(["branch", "-M", "main"], cwd=work_tree)
+    await run_git(["push", "-u", "origin", "main"], cwd=work_tree, env=env)
@@ -0,0 +1,122 @@
+import stat
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional
+from dulwich.client import get_transport_and_path
+from dulwich.object_store import MemoryObjectStore
+from dulwich.objects import Blob, Commit, Tree
+
+# Git file modes
+MODE_FILE = 0o100644
+MODE_EXECUTABLE = 0o100755
+MODE_SYMLINK = 0o120000
+MODE_TREE = 0o040000
+
+
+def _entry_mode(info: zipfile.ZipInfo) -> int:
+    unix_mode = info.external_attr >> 16
+    if stat.S_ISLNK(unix_mode):
+        return MODE_SYMLINK
+    if unix_mode & 0o111:
+        return MODE_EXECUTABLE
+    return MODE_FILE
+
+
+def _write_tree(object_store: MemoryObjectStore, node: dict) -> bytes:
+    tree = Tree()
+    for name, child in node.items():
+        if isinstance(child, dict):
+            tree.add(name, MODE_TREE, _write_tree(object_store, child))
+        else:
+            tree.add(name, *child)
+    object_store.add_object(tree)
+    return tree.id
+
+
+def build_commit_from_zip(
+    zip_path: Path,
+    object_store: MemoryObjectStore,
+    message: str,
+    author: str,
+    strip_root: bool = True
+) -> bytes:
+    """
+    Adds the files of a ZIP archive to object_store as git blobs, trees and
+    a single root commit, reading entries straight from the archive.
+    With strip_root, the top-level folder GitHub wraps zipballs in is
+    removed from every path. Returns the commit id.
+    """
+    root: dict = {}
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            parts = info.filename.split("/")
+            if strip_root:
+                parts = parts[1:]
+            if not parts or any(part in ("", ".", "..", ".git") for part in parts):
+                raise ValueError(f"Unsafe path in archive: {info.filename}")
+
+            blob = Blob.from_string(zip_ref.read(info))
+            object_store.add_object(blob)
+
+            node = root
+            for part in parts[:-1]:
+                node = node.setdefault(part.encode(), {})
+                if not isinstance(node, dict):
+                    raise ValueError(f"Conflicting path in archive: {info.filename}")
+            node[parts[-1].encode()] = (_entry_mode(info), blob.id)
+
+    commit = Commit()
+    commit.tree = _write_tree(object_store, root)
+    commit.author = commit.committer = author.encode()
+    commit.author_time = commit.commit_time = int(time.time())
+    commit.author_timezone = commit.commit_timezone = 0
+    commit.encoding = b"UTF-8"
+    commit.message = f"{message}\n".encode()
+    object_store.add_object(commit)
+    return commit.id
+
+
+def push_commit(
+    remote_url: str,
+    object_store: MemoryObjectStore,
+    commit_id: bytes,
+    ref: str = "refs/heads/main",
+    token: Optional[str] = None
+) -> None:
+    """
+    Pushes commit_id and every object it references to `ref` of remote_url,
+    generating the packfile in memory. HTTPS remotes authenticate with the
+    GitHub token; local paths are supported for benchmarks and tests.
+    Raises RuntimeError if the remote rejects the update.
+    """
+    credentials = {"username": "x-access-token", "password": token} if token else {}
+    client, path = get_transport_and_path(remote_url, **credentials)
+
+    def update_refs(refs: dict) -> dict:
+        return {**refs, ref.encode(): commit_id}
+
+    result = client.send_pack(path, update_refs, object_store.generate_pack_data)
+    error = (result.ref_status or {}).get(ref.encode())
+    if error:
+        raise RuntimeError(f"Push rejected: {error}")
+
+
+def push_zip_as_commit(
+    zip_path: Path,
+    remote_url: str,
+    message: str,
+    author: str,
+    token: Optional[str] = None,
+    strip_root: bool = True
+) -> str:
+    """
+    Imports a ZIP archive as a single commit on `main` of remote_url without
+    a working tree or a git subprocess. Returns the commit id.
+    """
+    object_store = MemoryObjectStore()
+    commit_id = build_commit_from_zip(zip_path, object_store, message, author, strip_root)
+    push_commit(remote_url, object_store, commit_id, token=token)
+    return commit_id.decode()
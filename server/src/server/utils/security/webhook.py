@@ -0,0 +1,21 @@
+import hashlib
+import hmac
+from typing import Optional
+
+
+def github_signature(body: bytes, secret: str) -> str:
+    """
+    Computes the X-Hub-Signature-256 header GitHub sends for a payload.
+    """
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_github_signature(body: bytes, signature: Optional[str], secret: Optional[str]) -> bool:
+    """
+    Checks a webhook payload against its X-Hub-Signature-256 header in
+    constant time. Always fails when no secret is configured.
+    """
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(github_signature(body, secret), signature)
@@ -0,0 +1,120 @@
+import numpy as np
+from server.utils.functions import EXTENSION_LANGUAGES
+
+# Extensions are packed one byte per character into a uint64 code, so
+# grouping files by extension is a numeric unique instead of a string sort
+EXTENSION_CODE_CHARS = 8
+_SEPARATOR = 0  # git paths never contain NUL
+_DOT = ord(".")
+_SLASH = ord("/")
+
+
+def _decode_extension(code: int) -> str:
+    return "." + code.to_bytes(EXTENSION_CODE_CHARS, "little").rstrip(b"\0").decode("ascii")
+
+
+def _last_before(positions: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Last of the sorted positions before each end, -1 when there is none
+    if len(positions) == 0:
+        return np.full(len(ends), -1)
+    index = np.searchsorted(positions, ends) - 1
+    return np.where(index >= 0, positions[np.maximum(index, 0)], -1)
+
+
+def tree_columns(entries: list[dict]) -> tuple[list[str], np.ndarray, int]:
+    """
+    Splits the entries of a recursive git tree into columns: paths of the
+    blobs, their sizes as an array and the number of subdirectories.
+    """
+    blobs = [entry for entry in entries if entry.get("type") == "blob"]
+    paths = [entry["path"] for entry in blobs]
+    sizes = np.fromiter((entry.get("size", 0) for entry in blobs), dtype=np.int64, count=len(blobs))
+    directories = sum(1 for entry in entries if entry.get("type") == "tree")
+    return paths, sizes, directories
+
+
+def extension_codes(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the lowercased extension of every path as a uint64 code, 0 for
+    files without an extension. The paths are scanned as one UTF-8 buffer.
+    Returns the codes and a mask of the paths whose extension does not fit
+    in a code (long or non-ASCII extensions).
+    """
+    if not paths:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+
+    buffer = np.frombuffer(("\0".join(paths) + "\0").encode(), dtype=np.uint8)
+    ends = np.flatnonzero(buffer == _SEPARATOR)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    dots = _last_before(np.flatnonzero(buffer == _DOT), ends)
+    slashes = _last_before(np.flatnonzero(buffer == _SLASH), ends)
+    # "dir.d/file" has no extension, ".gitignore" is its own extension
+    extension_lengths = np.where((dots >= starts) & (dots > slashes), ends - dots - 1, 0)
+
+    offsets = np.arange(EXTENSION_CODE_CHARS)
+    columns = np.minimum(dots[:, None] + 1 + offsets, len(buffer) - 1)
+    extension = np.where(offsets < extension_lengths[:, None], buffer[columns], 0).astype(np.uint8)
+    extension = np.where((extension >= ord("A")) & (extension <= ord("Z")), extension + 32, extension)
+
+    overflow = (extension_lengths > EXTENSION_CODE_CHARS) | (extension > 127).any(axis=1)
+    codes = np.ascontiguousarray(extension).view("<u8").ravel().copy()
+    codes[overflow] = 0
+    return codes, overflow
+
+
+def tree_statistics(entries: list[dict], largest: int = 10) -> dict:
+    """
+    Summarizes a recursive git tree: file and directory counts, total size,
+    files and bytes per extension and per language, and the largest files.
+    Works on column arrays, so trees with 100k+ entries take milliseconds.
+    """
+    paths, sizes, directories = tree_columns(entries)
+    codes, overflow = extension_codes(paths)
+
+    unique_codes, groups = np.unique(codes, return_inverse=True)
+    group_files = np.bincount(groups, minlength=len(unique_codes))
+    group_bytes = np.bincount(groups, weights=sizes, minlength=len(unique_codes))
+
+    extensions: dict[str, dict] = {}
+    for code, files, size in zip(unique_codes.tolist(), group_files.tolist(), group_bytes.tolist()):
+        extension = _decode_extension(code) if code else ""
+        extensions[extension] = {"extension": extension, "files": files, "bytes": int(size)}
+    if overflow.any():
+        # Code 0 also counted the extensions too long to encode, move them
+        names = [paths[index].rpartition("/")[2] for index in np.flatnonzero(overflow).tolist()]
+        long_extensions, long_groups = np.unique(
+            [name[name.rfind("."):].lower() for name in names], return_inverse=True
+        )
+        long_files = np.bincount(long_groups)
+        long_bytes = np.bincount(long_groups, weights=sizes[overflow])
+        for extension, files, size in zip(long_extensions.tolist(), long_files.tolist(), long_bytes.tolist()):
+            extensions[extension] = {"extension": extension, "files": files, "bytes": int(size)}
+        extensions[""]["files"] -= int(overflow.sum())
+        extensions[""]["bytes"] -= int(sizes[overflow].sum())
+        if not extensions[""]["files"]:
+            del extensions[""]
+
+    total_size = int(sizes.sum())
+    languages: dict[str, dict] = {}
+    for summary in extensions.values():
+        language = EXTENSION_LANGUAGES.get(summary["extension"])
+        if language:
+            totals = languages.setdefault(language, {"language": language, "files": 0, "bytes": 0})
+            totals["files"] += summary["files"]
+            totals["bytes"] += summary["bytes"]
+    language_bytes = sum(totals["bytes"] for totals in languages.values())
+    for totals in languages.values():
+        totals["percent"] = round(100 * totals["bytes"] / language_bytes, 2) if language_bytes else 0.0
+
+    top = min(largest, len(sizes))
+    largest_indexes = np.argpartition(sizes, len(sizes) - top)[len(sizes) - top:].tolist() if top else []
+    largest_indexes.sort(key=lambda index: (-int(sizes[index]), paths[index]))
+
+    return {
+        "file_count": int(len(paths)),
+        "directory_count": directories,
+        "total_size": total_size,
+        "extensions": sorted(extensions.values(), key=lambda item: (-item["bytes"], item["extension"])),
+        "languages": sorted(languages.values(), key=lambda item: (-item["bytes"], item["language"])),
+        "largest_files": [{"path": paths[index], "size": int(sizes[index])} for index in largest_indexes]
+    }
@@ -1,16 +1,47 @@
+import gc
 import os
 import pytest
 
 os.environ["GITHUB_CLIENT_ID"] = "CLIENT_ID"
 os.environ["GITHUB_CLIENT_SECRET"] = "CLIENT_SECRET"
 os.environ["SESSION_SECRET_KEY"] = "SESSION_SECRET"
-os.environ["FERNET_KEY"] = "FERNET_KEY_32CHARS!"
+os.environ["FERNET_KEY"] = "YWdvcmFwYXktdGVzdHMtZmVybmV0LWtleS0zMmJ5dGU="
 
 os.environ["PAYPAL_CLIENT_ID"] = "PAYPAL_CLIENT_ID"
 os.environ["PAYPAL_SECRET"] = "PAYPAL_SECRET"
 os.environ["PAYPAL_API_URL"] = "https://api-m.sandbox.paypal.com"
 
+os.environ["SUPABASE_URL"] = "sqlite:///./test.db"
+os.environ["DEEPSEEKAPI"] = "DEEPSEEK_API_KEY"
+
 @pytest.fixture(autouse=True)
 def setup_test_env():
     """Ensure environment variables are set for tests"""
-    pass
+    yield
+    # The queries modules leave their sessions (get_db) to the garbage
+    # collector; collect them so a fast test run does not exhaust the pool
+    gc.collect()
+
+
+@pytest.fixture
+def github_api(monkeypatch):
+    """
+    Serve the GitHub API from a dict of {path: JSON body}; unknown paths
+    answer 404. Returns the dict and the list of requested paths.
+    """
+    import httpx
+    from server.config import settings
+    from server.services import github_client
+
+    responses: dict[str, dict] = {}
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        if request.url.path not in responses:
+            return httpx.Response(404, json={"message": "Not Found"})
+        return httpx.Response(200, json=responses[request.url.path])
+
+    client = httpx.AsyncClient(base_url=settings.GITHUB_API_URL, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(github_client, "_client", client)
+    return responses, requested
@@ -0,0 +1,65 @@
+import uuid
+import pytest
+from server.database.queries.user import add_user, get_id_with_username
+from server.database.queries.repository import set_repository
+from server.database.queries.repository_manifest import save_repository_manifest
+from server.database.queries.repository_search import search_repositories
+from server.utils.cursor import encode_cursor
+
+
+def new_term() -> str:
+    # A term of its own keeps each test's listings apart in the shared index
+    return f"zq{uuid.uuid4().hex[:10]}"
+
+def list_repository(seller: str, name: str, readme: str = None) -> int:
+    add_user(seller, f"{seller}@example.com", "seller-token")
+    repo_id = set_repository(
+        user_id=get_id_with_username(seller),
+        name_repository=name,
+        url_repository=f"https://github.com/{seller}/{name}",
+        price=1.0
+    )["repo_id"]
+    if readme:
+        save_repository_manifest(repo_id, {
+            "head_sha": "abc", "file_count": 1, "total_size": 1, "tree_summary": [], "languages": [],
+            "readme_excerpt": readme
+        })
+    return repo_id
+
+def test_name_matches_rank_above_owner_and_readme_matches():
+    term = new_term()
+    in_readme = list_repository(f"seller-{uuid.uuid4().hex[:8]}", "plain", readme=f"A {term} helper")
+    in_owner = list_repository(f"{term}-seller", "other")
+    in_name = list_repository(f"seller-{uuid.uuid4().hex[:8]}", f"{term}-tool")
+
+    page = search_repositories(term, limit=10)
+    assert [result["repository_id"] for result in page["results"]] == [in_name, in_owner, in_readme]
+    assert page["next_cursor"] is None
+
+def test_terms_match_as_prefixes_and_all_must_match():
+    term = new_term()
+    repo_id = list_repository(f"seller-{uuid.uuid4().hex[:8]}", f"{term}-parser")
+    assert [result["repository_id"] for result in search_repositories(term[:-3], 10)["results"]] == [repo_id]
+    assert search_repositories(f"{term} missingword", 10)["results"] == []
+
+def test_cursor_pages_through_tied_scores_once():
+    term = new_term()
+    seller = f"seller-{uuid.uuid4().hex[:8]}"
+    repo_ids = [list_repository(seller, f"{term}-lib") for _ in range(7)]
+
+    seen = []
+    cursor = None
+    while True:
+        page = search_repositories(term, limit=3, cursor=cursor)
+        seen.extend(result["repository_id"] for result in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # Same name and owner: equal scores, ordered by ID, each exactly once
+    assert seen == sorted(repo_ids, reverse=True)
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        search_repositories("anything", 3, cursor=encode_cursor({"score": 1.5, "id": 1}))
+    with pytest.raises(ValueError):
+        search_repositories("anything", 3, cursor=encode_cursor({"score": "nan", "id": 1}))
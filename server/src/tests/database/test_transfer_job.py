@@ -0,0 +1,90 @@
+import random
+from server.database.models.transfer_job import STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED
+from server.database.queries.transfer_job import (
+    enqueue_transfer_job, claim_transfer_job, complete_transfer_job, fail_transfer_job,
+    renew_transfer_lease, record_transfer_target, requeue_stale_transfer_jobs, get_transfer_job
+)
+
+
+def queue(buyer_id: int = 1, max_attempts: int = 3) -> tuple[dict, list[int]]:
+    # A priority of its own keeps each test's jobs apart from the others in the shared database
+    priority = random.randint(1_000, 1_000_000_000)
+    job = enqueue_transfer_job(buyer_id, 2, "repo", "https://github.com/seller/repo", priority, max_attempts)
+    return job, [priority]
+
+def test_claim_leases_a_job_once():
+    job, priorities = queue()
+    claimed = claim_transfer_job("worker-a", priorities)
+    assert claimed["job_id"] == job["job_id"]
+    assert claimed["status"] == STATUS_RUNNING and claimed["attempts"] == 1
+    assert claim_transfer_job("worker-b", priorities) is None
+
+def test_only_the_lease_holder_records_the_outcome():
+    job, priorities = queue()
+    claim_transfer_job("worker-a", priorities)
+    assert not complete_transfer_job(job["job_id"], "worker-b", {"strategy": "archive"})
+    assert fail_transfer_job(job["job_id"], "worker-b", "boom", 0) is None
+    assert get_transfer_job(job["job_id"])["status"] == STATUS_RUNNING
+
+    assert complete_transfer_job(job["job_id"], "worker-a", {"strategy": "archive", "duration_seconds": 1.5})
+    done = get_transfer_job(job["job_id"])
+    assert done["status"] == STATUS_SUCCEEDED and done["strategy"] == "archive"
+    assert not complete_transfer_job(job["job_id"], "worker-a", {"strategy": "archive"})
+
+def test_failures_requeue_until_attempts_run_out():
+    job, priorities = queue(max_attempts=2)
+    claim_transfer_job("worker-a", priorities)
+    assert fail_transfer_job(job["job_id"], "worker-a", "boom", 0)["status"] == STATUS_QUEUED
+
+    claimed = claim_transfer_job("worker-a", priorities)
+    assert claimed["attempts"] == 2 and claimed["error"] == "boom"
+    assert fail_transfer_job(job["job_id"], "worker-a", "boom again", 0)["status"] == STATUS_FAILED
+    assert claim_transfer_job("worker-a", priorities) is None
+
+def test_retry_delay_backs_off():
+    job, priorities = queue()
+    claim_transfer_job("worker-a", priorities)
+    fail_transfer_job(job["job_id"], "worker-a", "boom", 3600)
+    assert claim_transfer_job("worker-a", priorities) is None
+
+def test_expired_lease_moves_the_job_to_another_worker():
+    job, priorities = queue()
+    claim_transfer_job("worker-a", priorities)
+    record_transfer_target(job["job_id"], "worker-a", "https://github.com/buyer/AgoraPay-repo.git", "archive")
+
+    # A negative lease expires every running job
+    assert requeue_stale_transfer_jobs(-1) >= 1
+    claimed = claim_transfer_job("worker-b", priorities)
+    assert claimed["attempts"] == 2
+    assert claimed["target_repo_url"] == "https://github.com/buyer/AgoraPay-repo.git"
+
+    # The first worker can no longer renew, complete or fail the job
+    assert not renew_transfer_lease(job["job_id"], "worker-a")
+    assert not complete_transfer_job(job["job_id"], "worker-a", {"strategy": "archive"})
+    assert fail_transfer_job(job["job_id"], "worker-a", "late", 0) is None
+    assert renew_transfer_lease(job["job_id"], "worker-b")
+    assert complete_transfer_job(job["job_id"], "worker-b", {"strategy": "archive"})
+
+def test_running_jobs_per_buyer_are_capped():
+    priority = random.randint(1_000, 1_000_000_000)
+    buyer_id = random.randint(1_000, 1_000_000_000)
+    first = enqueue_transfer_job(buyer_id, 2, "one", "https://github.com/seller/one", priority)
+    enqueue_transfer_job(buyer_id, 2, "two", "https://github.com/seller/two", priority)
+    other = enqueue_transfer_job(buyer_id + 1, 2, "three", "https://github.com/seller/three", priority)
+
+    assert claim_transfer_job("worker-a", [priority], max_running_per_buyer=1)["job_id"] == first["job_id"]
+    assert claim_transfer_job("worker-b", [priority], max_running_per_buyer=1)["job_id"] == other["job_id"]
+    assert claim_transfer_job("worker-c", [priority], max_running_per_buyer=1) is None
+
+def test_concurrent_claims_respect_the_buyer_cap():
+    from concurrent.futures import ThreadPoolExecutor
+    priority = random.randint(1_000, 1_000_000_000)
+    buyer_id = random.randint(1_000, 1_000_000_000)
+    for index in range(6):
+        enqueue_transfer_job(buyer_id, 2, f"repo-{index}", f"https://github.com/seller/repo-{index}", priority)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        claims = list(pool.map(
+            lambda index: claim_transfer_job(f"worker-{index}", [priority], max_running_per_buyer=2), range(6)
+        ))
+    assert len([claim for claim in claims if claim]) == 2
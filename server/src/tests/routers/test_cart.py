@@ -0,0 +1,57 @@
+import random
+import uuid
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from server.routers.paypal import cart
+from server.utils.security.modules import auth_dependency
+from server.database.queries.user import add_user, get_id_with_username
+from server.database.queries.repository import set_repository
+from server.database.queries.transfer_job import get_transfer_batch
+
+buyer_id = random.randint(1_000_000, 1_000_000_000)
+app = FastAPI()
+app.include_router(cart.router)
+app.dependency_overrides[auth_dependency] = lambda: {"id": buyer_id}
+client = TestClient(app)
+
+
+def list_repository(price: float) -> int:
+    seller = f"seller-{uuid.uuid4().hex[:8]}"
+    add_user(seller, f"{seller}@example.com", "seller-token")
+    response = set_repository(
+        user_id=get_id_with_username(seller),
+        name_repository=f"repo-{uuid.uuid4().hex[:8]}",
+        url_repository=f"https://github.com/{seller}/repo",
+        price=price
+    )
+    return response["repo_id"]
+
+def test_failed_paypal_order_queues_nothing(monkeypatch):
+    async def create_cart_order(items, buyer_id, request_id):
+        raise httpx.ConnectError("PayPal is down")
+
+    monkeypatch.setattr(cart, "create_cart_order", create_cart_order)
+    checkout = cart.CartModel(repository_ids=[list_repository(0), list_repository(5)], checkout_id=uuid.uuid4().hex)
+    response = client.post("/cart/checkout", json=checkout.model_dump())
+    assert response.status_code == 502
+    checkout_key = cart._checkout_key(buyer_id, checkout, checkout.repository_ids)
+    assert get_transfer_batch(f"free:{checkout_key}") == []
+
+def test_checkout_is_idempotent(monkeypatch):
+    request_ids = []
+
+    async def create_cart_order(items, buyer_id, request_id):
+        request_ids.append(request_id)
+        return {"id": f"order-{request_id}", "links": [{"rel": "approve", "href": "https://paypal.test/approve"}]}
+
+    monkeypatch.setattr(cart, "create_cart_order", create_cart_order)
+    repository_ids = [list_repository(0), list_repository(0), list_repository(5)]
+    first = client.post("/cart/checkout", json={"repository_ids": repository_ids}).json()
+    retry = client.post("/cart/checkout", json={"repository_ids": list(reversed(repository_ids))}).json()
+
+    assert request_ids[0] == request_ids[1]
+    assert retry["order_id"] == first["order_id"]
+    assert retry["free_batch_id"] == first["free_batch_id"]
+    assert [item["job_id"] for item in retry["free_items"]] == [item["job_id"] for item in first["free_items"]]
+    assert len(get_transfer_batch(first["free_batch_id"])) == 2
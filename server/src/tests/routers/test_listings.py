@@ -0,0 +1,64 @@
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from server.config import settings
+from server.routers.menu import home
+from server.routers.repository import repository
+from server.utils.security.modules import auth_dependency
+from server.database.queries.user import add_user, get_id_with_username
+from server.database.queries.repository import set_repository
+
+seller = f"seller-{uuid.uuid4().hex[:8]}"
+add_user(seller, f"{seller}@example.com", "seller-token")
+seller_id = get_id_with_username(seller)
+listing_ids = [
+    set_repository(
+        user_id=seller_id,
+        name_repository=f"repo-{index}",
+        url_repository=f"https://github.com/{seller}/repo-{index}",
+        price=float(index)
+    )["repo_id"]
+    for index in range(settings.LISTING_PAGE_SIZE + 3)
+]
+
+app = FastAPI()
+app.include_router(home.router)
+app.include_router(repository.router)
+app.dependency_overrides[auth_dependency] = lambda: {"id": seller_id}
+client = TestClient(app)
+
+
+def follow(path: str, params: dict, key: str) -> list[list[int]]:
+    pages = []
+    cursor = None
+    while True:
+        body = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        body = body.get("user", body)
+        pages.append([repo["repository_id"] for repo in body[key]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+def test_user_info_is_paged_by_default():
+    pages = follow("/get_user_info", {"username": seller}, "repositories")
+    assert [len(page) for page in pages] == [settings.LISTING_PAGE_SIZE, 3]
+    assert sum(pages, []) == listing_ids
+
+def test_user_info_cursor_round_trip():
+    pages = follow("/get_user_info", {"limit": 7}, "repositories")
+    assert all(len(page) == 7 for page in pages[:-1])
+    assert sum(pages, []) == listing_ids
+
+def test_user_info_repo_name_filter():
+    body = client.get("/get_user_info", params={"username": seller, "repo_name": "repo-2"}).json()
+    assert [repo["name"] for repo in body["user"]["repositories"]] == ["repo-2"]
+    assert body["user"]["next_cursor"] is None
+
+def test_uploaded_repositories_cursor_round_trip():
+    pages = follow("/get_uploaded_repositories", {"limit": 10}, "repositories")
+    assert sum(pages, []) == listing_ids
+    assert len(pages) == len(listing_ids) // 10 + 1
+
+def test_malformed_cursor_is_rejected():
+    assert client.get("/get_user_info", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/get_uploaded_repositories", params={"cursor": "bm90LWpzb24"}).status_code == 400
@@ -0,0 +1,58 @@
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from server.routers.github import preview
+from server.database.queries.user import add_user, get_id_with_username
+from server.database.queries.repository import set_repository, get_listing_commit
+
+app = FastAPI()
+app.include_router(preview.router)
+client = TestClient(app)
+
+
+def list_repository(commit_sha: str) -> tuple[str, str]:
+    owner = f"seller-{uuid.uuid4().hex[:8]}"
+    repo = f"Repo-{uuid.uuid4().hex[:8]}"
+    add_user(owner, f"{owner}@example.com", "seller-token")
+    set_repository(
+        user_id=get_id_with_username(owner),
+        name_repository=repo,
+        url_repository=f"https://github.com/{owner}/{repo}",
+        price=10.0,
+        commit_sha=commit_sha
+    )
+    return owner, repo
+
+def tree(path: str) -> dict:
+    return {"sha": "tree", "truncated": False, "tree": [{"path": path, "type": "blob", "sha": "b", "size": 1}]}
+
+def test_get_listing_commit_matches_url_case_insensitively():
+    commit_sha = uuid.uuid4().hex
+    owner, repo = list_repository(commit_sha)
+    assert get_listing_commit(owner, repo.lower()) == commit_sha
+    assert get_listing_commit(owner, repo, branch="dev") is None
+    assert get_listing_commit(owner, "other-repo") is None
+
+def test_pinned_listing_previews_its_pinned_commit(github_api):
+    responses, requested = github_api
+    pinned_sha, head_sha = uuid.uuid4().hex, uuid.uuid4().hex
+    owner, repo = list_repository(pinned_sha)
+    responses[f"/repos/{owner}/{repo}/branches/main"] = {"commit": {"sha": head_sha}}
+    responses[f"/repos/{owner}/{repo}/git/trees/{head_sha}"] = tree("pushed-after-listing.py")
+    responses[f"/repos/{owner}/{repo}/git/trees/{pinned_sha}"] = tree("listed.py")
+
+    response = client.get("/tree", params={"repository": repo, "username": owner})
+    assert response.status_code == 200
+    assert [entry["path"] for entry in response.json()["tree"]] == ["listed.py"]
+    assert f"/repos/{owner}/{repo}/branches/main" not in requested
+    # Only an explicit sha makes the response immutable: the listing can be re-pinned
+    assert "immutable" not in response.headers.get("cache-control", "")
+
+def test_unlisted_repository_previews_the_branch_head(github_api):
+    responses, _ = github_api
+    head_sha = uuid.uuid4().hex
+    responses["/repos/someone/unlisted/branches/main"] = {"commit": {"sha": head_sha}}
+    responses[f"/repos/someone/unlisted/git/trees/{head_sha}"] = tree("head.py")
+
+    response = client.get("/tree", params={"repository": "unlisted", "username": "someone"})
+    assert [entry["path"] for entry in response.json()["tree"]] == ["head.py"]
@@ -0,0 +1,64 @@
+import os
+from server.services.archive_store import ArchiveStore
+
+
+def store_archive(store: ArchiveStore, sha: str, data: bytes, mtime: int):
+    path, stored = store.acquire("Owner", "Repo", sha)
+    assert not stored
+    temp_path = store.temp_path("Owner", "Repo", sha)
+    temp_path.write_bytes(data)
+    store.put("Owner", "Repo", sha, temp_path)
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_stored_archive_is_shared(tmp_path):
+    store = ArchiveStore(str(tmp_path), max_bytes=100)
+    path = store_archive(store, "sha-a", b"zip", 1000)
+    store.release(path)
+
+    assert store.acquire("owner", "repo", "sha-a") == (path, True)
+    store.release(path)
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+def test_least_recently_used_archive_is_trimmed(tmp_path):
+    store = ArchiveStore(str(tmp_path), max_bytes=8)
+    first = store_archive(store, "sha-a", b"1234", 1000)
+    second = store_archive(store, "sha-b", b"5678", 2000)
+    store.release(first)
+    store.release(second)
+    # A hit refreshes the modification time, making sha-b the oldest
+    store.acquire("owner", "repo", "sha-a")
+    store.release(first)
+
+    third = store_archive(store, "sha-c", b"9012", 3000)
+    store.release(third)
+
+    assert first.exists()
+    assert not second.exists()
+    assert store.stats()["bytes"] == 8
+
+def test_held_archive_is_never_trimmed(tmp_path):
+    store = ArchiveStore(str(tmp_path), max_bytes=4)
+    first = store_archive(store, "sha-a", b"1234", 1000)
+    # Two readers hold sha-a; it stays until both release it
+    store.acquire("owner", "repo", "sha-a")
+
+    # Every archive is held, so the store goes over budget until the next trim
+    second = store_archive(store, "sha-b", b"5678", 2000)
+    store.release(second)
+    assert first.exists() and second.exists()
+
+    store.release(first)
+    third = store_archive(store, "sha-c", b"9012", 3000)
+    store.release(third)
+    assert first.exists()
+    assert not second.exists()
+
+    store.release(first)
+    assert store._in_use == {}
+    fourth = store_archive(store, "sha-d", b"3456", 4000)
+    store.release(fourth)
+    assert not first.exists()
+    assert not third.exists()
+    assert fourth.exists()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+from server.services.blob_cache import BlobCache
+
+
+def build_cache(tmp_path, max_bytes=8, spill_max_bytes=8) -> BlobCache:
+    return BlobCache(
+        max_bytes=max_bytes,
+        max_entry_bytes=max_bytes,
+        spill_dir=str(tmp_path / "blobs"),
+        spill_max_bytes=spill_max_bytes
+    )
+
+def test_memory_is_bounded_by_bytes(tmp_path):
+    cache = BlobCache(max_bytes=8, max_entry_bytes=8)
+    cache.put("aa01", b"1234")
+    cache.put("bb02", b"5678")
+    # Reading aa01 makes bb02 the least recently used blob
+    assert cache.get("aa01") == b"1234"
+    cache.put("cc03", b"9012")
+
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") == b"1234"
+    assert cache.stats()["bytes"] == 8
+
+def test_oversized_blob_is_not_cached(tmp_path):
+    cache = build_cache(tmp_path)
+    cache.put("aa01", b"123456789")
+    assert cache.get("aa01") is None
+    assert not (tmp_path / "blobs").exists()
+
+def test_evicted_blobs_are_spilled_and_read_back(tmp_path):
+    cache = build_cache(tmp_path)
+    cache.put("aa01", b"1234")
+    cache.put("bb02", b"5678")
+    cache.put("cc03", b"9012")
+
+    assert (tmp_path / "blobs" / "aa" / "aa01").read_bytes() == b"1234"
+    assert cache.stats()["spilled_entries"] == 1
+    # Read back from disk and promoted to memory again
+    assert cache.get("aa01") == b"1234"
+    assert cache._entries.get("aa01") == b"1234"
+
+def test_spill_dir_is_bounded_by_the_index(tmp_path):
+    cache = build_cache(tmp_path, max_bytes=4)
+    for sha, data in [("aa01", b"1234"), ("bb02", b"5678"), ("cc03", b"9012"), ("dd04", b"3456")]:
+        cache.put(sha, data)
+
+    # aa01 is the least recently spilled blob once bb02 and cc03 overflow the spill dir
+    assert not (tmp_path / "blobs" / "aa" / "aa01").exists()
+    assert cache.stats()["spilled_bytes"] == 8
+    assert list(cache._spilled) == ["bb02", "cc03"]
+    assert cache.get("aa01") is None
+
+def test_spill_index_is_built_from_an_earlier_run(tmp_path):
+    for sha, data, mtime in [("aa01", b"1234", 1000), ("bb02", b"5678", 2000)]:
+        path = tmp_path / "blobs" / sha[:2] / sha
+        path.parent.mkdir(parents=True)
+        path.write_bytes(data)
+        os.utime(path, (mtime, mtime))
+    (tmp_path / "blobs" / "aa" / "aa01.1.tmp").write_bytes(b"partial")
+
+    cache = build_cache(tmp_path, max_bytes=4)
+    assert cache.get("bb02") == b"5678"
+    assert list(cache._spilled) == ["aa01", "bb02"]
+    assert cache.stats()["spilled_bytes"] == 8
+
+    # bb02 is already on disk; spilling cc03 removes the oldest file of the earlier run
+    cache.put("cc03", b"9012")
+    cache.put("dd04", b"3456")
+    assert not (tmp_path / "blobs" / "aa" / "aa01").exists()
+    assert cache.get("aa01") is None
+
+def test_blob_removed_behind_the_index_is_a_miss(tmp_path):
+    cache = build_cache(tmp_path, max_bytes=4)
+    cache.put("aa01", b"1234")
+    cache.put("bb02", b"5678")
+    (tmp_path / "blobs" / "aa" / "aa01").unlink()
+
+    assert cache.get("aa01") is None
+    assert "aa01" not in cache._spilled
+    assert cache.stats()["spilled_bytes"] == 0
+
+def test_load_and_store_spill_off_the_event_loop(tmp_path):
+    cache = build_cache(tmp_path, max_bytes=4)
+
+    async def run():
+        await cache.store("aa01", b"1234")
+        await cache.store("bb02", b"5678")
+        assert (tmp_path / "blobs" / "aa" / "aa01").is_file()
+        assert await cache.load("aa01") == b"1234"
+        assert await cache.load("ffff") is None
+
+    asyncio.run(run())
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,98 @@
+import asyncio
+import httpx
+import pytest
+from server.config import settings
+from server.services import github_client
+from server.services.github_cache import ConditionalCache
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ConditionalCache:
+    cache = ConditionalCache(max_entries=2)
+    monkeypatch.setattr(github_client, "github_cache", cache)
+    return cache
+
+def serve(monkeypatch, handler) -> None:
+    client = httpx.AsyncClient(base_url=settings.GITHUB_API_URL, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(github_client, "_client", client)
+
+def test_not_modified_is_answered_from_the_cache(cache, monkeypatch):
+    conditional = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        conditional.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"name": "repo"}, headers={"ETag": '"v1"', "Link": "<next>"})
+
+    serve(monkeypatch, handler)
+
+    async def run():
+        first = await github_client.github_get("/repos/owner/repo", token="token")
+        second = await github_client.github_get("/repos/owner/repo", token="token")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert conditional == [None, '"v1"']
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"name": "repo"}
+    assert second.headers["link"] == "<next>"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+def test_entries_are_kept_per_token(cache, monkeypatch):
+    serve(monkeypatch, lambda request: httpx.Response(200, json={}, headers={"ETag": '"v1"'}))
+
+    async def run():
+        await github_client.github_get("/repos/owner/repo", token="first")
+        await github_client.github_get("/repos/owner/repo", token="second")
+
+    asyncio.run(run())
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hits"] == 0
+    assert all("first" not in key[0] for key in cache._entries)
+
+def test_not_modified_after_eviction_is_fetched_again(cache, monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match"):
+            # The entry is dropped while the conditional request is in flight
+            cache.clear()
+            return httpx.Response(304)
+        return httpx.Response(200, json={"name": "repo"}, headers={"ETag": '"v1"'})
+
+    serve(monkeypatch, handler)
+
+    async def run():
+        await github_client.github_get("/repos/owner/repo")
+        return await github_client.github_get("/repos/owner/repo")
+
+    response = asyncio.run(run())
+    assert requests == [None, '"v1"', None]
+    assert response.json() == {"name": "repo"}
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ConditionalCache(max_entries=2)
+    keys = [cache.make_key(None, "json", f"https://api.github.com/repos/owner/repo{index}") for index in range(3)]
+    cache.store(keys[0], b"0", {"etag": '"0"'})
+    cache.store(keys[1], b"1", {"etag": '"1"'})
+    assert cache.validators(keys[0]) == {"If-None-Match": '"0"'}
+    cache.store(keys[2], b"2", {"etag": '"2"'})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).content == b"0"
+
+def test_responses_without_validators_are_not_stored():
+    cache = ConditionalCache(max_entries=2)
+    key = cache.make_key(None, "json", "https://api.github.com/repos/owner/repo")
+    cache.store(key, b"{}", {"content-type": "application/json"})
+    assert cache.validators(key) == {}
+
+def test_evict_drops_a_repository_ignoring_case():
+    cache = ConditionalCache(max_entries=10)
+    for url in ["/repos/Owner/Repo/contents", "/repos/owner/repo/git/trees/main", "/repos/owner/other/contents"]:
+        cache.store(cache.make_key(None, "json", f"https://api.github.com{url}"), b"{}", {"etag": '"x"'})
+
+    assert cache.evict("/repos/owner/repo/") == 2
+    assert cache.stats()["entries"] == 1
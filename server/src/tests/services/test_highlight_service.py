@@ -0,0 +1,14 @@
+import asyncio
+from server.services import highlight_service
+
+
+def test_render_runs_in_spawned_workers():
+    async def run():
+        return await highlight_service.render("x = 1\n", "python", "default")
+
+    try:
+        html = asyncio.run(run())
+        assert highlight_service.get_executor()._mp_context.get_start_method() == "spawn"
+    finally:
+        highlight_service.stop_highlighter()
+    assert html == highlight_service.render_html("x = 1\n", "python", "default")
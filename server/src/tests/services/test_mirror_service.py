@@ -0,0 +1,73 @@
+import asyncio
+import os
+import subprocess
+import pytest
+from server.config import settings
+from server.services import mirror_service
+from server.services.mirror_service import evict_mirrors, get_mirror_path, push_from_mirror
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Seller", "GIT_AUTHOR_EMAIL": "seller@example.com",
+    "GIT_COMMITTER_NAME": "Seller", "GIT_COMMITTER_EMAIL": "seller@example.com"
+}
+
+
+@pytest.fixture
+def mirror_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MIRROR_ROOT", str(tmp_path / "mirrors"))
+    monkeypatch.setattr(settings, "MIRROR_LOCK_POLL_INTERVAL", 0.01)
+    return tmp_path / "mirrors"
+
+def fake_mirror(owner: str, repo: str, size: int, last_used: float):
+    path = get_mirror_path(owner, repo)
+    path.mkdir(parents=True)
+    (path / "HEAD").write_text("ref: refs/heads/main\n")
+    (path / "pack").write_bytes(b"x" * size)
+    lock_path = mirror_service._lock_path(path)
+    lock_path.touch()
+    os.utime(lock_path, (last_used, last_used))
+    return path
+
+def test_evicts_least_recently_used_mirrors(mirror_root):
+    oldest = fake_mirror("a", "old", 100, 1_000)
+    middle = fake_mirror("a", "middle", 100, 2_000)
+    newest = fake_mirror("b", "new", 100, 3_000)
+
+    assert evict_mirrors(max_bytes=250) == [oldest]
+    assert not oldest.exists() and middle.exists() and newest.exists()
+    # The mirror the caller is about to use is kept even when it is the oldest
+    assert evict_mirrors(max_bytes=0, keep=middle) == [newest]
+
+def test_mirrors_in_use_are_not_evicted(mirror_root):
+    busy = fake_mirror("a", "busy", 100, 1_000)
+    idle = fake_mirror("a", "idle", 100, 2_000)
+
+    async def run():
+        async with mirror_service._locked(busy, exclusive=False):
+            return await asyncio.to_thread(evict_mirrors, 0)
+
+    assert asyncio.run(run()) == [idle]
+    assert busy.exists()
+
+def test_push_waits_for_a_running_fetch(mirror_root, tmp_path):
+    env = {**os.environ, **GIT_IDENTITY}
+    source = tmp_path / "source"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(source)], check=True)
+    (source / "README.md").write_text("hello\n")
+    subprocess.run(["git", "add", "."], cwd=source, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "first"], cwd=source, env=env, check=True)
+    mirror = get_mirror_path("seller", "repo")
+    subprocess.run(["git", "clone", "-q", "--bare", str(source), str(mirror)], check=True)
+    target = tmp_path / "buyer.git"
+    subprocess.run(["git", "init", "-q", "--bare", str(target)], check=True)
+
+    async def run():
+        async with mirror_service._locked(mirror, exclusive=True):
+            push = asyncio.create_task(push_from_mirror(mirror, str(target), "token"))
+            await asyncio.sleep(0.2)
+            assert not push.done()
+        await push
+
+    asyncio.run(run())
+    pushed = subprocess.run(["git", "log", "--format=%s", "main"], cwd=target, capture_output=True, text=True)
+    assert pushed.stdout.strip() == "first"
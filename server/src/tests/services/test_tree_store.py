@@ -0,0 +1,49 @@
+import json
+import zlib
+from server.services.tree_store import TreeStore
+
+
+def tree(path: str) -> dict:
+    return {"tree": [{"path": path, "type": "blob", "size": 1}]}
+
+def entry_size(data: dict) -> int:
+    return len(zlib.compress(json.dumps(data, separators=(",", ":")).encode()))
+
+def test_least_recently_used_tree_is_evicted(tmp_path):
+    size = entry_size(tree("a.py"))
+    store = TreeStore(str(tmp_path / "trees.db"), max_bytes=size * 2)
+    store.put("Owner", "Repo", "sha-a", tree("a.py"))
+    store.put("owner", "repo", "sha-b", tree("b.py"))
+    # Reading sha-a makes sha-b the least recently used entry
+    assert store.get("OWNER", "repo", "sha-a") == tree("a.py")
+
+    store.put("owner", "repo", "sha-c", tree("c.py"))
+
+    assert store.get("owner", "repo", "sha-b") is None
+    assert store.get("owner", "repo", "sha-a") == tree("a.py")
+    assert store.get("owner", "repo", "sha-c") == tree("c.py")
+    assert store.stats()["bytes"] <= store.max_bytes
+
+def test_oversized_tree_is_not_stored(tmp_path):
+    store = TreeStore(str(tmp_path / "trees.db"), max_bytes=1)
+    store.put("owner", "repo", "sha", tree("a.py"))
+    assert store.get("owner", "repo", "sha") is None
+    assert store.stats()["entries"] == 0
+
+def test_evict_repository_only_drops_that_repository(tmp_path):
+    store = TreeStore(str(tmp_path / "trees.db"), max_bytes=1_000_000)
+    store.put("owner", "repo", "sha-a", tree("a.py"))
+    store.put("owner", "repo", "sha-b", tree("b.py"))
+    store.put("owner", "other", "sha-a", tree("a.py"))
+
+    assert store.evict_repository("Owner", "REPO") == 2
+
+    assert store.get("owner", "repo", "sha-a") is None
+    assert store.get("owner", "other", "sha-a") == tree("a.py")
+
+def test_trees_survive_a_restart(tmp_path):
+    path = str(tmp_path / "trees.db")
+    TreeStore(path, max_bytes=1_000_000).put("owner", "repo", "sha", tree("a.py"))
+    store = TreeStore(path, max_bytes=1_000_000)
+    assert store.get("owner", "repo", "sha") == tree("a.py")
+    assert store.stats()["hits"] == 1
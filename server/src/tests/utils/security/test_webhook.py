@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+from server.utils.security.webhook import github_signature, verify_github_signature
+
+SECRET = "test-webhook-secret"
+
+# Recorded push delivery and the X-Hub-Signature-256 GitHub sent with it
+payload = (Path(__file__).parent / "payloads" / "github_push.json").read_bytes()
+recorded_signature = "sha256=198e9a00cb98f445ce52ac2df9142c78d407e7e11f32fd5a906bf99cbf26801d"
+
+def test_recorded_push_signature_is_valid():
+    assert github_signature(payload, SECRET) == recorded_signature
+    assert verify_github_signature(payload, recorded_signature, SECRET)
+
+def test_tampered_payload_is_rejected():
+    tampered = payload.replace(b"refs/heads/main", b"refs/heads/evil")
+    assert not verify_github_signature(tampered, recorded_signature, SECRET)
+
+def test_missing_signature_or_secret_is_rejected():
+    assert not verify_github_signature(payload, None, SECRET)
+    assert not verify_github_signature(payload, recorded_signature, None)
+    assert not verify_github_signature(payload, "sha256=", SECRET)
+
+def test_recorded_push_payload():
+    push = json.loads(payload)
+    assert push["ref"] == "refs/heads/main"
+    assert push["repository"]["full_name"] == "ExperienceV/ChatBot-OpenAI"
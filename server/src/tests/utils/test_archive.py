@@ -0,0 +1,35 @@
+import zipfile
+import pytest
+from server.utils.archive import extract_zip, safe_member_path
+
+
+def build_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, content in files.items():
+            zip_ref.writestr(name, content)
+    return path
+
+def test_extract_zip_sequential(tmp_path):
+    files = {"repo-abc/README.md": "hello", "repo-abc/src/main.py": "print(1)\n"}
+    zip_path = build_zip(tmp_path / "repo.zip", files)
+    target = tmp_path / "out"
+    written = extract_zip(zip_path, target)
+    assert written == sum(len(content) for content in files.values())
+    assert (target / "repo-abc/src/main.py").read_text() == "print(1)\n"
+
+def test_extract_zip_parallel(tmp_path):
+    files = {f"repo-abc/file_{i}.txt": "x" * i for i in range(1, 40)}
+    zip_path = build_zip(tmp_path / "repo.zip", files)
+    target = tmp_path / "out"
+    written = extract_zip(zip_path, target, workers=4, parallel_threshold=1, chunk_size=7)
+    assert written == sum(range(1, 40))
+    for name, content in files.items():
+        assert (target / name).read_text() == content
+
+def test_extract_zip_rejects_unsafe_paths(tmp_path):
+    zip_path = build_zip(tmp_path / "repo.zip", {"../evil.txt": "x"})
+    with pytest.raises(ValueError, match="Unsafe path"):
+        extract_zip(zip_path, tmp_path / "out")
+
+def test_safe_member_path_inside_target(tmp_path):
+    assert safe_member_path(tmp_path, "a/b.txt") == (tmp_path / "a/b.txt").resolve()
@@ -0,0 +1,21 @@
+import pytest
+from server.utils.cursor import encode_cursor, decode_cursor, cursor_after_id, keyset_page
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"score": 0.1234, "id": 42})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == {"score": 0.1234, "id": 42}
+
+def test_malformed_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+    with pytest.raises(ValueError):
+        cursor_after_id(encode_cursor({"id": "7"}))
+
+def test_keyset_page():
+    rows = [{"repository_id": i} for i in range(1, 5)]
+    page, next_cursor = keyset_page(rows, 3)
+    assert [row["repository_id"] for row in page] == [1, 2, 3]
+    assert cursor_after_id(next_cursor) == 3
+    assert keyset_page(rows[:3], 3) == (rows[:3], None)
+    assert keyset_page(None, 3) == ([], None)
@@ -0,0 +1,49 @@
+from server.utils.functions import preview_lines, parse_link_header, link_page_number, summarize_top_level, find_readme
+
+content = b"".join(f"line {i}\n".encode() for i in range(1, 101))
+
+def test_preview_lines_first_lines():
+    preview = preview_lines(content, 3)
+    assert preview == "line 1\nline 2\nline 3"
+
+def test_preview_lines_with_offset():
+    preview = preview_lines(content, 2, start_line=99)
+    assert preview == "line 99\nline 100"
+
+def test_preview_lines_past_the_end():
+    assert preview_lines(content, 5, start_line=500) == ""
+
+def test_preview_lines_crlf_and_invalid_utf8():
+    preview = preview_lines(b"a\r\nb\xff\r\nc\r\n", 2)
+    assert preview == "a\nb"
+
+def test_parse_link_header():
+    header = (
+        '<https://api.github.com/user/repos?per_page=100&page=2>; rel="next", '
+        '<https://api.github.com/user/repos?per_page=100&page=7>; rel="last"'
+    )
+    links = parse_link_header(header)
+    assert set(links) == {"next", "last"}
+    assert link_page_number(links["last"]) == 7
+
+def test_parse_link_header_empty():
+    assert parse_link_header(None) == {}
+
+tree_entries = [
+    {"path": "README.md", "type": "blob", "sha": "r1", "size": 120},
+    {"path": "readme.txt", "type": "blob", "sha": "r2", "size": 10},
+    {"path": "main.py", "type": "blob", "sha": "b1", "size": 300},
+    {"path": "src", "type": "tree", "sha": "t1"},
+    {"path": "src/app.ts", "type": "blob", "sha": "b2", "size": 500},
+    {"path": "src/lib/util.py", "type": "blob", "sha": "b3", "size": 200},
+    {"path": "docs/README.md", "type": "blob", "sha": "b4", "size": 50},
+]
+
+def test_summarize_top_level():
+    summary = summarize_top_level(tree_entries)
+    assert summary[1] == {"path": "src", "type": "tree", "files": 2, "size": 700}
+    assert [item["path"] for item in summary] == ["docs", "src", "README.md", "main.py", "readme.txt"]
+
+def test_find_readme_prefers_root_markdown():
+    assert find_readme(tree_entries)["sha"] == "r1"
+    assert find_readme([{"path": "docs/README.md", "type": "blob", "sha": "x"}]) is None
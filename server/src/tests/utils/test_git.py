@@ -0,0 +1,10 @@
+from server.utils.git import parse_progress_bytes
+
+def test_parse_progress_bytes():
+    assert parse_progress_bytes("Receiving objects:  45% (450/1000), 1.50 MiB | 2.00 MiB/s") == (1572864, False)
+    assert parse_progress_bytes("Writing objects: 100% (3/3), 230 bytes | 230.00 KiB/s, done.") == (230, True)
+
+def test_lines_without_bytes_are_ignored():
+    assert parse_progress_bytes("Counting objects: 100% (3/3), done.") is None
+    assert parse_progress_bytes("Receiving objects: 100% (3/3), done.") is None
+    assert parse_progress_bytes("remote: Enumerating objects: 3, done.") is None
@@ -0,0 +1,43 @@
+import subprocess
+import zipfile
+from pathlib import Path
+import pytest
+from server.utils.packfile import push_zip_as_commit
+
+
+def git(*args, cwd: Path) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def make_zip(path: Path, files: dict) -> Path:
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, (content, mode) in files.items():
+            info = zipfile.ZipInfo(name)
+            info.external_attr = mode << 16
+            zip_ref.writestr(info, content)
+    return path
+
+
+def test_push_zip_as_commit(tmp_path):
+    zip_path = make_zip(tmp_path / "repo.zip", {
+        "owner-repo-abc/README.md": (b"# Repo\n", 0o100644),
+        "owner-repo-abc/bin/run.sh": (b"#!/bin/sh\necho hi\n", 0o100755),
+        "owner-repo-abc/src/app/main.py": (b"print('hi')\n", 0o100644),
+    })
+    remote = tmp_path / "remote.git"
+    git("init", "--quiet", "--bare", str(remote), cwd=tmp_path)
+
+    commit_id = push_zip_as_commit(zip_path, str(remote), "Imported", "Tester <t@example.com>")
+
+    assert git("rev-parse", "main", cwd=remote).strip() == commit_id
+    listing = git("ls-tree", "-r", "main", cwd=remote).splitlines()
+    assert [line.split("\t")[1] for line in listing] == ["README.md", "bin/run.sh", "src/app/main.py"]
+    assert listing[1].startswith("100755")
+    assert git("show", "main:src/app/main.py", cwd=remote) == "print('hi')\n"
+    git("fsck", "--strict", cwd=remote)
+
+
+def test_unsafe_paths_are_rejected(tmp_path):
+    zip_path = make_zip(tmp_path / "repo.zip", {"owner-repo-abc/../evil": (b"x", 0o100644)})
+    with pytest.raises(ValueError):
+        push_zip_as_commit(zip_path, str(tmp_path / "remote.git"), "Imported", "Tester <t@example.com>")
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+from server.services.github_ratelimit import (
+    RateLimitScheduler, RateLimitExceeded, PRIORITY_TRANSFER, PRIORITY_INTERACTIVE, PRIORITY_PREVIEW
+)
+
+
+def build_scheduler(max_wait: float = 0.0) -> RateLimitScheduler:
+    return RateLimitScheduler(
+        reserves={PRIORITY_TRANSFER: 0, PRIORITY_INTERACTIVE: 0.02, PRIORITY_PREVIEW: 0.2},
+        max_waits={PRIORITY_TRANSFER: max_wait, PRIORITY_INTERACTIVE: max_wait, PRIORITY_PREVIEW: 0.0}
+    )
+
+def report(scheduler, token, remaining, limit, reset_in=3600.0, status_code=200):
+    scheduler.update(token, status_code, {
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-reset": str(time.time() + reset_in)
+    })
+
+def test_admits_above_reserve_and_counts_requests():
+    scheduler = build_scheduler()
+    report(scheduler, "token", 1001, 5000)
+    asyncio.run(scheduler.acquire("token", PRIORITY_PREVIEW))
+    # The preview reserve is 20% of the limit, 1000 of 5000
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(scheduler.acquire("token", PRIORITY_PREVIEW))
+    asyncio.run(scheduler.acquire("token", PRIORITY_INTERACTIVE))
+    assert scheduler.shed == 1
+
+def test_reserves_scale_with_the_reported_limit():
+    scheduler = build_scheduler()
+    # Anonymous calls: a 60 request limit keeps 12 from previews, 1 from interactive calls
+    report(scheduler, None, 13, 60)
+    asyncio.run(scheduler.acquire(None, PRIORITY_PREVIEW))
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(scheduler.acquire(None, PRIORITY_PREVIEW))
+    asyncio.run(scheduler.acquire(None, PRIORITY_INTERACTIVE))
+
+def test_conditional_requests_are_not_counted():
+    scheduler = build_scheduler()
+    report(scheduler, "token", 1001, 5000)
+    for _ in range(5):
+        asyncio.run(scheduler.acquire("token", PRIORITY_PREVIEW, conditional=True))
+    asyncio.run(scheduler.acquire("token", PRIORITY_PREVIEW))
+
+def test_waits_for_a_reset_within_the_maximum_wait():
+    scheduler = build_scheduler(max_wait=1.0)
+    report(scheduler, "token", 0, 5000, reset_in=0.2)
+    started = time.monotonic()
+    asyncio.run(scheduler.acquire("token", PRIORITY_TRANSFER))
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.waited == 1
+
+def test_sheds_when_the_reset_is_too_far():
+    scheduler = build_scheduler(max_wait=1.0)
+    report(scheduler, "token", 0, 5000, reset_in=600.0)
+    with pytest.raises(RateLimitExceeded) as error:
+        asyncio.run(scheduler.acquire("token", PRIORITY_TRANSFER))
+    assert 590 <= error.value.retry_after <= 601
+
+def test_secondary_limit_backs_off():
+    scheduler = build_scheduler()
+    scheduler.update("token", 403, {"retry-after": "30"})
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(scheduler.acquire("token", PRIORITY_INTERACTIVE))
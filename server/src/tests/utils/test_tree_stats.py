@@ -0,0 +1,40 @@
+from server.utils.tree_stats import tree_statistics
+
+tree_entries = [
+    {"path": "README.md", "type": "blob", "sha": "r1", "size": 120},
+    {"path": "main.PY", "type": "blob", "sha": "b1", "size": 300},
+    {"path": "src", "type": "tree", "sha": "t1"},
+    {"path": "src/app.ts", "type": "blob", "sha": "b2", "size": 500},
+    {"path": "src/lib.d/Makefile", "type": "blob", "sha": "b3", "size": 40},
+    {"path": "src/lib/util.py", "type": "blob", "sha": "b4", "size": 200},
+    {"path": ".gitignore", "type": "blob", "sha": "b5", "size": 5},
+    {"path": "assets/logo.excalidraw", "type": "blob", "sha": "b6", "size": 900},
+    {"path": "docs/guía.ñx", "type": "blob", "sha": "b7", "size": 7},
+]
+
+def test_tree_statistics_totals():
+    stats = tree_statistics(tree_entries)
+    assert stats["file_count"] == 8
+    assert stats["directory_count"] == 1
+    assert stats["total_size"] == 2072
+
+def test_tree_statistics_extensions():
+    extensions = {item["extension"]: (item["files"], item["bytes"]) for item in tree_statistics(tree_entries)["extensions"]}
+    assert extensions == {
+        ".md": (1, 120), ".py": (2, 500), ".ts": (1, 500), "": (1, 40),
+        ".gitignore": (1, 5), ".excalidraw": (1, 900), ".ñx": (1, 7)
+    }
+
+def test_tree_statistics_languages_and_largest():
+    stats = tree_statistics(tree_entries, largest=2)
+    assert [item["language"] for item in stats["languages"]] == ["Python", "TypeScript"]
+    assert stats["languages"][0]["files"] == 2
+    assert stats["largest_files"] == [
+        {"path": "assets/logo.excalidraw", "size": 900},
+        {"path": "src/app.ts", "size": 500}
+    ]
+
+def test_tree_statistics_empty():
+    stats = tree_statistics([{"path": "src", "type": "tree", "sha": "t1"}])
+    assert stats["file_count"] == 0
+    assert stats["extensions"] == [] and stats["largest_files"] == []
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from server.services import github_service
+from server.services.github_service import TransferTarget, upload_repository_to_github
+from server.services.workspace import WorkspaceManager, WorkspaceUnavailable
+
+
+def build_manager(root, quota_bytes=100) -> WorkspaceManager:
+    return WorkspaceManager(root=str(root), quota_bytes=quota_bytes, admission_timeout=0.0, poll_interval=0.01)
+
+def test_quota_is_shared_until_release(tmp_path):
+    manager = build_manager(tmp_path)
+
+    async def run():
+        async with manager.workspace(60) as first:
+            assert first.is_dir()
+            with pytest.raises(WorkspaceUnavailable):
+                async with manager.workspace(50):
+                    pass
+        assert not first.exists()
+        async with manager.workspace(50):
+            assert manager._reserved_by_all() == 50
+
+    asyncio.run(run())
+    assert manager.rejected == 1
+
+def test_upload_keeps_the_workspace_reserved(tmp_path, monkeypatch):
+    manager = build_manager(tmp_path)
+
+    async def import_working_tree(work_tree, remote_url, message, env=None):
+        assert "token" not in remote_url
+
+    monkeypatch.setattr(github_service, "import_working_tree", import_working_tree)
+
+    async def run():
+        async with manager.workspace(60) as workspace:
+            repo_path = workspace / "seller-repo-abc"
+            repo_path.mkdir()
+            await upload_repository_to_github(
+                repo_path, "AgoraPay-repo", "token",
+                target=TransferTarget(clone_url="https://github.com/buyer/AgoraPay-repo.git"),
+                workspace=workspace
+            )
+            # The workspace directory holds the reservation until the context exits
+            assert workspace.is_dir()
+            assert manager._reserved_by_all() == 60
+        assert manager._reserved_by_all() == 0
+
+    asyncio.run(run())